@@ -3,6 +3,8 @@ Backend Configuration
 Centralized configuration for all backend services.
 """
 
+import os
+
 # Server Configuration
 HOST = "127.0.0.1"
 PORT = 5000
@@ -28,8 +30,30 @@ API_VERSION = "v1"
 
 # File Upload Configuration
 MAX_FILE_SIZE = 50 * 1024 * 1024  # 50MB
+MAX_DECOMPRESSED_SIZE = 8 * MAX_FILE_SIZE  # Límite del LAS descomprimido (.las.gz)
+MAX_R2_FILE_SIZE = 4 * MAX_FILE_SIZE  # 200MB: archivos subidos directamente a R2 desde el navegador
+INGEST_CHUNK_SIZE = 1024 * 1024  # Bloque de trabajo para la ingesta por streaming
 ALLOWED_EXTENSIONS = [".las", ".csv", ".txt"]
 
+# Background Processing Configuration
+PROCESSING_WORKERS = 2  # Trabajos de /process-caliper ejecutándose a la vez
+MAX_PENDING_JOBS = 16  # Trabajos en cola o en ejecución antes de responder 503
+JOB_RESULT_TTL = 15 * 60  # Segundos que se conserva el resultado de un trabajo terminado
+
+# Compute Tier Configuration
+COMPUTE_WORKERS = int(os.getenv("COMPUTE_WORKERS", 2))  # Procesos para parseo, centralización y procesamiento
+COMPUTE_MAX_PENDING = int(os.getenv("COMPUTE_MAX_PENDING", 8))  # Tareas en vuelo antes de responder 503
+
+# Result Cache Configuration
+RESULT_CACHE_MEMORY_ITEMS = 8  # Resultados de /process-caliper en el LRU en memoria
+RESULT_CACHE_DISK_BYTES = 512 * 1024 * 1024  # Tamaño máximo de exports/cache/results
+
+# Pipeline Stage Cache Configuration
+PIPELINE_STAGE_ENTRIES = 8  # Salidas guardadas por etapa y variante en workspace/<variante>/stages/
+
+# Pipe Catalog Configuration
+PIPE_CATALOG_FILE = os.getenv("PIPE_CATALOG_FILE")  # CSV alternativo a multifinger_caliper/pipe_catalog.csv
+
 # Cloudflare R2 Configuration__
 import os
 PORT = int(os.getenv("PORT", 8000))
@@ -38,4 +62,11 @@ R2_ACCESS_KEY_ID = os.getenv("R2_ACCESS_KEY_ID")
 R2_SECRET_ACCESS_KEY = os.getenv("R2_SECRET_ACCESS_KEY")
 R2_BUCKET_NAME = os.getenv("R2_BUCKET_NAME")
 R2_REGION = os.getenv("R2_REGION", "auto")  # Default to 'auto' for Cloudflare R2
-R2_ENDPOINT_URL = f"https://{R2_ACCOUNT_ID}.r2.cloudflarestorage.com" if R2_ACCOUNT_ID else None
\ No newline at end of file
+# R2_ENDPOINT_URL overrides the account endpoint (e.g. a local S3-compatible server such as MinIO)
+R2_ENDPOINT_URL = os.getenv("R2_ENDPOINT_URL") or (f"https://{R2_ACCOUNT_ID}.r2.cloudflarestorage.com" if R2_ACCOUNT_ID else None)
+R2_MAX_POOL_CONNECTIONS = 32  # Conexiones HTTP del cliente compartido
+R2_DOWNLOAD_PART_SIZE = 4 * 1024 * 1024  # Objetos mayores se descargan por rangos de este tamaño
+R2_DOWNLOAD_CONCURRENCY = 8  # Rangos descargados en paralelo
+R2_PRESIGNED_URL_EXPIRES = 3600  # Validez de las URLs prefirmadas (1 hora)
+MULTIPART_PART_SIZE = 16 * 1024 * 1024  # Tamaño de parte de las subidas multipart (mínimo de S3: 5MB)
+MULTIPART_MAX_PARTS = 10000  # Máximo de partes de S3 / R2
\ No newline at end of file
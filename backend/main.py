@@ -4,7 +4,10 @@ Main FastAPI Application
 Central entry point for all backend services.
 """
 
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from starlette.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 
 # Import configuration
@@ -12,13 +15,30 @@ from .config import CORS_ORIGINS
 
 # Import application modules
 from .multifinger_caliper.routes import router as multifinger_caliper_router
+from .multifinger_caliper.compute import compute_tier
+from .multifinger_caliper.r2_storage import get_r2_client, r2_configured
 # from .universal_converter.routes import router as universal_converter_router  # Uncomment when ready to use
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Start the compute tier workers (numpy, pandas and lasio preloaded) and
+    build the shared R2 client before serving requests.
+    """
+    await run_in_threadpool(compute_tier.start)
+    if r2_configured():
+        get_r2_client()
+    yield
+    await run_in_threadpool(compute_tier.shutdown)
+
+
 # Initialize FastAPI application
 app = FastAPI(
     title="Studio Backend API",
     description="Backend API for Studio applications",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Configure CORS middleware
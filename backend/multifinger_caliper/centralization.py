@@ -0,0 +1,135 @@
+"""
+Motor de centralización vectorizado (método de Taubin por lotes).
+
+Ajusta un círculo a cada fila de la matriz (profundidad × dedos) en una sola
+pasada de NumPy y recalcula los radios desde el centro ajustado.
+"""
+
+from functools import lru_cache
+from typing import Tuple
+
+import numpy as np
+
+
+@lru_cache(maxsize=8)
+def finger_angle_tables(num_fingers: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Tablas precalculadas de coseno y seno para los ángulos de cada dedo.
+
+    Args:
+        num_fingers: Número de dedos (columnas R) de la herramienta
+
+    Returns:
+        Tupla (cos, sin) de arrays de solo lectura con forma (num_fingers,)
+    """
+    angles = 2 * np.pi * np.arange(num_fingers) / num_fingers
+    cos_table = np.cos(angles)
+    sin_table = np.sin(angles)
+    cos_table.flags.writeable = False
+    sin_table.flags.writeable = False
+    return cos_table, sin_table
+
+
+def fit_circles(x: np.ndarray, y: np.ndarray, valid: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Ajusta un círculo por fila resolviendo en lote los sistemas 3x3 (AᵀA)·p = AᵀB.
+
+    Args:
+        x, y: Coordenadas cartesianas con forma (filas, dedos)
+        valid: Máscara booleana de puntos válidos con la misma forma
+
+    Returns:
+        Tupla (center_x, center_y, radius), cada uno con forma (filas,)
+    """
+    w = valid.astype(np.float64)
+    n = w.sum(axis=1)
+    safe_n = np.where(n > 0, n, 1.0)
+
+    x = np.where(valid, x, 0.0)
+    y = np.where(valid, y, 0.0)
+    x_mean = x.sum(axis=1) / safe_n
+    y_mean = y.sum(axis=1) / safe_n
+
+    # Centrar los puntos (los inválidos quedan en cero y no aportan a las sumas)
+    xc = (x - x_mean[:, None]) * w
+    yc = (y - y_mean[:, None]) * w
+    zc = -(xc ** 2 + yc ** 2)
+
+    sxx = (xc * xc).sum(axis=1)
+    sxy = (xc * yc).sum(axis=1)
+    syy = (yc * yc).sum(axis=1)
+    sx = xc.sum(axis=1)
+    sy = yc.sum(axis=1)
+
+    ata = np.empty((len(n), 3, 3))
+    ata[:, 0, 0] = sxx
+    ata[:, 0, 1] = ata[:, 1, 0] = sxy
+    ata[:, 0, 2] = ata[:, 2, 0] = sx
+    ata[:, 1, 1] = syy
+    ata[:, 1, 2] = ata[:, 2, 1] = sy
+    ata[:, 2, 2] = n
+    atb = np.stack([(xc * zc).sum(axis=1), (yc * zc).sum(axis=1), zc.sum(axis=1)], axis=1)
+
+    # Sistemas singulares (p. ej. puntos colineales) usan el centroide como fallback
+    det = np.linalg.det(ata)
+    scale = np.maximum(sxx * syy * n, np.finfo(np.float64).tiny)
+    singular = ~(np.abs(det) > 1e-12 * scale)
+    ata[singular] = np.eye(3)
+    atb[singular] = 0.0
+
+    params = np.linalg.solve(ata, atb[:, :, None])[:, :, 0]
+    a, b, c = params[:, 0], params[:, 1], params[:, 2]
+
+    center_x = -a / 2 + x_mean
+    center_y = -b / 2 + y_mean
+    with np.errstate(invalid="ignore"):
+        radius = np.sqrt((a ** 2 + b ** 2) / 4 - c)
+
+    if singular.any():
+        center_x[singular] = x_mean[singular]
+        center_y[singular] = y_mean[singular]
+        dist = np.sqrt((x - x_mean[:, None]) ** 2 + (y - y_mean[:, None]) ** 2) * w
+        radius[singular] = dist[singular].sum(axis=1) / safe_n[singular]
+
+    return center_x, center_y, radius
+
+
+def taubin_centralize_matrix(r_matrix: np.ndarray, decimals: int = 4) -> np.ndarray:
+    """
+    Centraliza todas las filas de la matriz de radios en una sola pasada.
+
+    Equivale a aplicar apply_taubin_centralization fila por fila: los valores
+    nulos o <= 0 se conservan, y las filas con menos de 3 radios válidos no
+    se modifican.
+
+    Args:
+        r_matrix: Matriz (profundidad × dedos) con NaN en valores nulos
+        decimals: Decimales de redondeo de los radios centralizados (None para no redondear)
+
+    Returns:
+        Nueva matriz float64 con los radios centralizados
+    """
+    r = np.asarray(r_matrix, dtype=np.float64)
+    if r.ndim != 2 or r.shape[1] < 3:
+        return r.copy()
+
+    with np.errstate(invalid="ignore"):
+        valid = np.isfinite(r) & (r > 0)
+    fit_rows = valid.sum(axis=1) >= 3
+
+    result = r.copy()
+    cos_table, sin_table = finger_angle_tables(r.shape[1])
+    rows = r[fit_rows]
+    rows_valid = valid[fit_rows]
+    x = rows * cos_table
+    y = rows * sin_table
+
+    center_x, center_y, _ = fit_circles(x, y, rows_valid)
+    new_r = np.hypot(x - center_x[:, None], y - center_y[:, None])
+    result[fit_rows] = np.where(rows_valid, new_r, rows)
+
+    if decimals is not None:
+        # Igual que el camino por filas: se redondean las filas con algún valor
+        touched = np.isfinite(r).any(axis=1)
+        result[touched] = np.round(result[touched], decimals)
+    return result
@@ -0,0 +1,250 @@
+"""
+Nivel de cómputo en procesos separados.
+
+El parseo de los LAS, la centralización, la exportación de CSV y el
+procesamiento del caliper son CPU puro (y en buena parte Python que retiene
+el GIL). Si corren en el proceso del servidor, /health, /progress o
+/get-presigned-url esperan detrás de ellos aunque se ejecuten en hilos.
+ComputeTier los envía a un ProcessPoolExecutor con:
+
+- workers calientes: cada proceso importa numpy, pandas, lasio y los módulos
+  del pipeline al arrancar (WARM_MODULES), y start() los lanza todos al
+  iniciar la aplicación, de modo que la primera petición no paga el arranque.
+- límite de concurrencia: COMPUTE_WORKERS procesos; como mucho
+  COMPUTE_MAX_PENDING tareas en vuelo (en ejecución o en cola), el resto se
+  rechaza con ComputeBusyError (503).
+- métricas de cola: tareas en vuelo, profundidad de la cola, espera y tiempo
+  de ejecución medios (GET /metrics).
+
+El progreso de las tareas largas vuelve al proceso principal por una cola
+compartida con los workers al crearlos; un hilo la reparte a los callbacks.
+"""
+
+import asyncio
+import importlib
+import itertools
+import multiprocessing
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from ..config import COMPUTE_WORKERS, COMPUTE_MAX_PENDING
+
+WARM_MODULES = (
+    "numpy",
+    "pandas",
+    "lasio",
+    "openpyxl",
+    "backend.multifinger_caliper.las_processor",
+    "backend.multifinger_caliper.df_manage",
+)
+
+_progress_queue = None  # Cola de progreso del worker (se asigna en _init_worker)
+
+
+class ComputeBusyError(RuntimeError):
+    """Hay demasiadas tareas de cómputo en vuelo."""
+
+
+def _init_worker(progress_queue, modules) -> None:
+    """Inicializador de cada worker: guarda la cola de progreso e importa los módulos pesados."""
+    global _progress_queue
+    _progress_queue = progress_queue
+    for name in modules:
+        try:
+            importlib.import_module(name)
+        except ImportError as e:
+            print(f"[COMPUTE] Could not preload {name}: {e}")
+
+
+def _warm(delay: float) -> int:
+    """Tarea vacía para forzar el arranque de los workers."""
+    time.sleep(delay)
+    return multiprocessing.current_process().pid
+
+
+def _run_task(task_id: Optional[int], func: Callable, args: tuple, kwargs: Dict[str, Any]):
+    """
+    Ejecuta func en el worker y devuelve (inicio, fin, resultado).
+
+    Si task_id no es None, func recibe un callback progress(etapa, porcentaje)
+    que publica en la cola compartida.
+    """
+    started = time.time()
+    if task_id is not None:
+        def progress(stage: str, percent: float) -> None:
+            _progress_queue.put((task_id, stage, percent))
+        kwargs = {**kwargs, "progress": progress}
+    result = func(*args, **kwargs)
+    return started, time.time(), result
+
+
+class ComputeTier:
+    """ProcessPoolExecutor con workers calientes, límite de tareas en vuelo y métricas."""
+
+    def __init__(self, max_workers: int = COMPUTE_WORKERS, max_pending: int = COMPUTE_MAX_PENDING,
+                 modules=WARM_MODULES):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.modules = tuple(modules)
+        self._context = multiprocessing.get_context("spawn")
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._progress_queue = None
+        self._dispatcher: Optional[threading.Thread] = None
+        self._callbacks: Dict[int, Callable[[str, float], None]] = {}
+        self._task_ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self.counters = {"submitted": 0, "completed": 0, "failed": 0, "cancelled": 0, "rejected": 0,
+                         "max_in_flight": 0, "max_queue_depth": 0}
+        self._wait_total = 0.0
+        self._run_total = 0.0
+        self._run_max = 0.0
+
+    # Ciclo de vida
+
+    def start(self, warm: bool = True) -> None:
+        """Crea el pool (si no existe) y, con warm, arranca ya todos los workers."""
+        with self._lock:
+            if self._pool is not None:
+                return
+            self._progress_queue = self._context.Queue()
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_workers, mp_context=self._context,
+                initializer=_init_worker, initargs=(self._progress_queue, self.modules),
+            )
+            self._dispatcher = threading.Thread(target=self._dispatch_progress, name="compute-progress",
+                                                daemon=True)
+            self._dispatcher.start()
+            pool = self._pool
+
+        if warm:
+            started = time.time()
+            # Tareas solapadas para que el pool lance un proceso por tarea
+            pids = {future.result() for future in [pool.submit(_warm, 0.2) for _ in range(self.max_workers)]}
+            print(f"[COMPUTE] {len(pids)} workers ready in {time.time() - started:.2f}s")
+
+    def shutdown(self) -> None:
+        with self._lock:
+            pool, queue = self._pool, self._progress_queue
+            self._pool = None
+        if pool is None:
+            return
+        pool.shutdown(wait=True, cancel_futures=True)
+        queue.put(None)
+        self._dispatcher.join(timeout=5)
+
+    def _dispatch_progress(self) -> None:
+        queue = self._progress_queue
+        while True:
+            message = queue.get()
+            if message is None:
+                break
+            task_id, stage, percent = message
+            callback = self._callbacks.get(task_id)
+            if callback is not None:
+                try:
+                    callback(stage, percent)
+                except Exception as e:
+                    print(f"[COMPUTE] Progress callback error: {e}")
+
+    # Envío de tareas
+
+    def submit(self, func: Callable, *args, progress: Optional[Callable[[str, float], None]] = None,
+               **kwargs) -> Future:
+        """
+        Envía func(*args, **kwargs) a un worker.
+
+        func debe poder importarse por nombre (función de nivel de módulo) y
+        sus argumentos y resultado deben poder serializarse con pickle. Con
+        progress, func recibe además un callback progress(etapa, porcentaje)
+        cuyas llamadas se reenvían a progress en este proceso.
+
+        Returns:
+            Future con el resultado de func
+
+        Raises:
+            ComputeBusyError: si ya hay max_pending tareas en vuelo
+        """
+        if self._pool is None:
+            self.start(warm=False)
+
+        with self._lock:
+            if self._in_flight >= self.max_pending:
+                self.counters["rejected"] += 1
+                raise ComputeBusyError(f"Hay {self._in_flight} tareas de cómputo en curso; intente de nuevo más tarde")
+            self._in_flight += 1
+            self.counters["submitted"] += 1
+            self.counters["max_in_flight"] = max(self.counters["max_in_flight"], self._in_flight)
+            self.counters["max_queue_depth"] = max(self.counters["max_queue_depth"], self._queue_depth())
+            task_id = next(self._task_ids) if progress is not None else None
+            if task_id is not None:
+                self._callbacks[task_id] = progress
+
+        submitted = time.time()
+        inner = self._pool.submit(_run_task, task_id, func, args, kwargs)
+        outer: Future = Future()
+
+        def done(future: Future) -> None:
+            with self._lock:
+                self._in_flight -= 1
+                if task_id is not None:
+                    self._callbacks.pop(task_id, None)
+                # Cancelada por shutdown(cancel_futures=True): exception() lanzaría CancelledError
+                cancelled = future.cancelled()
+                error = None if cancelled else future.exception()
+                if cancelled:
+                    self.counters["cancelled"] += 1
+                elif error is None:
+                    started, finished, _ = future.result()
+                    self.counters["completed"] += 1
+                    self._wait_total += max(0.0, started - submitted)
+                    self._run_total += finished - started
+                    self._run_max = max(self._run_max, finished - started)
+                else:
+                    self.counters["failed"] += 1
+            if cancelled:
+                outer.cancel()
+            elif error is None:
+                outer.set_result(future.result()[2])
+            else:
+                outer.set_exception(error)
+
+        inner.add_done_callback(done)
+        return outer
+
+    async def run(self, func: Callable, *args, **kwargs) -> Any:
+        """Ejecuta func en un worker sin bloquear el event loop."""
+        return await asyncio.wrap_future(self.submit(func, *args, **kwargs))
+
+    def call(self, func: Callable, *args, **kwargs) -> Any:
+        """Ejecuta func en un worker y espera el resultado (para hilos de trabajos en segundo plano)."""
+        return self.submit(func, *args, **kwargs).result()
+
+    # Métricas
+
+    def _queue_depth(self) -> int:
+        return max(0, self._in_flight - self.max_workers)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = dict(self.counters)
+            in_flight = self._in_flight
+            queue_depth = self._queue_depth()
+            wait_total, run_total, run_max = self._wait_total, self._run_total, self._run_max
+        completed = counters["completed"]
+        return {
+            "workers": self.max_workers,
+            "started": self._pool is not None,
+            "max_pending": self.max_pending,
+            "in_flight": in_flight,
+            "queue_depth": queue_depth,
+            **counters,
+            "avg_wait_ms": round(wait_total / completed * 1000, 2) if completed else None,
+            "avg_run_ms": round(run_total / completed * 1000, 2) if completed else None,
+            "max_run_ms": round(run_max * 1000, 2),
+        }
+
+
+compute_tier = ComputeTier()
@@ -0,0 +1,262 @@
+"""
+Almacén binario de datasets ingestados.
+
+Cada pozo subido se guarda una sola vez como un directorio con arrays .npy
+y un encabezado JSON:
+
+    exports/datasets/<dataset_id>/
+        header.json          # curvas, columnas R, metadatos, número de filas
+        depth.npy            # profundidad (índice del dataset)
+        raw.npy              # todas las curvas originales (filas × curvas), NULL -> NaN
+        centralized_r.npy    # solo las curvas R centralizadas (filas × dedos)
+        workspace/           # artefactos del dataset (tabla de integridad, reportes, CSV de diagnóstico)
+            centralized/
+            decentralized/
+
+Las etapas posteriores abren los arrays con memoria mapeada (mmap_mode='r')
+en lugar de volver a parsear CSV. El CSV se genera solo bajo demanda.
+"""
+
+import hashlib
+import json
+import os
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+HEADER_FILE = "header.json"
+DEPTH_FILE = "depth.npy"
+RAW_FILE = "raw.npy"
+CENTRALIZED_FILE = "centralized_r.npy"
+WORKSPACE_DIR = "workspace"
+
+
+def variant_name(use_centralized: bool = True) -> str:
+    return "centralized" if use_centralized else "decentralized"
+
+
+def get_datasets_dir() -> str:
+    """Obtiene la ruta del directorio exports/datasets"""
+    datasets_dir = os.path.join(os.path.dirname(__file__), "..", "..", "exports", "datasets")
+    return os.path.abspath(datasets_dir)
+
+
+def _save_array(path: str, array: np.ndarray) -> None:
+    """Guarda un .npy de forma atómica (escribe a un temporal y renombra)."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        np.save(f, np.ascontiguousarray(array))
+    os.replace(tmp_path, path)
+
+
+def compute_content_hash(curves: List[str], data: np.ndarray, centralized_r: np.ndarray) -> str:
+    """
+    Hash SHA-256 del contenido de un dataset (curvas, matriz original y radios
+    centralizados). Dos ingestas del mismo pozo producen el mismo hash.
+    """
+    digest = hashlib.sha256()
+    digest.update(json.dumps(list(curves)).encode("utf-8"))
+    for array in (data, centralized_r):
+        array = np.ascontiguousarray(array, dtype=np.float64)
+        digest.update(str(array.shape).encode("ascii"))
+        digest.update(memoryview(array).cast("B"))
+    return digest.hexdigest()
+
+
+class Dataset:
+    """Dataset ingestado, con los arrays abiertos bajo demanda y memoria mapeada."""
+
+    def __init__(self, path: str, header: Dict[str, Any]):
+        self.path = path
+        self.header = header
+        self._arrays: Dict[str, np.ndarray] = {}
+
+    @property
+    def dataset_id(self) -> str:
+        return self.header["dataset_id"]
+
+    @property
+    def well_name(self) -> str:
+        return self.header.get("well_name", "unknown_well")
+
+    @property
+    def curves(self) -> List[str]:
+        return self.header["curves"]
+
+    @property
+    def r_columns(self) -> List[str]:
+        return self.header["r_columns"]
+
+    @property
+    def depth_column(self) -> str:
+        return self.header["depth_column"]
+
+    @property
+    def content_hash(self) -> str:
+        """Hash de contenido (se calcula si el dataset es anterior a guardarlo en el encabezado)."""
+        if "content_hash" not in self.header:
+            self.header["content_hash"] = compute_content_hash(self.curves, self.raw, self.centralized_r)
+        return self.header["content_hash"]
+
+    def _load(self, filename: str) -> np.ndarray:
+        if filename not in self._arrays:
+            self._arrays[filename] = np.load(os.path.join(self.path, filename), mmap_mode="r")
+        return self._arrays[filename]
+
+    @property
+    def depth(self) -> np.ndarray:
+        return self._load(DEPTH_FILE)
+
+    @property
+    def raw(self) -> np.ndarray:
+        return self._load(RAW_FILE)
+
+    @property
+    def centralized_r(self) -> np.ndarray:
+        return self._load(CENTRALIZED_FILE)
+
+    def r_matrix(self, use_centralized: bool = True) -> np.ndarray:
+        """Matriz de radios (filas × dedos), centralizada u original."""
+        if use_centralized:
+            return self.centralized_r
+        return self.raw[:, self.header["r_column_indices"]]
+
+    def label(self, use_centralized: bool = True) -> str:
+        """Nombre descriptivo equivalente al antiguo nombre del CSV exportado."""
+        suffix = "_curves_centralized" if use_centralized else "_curves_decentralized"
+        return f"{self.well_name}{suffix}"
+
+    def to_dataframe(self, use_centralized: bool = True) -> pd.DataFrame:
+        """
+        DataFrame con todas las curvas, igual al que producía pd.read_csv sobre
+        los CSV exportados. Sin centralizar se construye sin copiar sobre la
+        matriz mapeada; centralizado se sustituyen las columnas R.
+        """
+        if not use_centralized:
+            return pd.DataFrame(self.raw, columns=self.curves, copy=False)
+        data = np.array(self.raw)
+        data[:, self.header["r_column_indices"]] = self.centralized_r
+        return pd.DataFrame(data, columns=self.curves, copy=False)
+
+    def workspace(self, *parts: str) -> str:
+        """
+        Directorio de trabajo aislado del dataset (se crea si no existe).
+        Los artefactos de cada variante van en workspace/<variante>/.
+        """
+        path = os.path.join(self.path, WORKSPACE_DIR, *parts)
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def csv_path(self, use_centralized: bool = True) -> str:
+        return os.path.join(self.path, f"{self.label(use_centralized)}.csv")
+
+    def export_csv(self, use_centralized: bool = True) -> str:
+        """Exporta el dataset a CSV bajo demanda (se reutiliza si ya existe)."""
+        path = self.csv_path(use_centralized)
+        if not os.path.exists(path):
+            tmp_path = f"{path}.{os.getpid()}.tmp"  # Un archivo temporal por proceso
+            self.to_dataframe(use_centralized).to_csv(
+                tmp_path, index=False, na_rep="", encoding="utf-8", lineterminator="\r\n"
+            )
+            os.replace(tmp_path, path)
+            print(f"[DATASET] CSV exportado: {path}")
+        return path
+
+
+def save_dataset(
+    curves: List[str],
+    data: np.ndarray,
+    r_column_indices: List[int],
+    centralized_r: np.ndarray,
+    metadata: Optional[Dict[str, Any]] = None,
+    dataset_id: Optional[str] = None,
+) -> Dataset:
+    """
+    Guarda un dataset nuevo en exports/datasets/<dataset_id>/.
+
+    Args:
+        curves: Mnemónicos de las curvas (columnas de data)
+        data: Matriz original (filas × curvas) con NaN en los nulos
+        r_column_indices: Índices de las columnas R dentro de data
+        centralized_r: Matriz de radios centralizados (filas × dedos)
+        metadata: Metadatos del LAS (pozo, compañía, fecha, versión)
+        dataset_id: Identificador a usar (por defecto uno nuevo)
+
+    Returns:
+        Dataset guardado
+    """
+    dataset_id = dataset_id or uuid.uuid4().hex[:12]
+    path = os.path.join(get_datasets_dir(), dataset_id)
+    os.makedirs(path, exist_ok=True)
+
+    depth_column = "DEPT" if "DEPT" in curves else curves[0]
+    depth = data[:, curves.index(depth_column)]
+
+    _save_array(os.path.join(path, DEPTH_FILE), depth)
+    _save_array(os.path.join(path, RAW_FILE), data)
+    _save_array(os.path.join(path, CENTRALIZED_FILE), centralized_r)
+
+    metadata = metadata or {}
+    header = {
+        "dataset_id": dataset_id,
+        "well_name": str(metadata.get("well_name", "unknown_well")),
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "rows": int(data.shape[0]),
+        "content_hash": compute_content_hash(curves, data, centralized_r),
+        "curves": list(curves),
+        "depth_column": depth_column,
+        "r_columns": [curves[i] for i in r_column_indices],
+        "r_column_indices": list(r_column_indices),
+        "metadata": {key: (value if isinstance(value, (str, int, float)) else str(value)) for key, value in metadata.items()},
+    }
+
+    # El encabezado se escribe al final: su presencia indica un dataset completo
+    tmp_header = os.path.join(path, f"{HEADER_FILE}.tmp")
+    with open(tmp_header, "w", encoding="utf-8") as f:
+        json.dump(header, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_header, os.path.join(path, HEADER_FILE))
+
+    print(f"[DATASET] Dataset guardado: {path} ({header['rows']} filas, {len(curves)} curvas)")
+    return Dataset(path, header)
+
+
+def open_dataset(dataset_id: str) -> Optional[Dataset]:
+    """Abre un dataset por su id (None si no existe)."""
+    if not dataset_id or os.path.basename(dataset_id) != dataset_id or dataset_id.startswith("."):
+        return None  # Ids con rutas no son válidos
+    path = os.path.join(get_datasets_dir(), dataset_id)
+    header_path = os.path.join(path, HEADER_FILE)
+    if not os.path.exists(header_path):
+        return None
+    with open(header_path, encoding="utf-8") as f:
+        header = json.load(f)
+    return Dataset(path, header)
+
+
+def export_dataset_csv(dataset_id: str, use_centralized: bool = True) -> str:
+    """Exporta un dataset a CSV por id (para ejecutarlo en un worker del nivel de cómputo)."""
+    dataset = open_dataset(dataset_id)
+    if dataset is None:
+        raise ValueError(f"Dataset {dataset_id} no encontrado")
+    return dataset.export_csv(use_centralized)
+
+
+def latest_dataset() -> Optional[Dataset]:
+    """Abre el dataset ingestado más recientemente (None si no hay ninguno)."""
+    datasets_dir = get_datasets_dir()
+    if not os.path.isdir(datasets_dir):
+        return None
+
+    candidates = []
+    for entry in os.scandir(datasets_dir):
+        header_path = os.path.join(entry.path, HEADER_FILE)
+        if entry.is_dir() and os.path.exists(header_path):
+            candidates.append((os.path.getmtime(header_path), entry.name))
+
+    if not candidates:
+        return None
+    _, dataset_id = max(candidates)
+    return open_dataset(dataset_id)
@@ -1,9 +1,36 @@
+import numpy as np
 import pandas as pd
 import os
 import re
-import time
+import shutil
+import tempfile
+import warnings
 from datetime import datetime
-from typing import Dict, List, Tuple, Optional
+from functools import lru_cache
+from typing import Callable, Dict, List, Tuple, Optional
+
+try:
+    from .dataset_store import latest_dataset, open_dataset, variant_name
+    from .downsampling import DEFAULT_MAX_POINTS, ENVELOPE, LTTB, downsample, points_for_pixels
+    from . import joints
+    from . import statistics as pipe_statistics
+    from .pipeline import caliper_pipeline, stage_store
+    from .result_cache import cache_key, result_cache
+    from .registry import dataset_registry
+except ImportError:  # ejecutado como script desde joints.py / statistics.py
+    from dataset_store import latest_dataset, open_dataset, variant_name
+    from downsampling import DEFAULT_MAX_POINTS, ENVELOPE, LTTB, downsample, points_for_pixels
+    import joints
+    import statistics as pipe_statistics
+    from pipeline import caliper_pipeline, stage_store
+    result_cache = None  # Sin caché de resultados ni registro fuera del paquete
+    dataset_registry = None
+
+ProgressCallback = Callable[[str, float], None]
+
+
+def _no_progress(stage: str, percent: float) -> None:
+    pass
 
 def get_exports_dir() -> str:
     """Obtiene la ruta del directorio exports"""
@@ -63,6 +90,55 @@ def get_latest_csv_dataframe(use_centralized: bool = True) -> Tuple[Optional[pd.
         print(f"[ERROR] Error al leer CSV {latest_file['name']}: {str(e)}")
         return None, None
 
+def get_latest_dataframe(use_centralized: bool = True) -> Tuple[Optional[pd.DataFrame], Optional[str]]:
+    """
+    Obtiene el DataFrame del dataset ingestado más reciente (almacén binario
+    en exports/datasets/). Si todavía no hay datasets, usa los CSV antiguos.
+
+    Args:
+        use_centralized: Si True, usa los radios centralizados; si False, los originales
+
+    Returns:
+        Tuple[DataFrame, nombre] o (None, None) si no hay datos
+    """
+    dataset = latest_dataset()
+    if dataset is None:
+        print("[WARNING] No hay datasets en exports/datasets, buscando CSV")
+        return get_latest_csv_dataframe(use_centralized)
+    return dataset_dataframe(dataset, use_centralized)
+
+def dataset_dataframe(dataset, use_centralized: bool = True) -> Tuple[pd.DataFrame, str]:
+    """DataFrame y nombre descriptivo de un dataset del almacén."""
+    df = dataset.to_dataframe(use_centralized)
+    name = dataset.label(use_centralized)
+    print(f"[SUCCESS] Dataset cargado: {name} [{dataset.dataset_id}] ({len(df)} filas, {len(df.columns)} columnas)")
+    return df, name
+
+def detection_params(overrides: Optional[Dict] = None) -> Dict:
+    """
+    Parámetros de detección de juntas y de asignación de tubería: las
+    constantes de joints.py / statistics.py con los valores indicados encima.
+
+    Raises:
+        ValueError: si se indica un parámetro desconocido
+    """
+    params = {
+        "finger_jump": joints.finger_jump,
+        "finger_jump_slim": joints.finger_jump_slim,
+        "threshold": joints.threshold,
+        "slim_threshold": joints.slim_threshold,
+        "slim_threshold_1": joints.slim_threshold_1,
+        "collar_lenght_steps": joints.collar_lenght_steps,
+        "tally_difference": pipe_statistics.tally_difference,
+        "pipe_od": None,  # Sin restricción: todo el catálogo de tubulares
+    }
+    for key, value in (overrides or {}).items():
+        if key not in params:
+            raise ValueError(f"Parámetro de detección desconocido: {key}")
+        if value is not None:
+            params[key] = value
+    return params
+
 def detect_r_curves(df: pd.DataFrame) -> Dict:
     """
     Detecta curvas R (R01, R02, ..., R40) en el DataFrame
@@ -96,6 +172,68 @@ def detect_r_curves(df: pd.DataFrame) -> Dict:
         "depth_column": "DEPT" if "DEPT" in df.columns else df.columns[0]  # Asumir primera columna como profundidad
     }
 
+def numeric_matrix(df: pd.DataFrame, columns: List[str]) -> np.ndarray:
+    """
+    Devuelve las columnas indicadas como matriz float64; los valores no
+    numéricos se convierten en NaN.
+    """
+    block = df[columns]
+    try:
+        return block.to_numpy(dtype=np.float64)
+    except (ValueError, TypeError):
+        return block.apply(pd.to_numeric, errors="coerce").to_numpy(dtype=np.float64)
+
+def compute_diameter_tracks(r_matrix: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Calcula con reducciones de NumPy los diámetros mínimo, máximo y promedio
+    por profundidad, y el mínimo por dedos opuestos.
+
+    Por fila solo cuentan los radios numéricos finitos en (-1000, 1000). Igual
+    que el cálculo por filas original, los dedos opuestos se emparejan sobre
+    los radios válidos compactados: r[i] + r[i + n_validos // 2]. Las filas sin
+    valores válidos quedan en 0 (placeholder).
+
+    Args:
+        r_matrix: Matriz de radios (filas × dedos)
+
+    Returns:
+        Dict con arrays "min", "max", "avg", "min_opposite" y "valid_count"
+    """
+    r = np.asarray(r_matrix, dtype=np.float64)
+    rows, num_fingers = r.shape
+
+    with np.errstate(invalid="ignore"):
+        valid = np.isfinite(r) & (r > -1000) & (r < 1000)
+    valid_count = valid.sum(axis=1)
+    has_values = valid_count > 0
+
+    diameters = r * 2
+    min_d = np.where(valid, diameters, np.inf).min(axis=1, initial=np.inf)
+    max_d = np.where(valid, diameters, -np.inf).max(axis=1, initial=-np.inf)
+    sum_d = np.where(valid, diameters, 0.0).sum(axis=1)
+    avg_d = np.divide(sum_d, valid_count, out=np.zeros(rows), where=has_values)
+
+    # Compactar los radios válidos al inicio de cada fila manteniendo el orden de los dedos
+    order = np.argsort(~valid, axis=1, kind="stable")
+    compact = np.take_along_axis(r, order, axis=1)
+    half = valid_count // 2
+    positions = np.arange(num_fingers)
+    opposite_idx = np.minimum(positions[None, :] + half[:, None], max(num_fingers - 1, 0))
+    pairs = compact + np.take_along_axis(compact, opposite_idx, axis=1)
+    pairs = np.where(positions[None, :] < half[:, None], pairs, np.inf)
+    min_opposite = pairs.min(axis=1, initial=np.inf)
+    # Fallback si no se pueden calcular opuestos (un solo radio válido)
+    min_opposite = np.where(half > 0, min_opposite, min_d)
+
+    zeros = np.zeros(rows)
+    return {
+        "min": np.where(has_values, min_d, zeros),
+        "max": np.where(has_values, max_d, zeros),
+        "avg": avg_d,
+        "min_opposite": np.where(has_values, min_opposite, zeros),
+        "valid_count": valid_count,
+    }
+
 def calculate_caliper_statistics(df: pd.DataFrame, r_curves_info: Dict) -> Dict:
     """
     Calcula estadísticas de min/max/promedio para las curvas R por punto de profundidad.
@@ -132,98 +270,34 @@ def calculate_caliper_statistics(df: pd.DataFrame, r_curves_info: Dict) -> Dict:
         print("[ERROR] No valid depth data after cleaning")
         return {"error": "No hay datos válidos de profundidad"}
 
-    # Extraer datos de profundidad
-    depth_values = df_clean[depth_col].values.tolist()
-    print(f"[DEBUG] Depth values sample: {depth_values[:5]}")
-
-    # Calcular estadísticas para cada punto de profundidad
-    min_values = []
-    max_values = []
-    avg_values = []
-    min_opposite_values = []  # Nuevo: mínimo calculado con dedos opuestos
-
-    print(f"[DEBUG] Processing {len(df_clean)} rows...")
-
-    for idx, row in df_clean.iterrows():
-        r_values = []
-
-        # Recopilar valores de todas las curvas R para este punto
-        for r_col in r_columns:
-            if r_col in df_clean.columns:
-                value = row[r_col]
-
-                # Simplificar el filtro: incluir cualquier valor numérico válido
-                try:
-                    # Intentar convertir a float
-                    float_value = float(value)
-
-                    # Solo verificar que sea un número finito y no NaN
-                    if pd.notna(float_value) and not pd.isna(float_value) and float_value != float('inf') and float_value != float('-inf'):
-                        # Incluir cualquier valor numérico razonable (no valores extremos)
-                        if -1000 < float_value < 1000:
-                            r_values.append(float_value)
-                except (ValueError, TypeError):
-                    # Si no se puede convertir, ignorar silenciosamente
-                    pass
-
-        if r_values:
-            # Calcular diámetros: radio × 2
-            diameters = [r * 2 for r in r_values]
-            min_values.append(min(diameters))
-            max_values.append(max(diameters))
-            avg_values.append(sum(diameters) / len(diameters))
-
-            # Calcular mínimo usando método de dedos opuestos (como en statistics.py)
-            num_fingers = len(r_values)
-            half = num_fingers // 2
-            opposite_diameters = []
-
-            for i in range(half):
-                if i + half < num_fingers:
-                    # Diámetro = radio_i + radio_opuesto
-                    opposite_diameter = r_values[i] + r_values[i + half]
-                    opposite_diameters.append(opposite_diameter)
-
-            if opposite_diameters:
-                min_opposite_values.append(min(opposite_diameters))
-            else:
-                # Fallback si no se pueden calcular opuestos
-                min_opposite_values.append(min(diameters))
-        else:
-            # Si no hay valores válidos, usar 0 como placeholder
-            min_values.append(0)
-            max_values.append(0)
-            avg_values.append(0)
-            min_opposite_values.append(0)
-
-        # Debug output for first few rows
-        if idx < 3:
-            print(f"[DEBUG] Row {idx}: {len(r_values)} valid R values, diameters: {[r * 2 for r in r_values[:3]] if r_values else 'None'}")
-
-    # Filtrar valores 0 para el gráfico (placeholders)
-    valid_indices = [i for i, v in enumerate(avg_values) if v != 0]
-
-    print(f"[DEBUG] Total points: {len(avg_values)}, Valid points: {len(valid_indices)}")
-    print(f"[DEBUG] Sample avg_values: {avg_values[:5]}")
-
-    if not valid_indices:
+    # Extraer datos de profundidad y matriz de radios (filas × dedos)
+    depth_values = df_clean[depth_col].to_numpy(dtype=np.float64)
+    r_matrix = numeric_matrix(df_clean, [col for col in r_columns if col in df_clean.columns])
+    print(f"[DEBUG] Depth values sample: {depth_values[:5].tolist()}")
+    print(f"[DEBUG] Processing {r_matrix.shape[0]} rows x {r_matrix.shape[1]} R curves...")
+
+    tracks = compute_diameter_tracks(r_matrix)
+
+    # Filtrar valores 0 para el gráfico (placeholders de filas sin valores válidos)
+    valid_rows = tracks["avg"] != 0
+
+    print(f"[DEBUG] Total points: {len(valid_rows)}, Valid points: {int(valid_rows.sum())}")
+
+    if not valid_rows.any():
         print("[ERROR] No valid data points found for plotting")
         return {"error": "No hay datos válidos para graficar"}
 
-    # Solo usar puntos válidos
-    plot_depth = [depth_values[i] for i in valid_indices]
-    plot_min = [min_opposite_values[i] for i in valid_indices]  # Usar el mínimo de dedos opuestos
-    plot_max = [max_values[i] for i in valid_indices]
-    plot_avg = [avg_values[i] for i in valid_indices]
-
-    # Invertir el orden de los datos para que la profundidad menor aparezca arriba
-    plot_depth.reverse()
-    plot_min.reverse()
-    plot_max.reverse()
-    plot_avg.reverse()
+    # Solo usar puntos válidos, invertidos para que la profundidad menor aparezca arriba
+    plot_depth = depth_values[valid_rows][::-1]
+    plot_min = tracks["min_opposite"][valid_rows][::-1]  # Usar el mínimo de dedos opuestos
+    plot_max = tracks["max"][valid_rows][::-1]
+    plot_avg = tracks["avg"][valid_rows][::-1]
 
     print(f"[DEBUG] Final plot data lengths: depth={len(plot_depth)}, min={len(plot_min)}, max={len(plot_max)}, avg={len(plot_avg)}")
 
+    diameter_min = min(plot_min.min(), plot_max.min(), plot_avg.min())
+    diameter_max = max(plot_min.max(), plot_max.max(), plot_avg.max())
+
     return {
         "plot_data": {
             "depth": plot_depth,
@@ -233,215 +307,420 @@ def calculate_caliper_statistics(df: pd.DataFrame, r_curves_info: Dict) -> Dict:
         },
         "statistics": {
             "total_points": len(plot_depth),
-            "depth_range": [min(plot_depth), max(plot_depth)],
-            "diameter_range": [min(plot_min + plot_max + plot_avg), max(plot_min + plot_max + plot_avg)],
+            "depth_range": [float(plot_depth.min()), float(plot_depth.max())],
+            "diameter_range": [float(diameter_min), float(diameter_max)],
             "avg_diameter_stats": {
-                "min": min(plot_avg),
-                "max": max(plot_avg),
-                "mean": sum(plot_avg) / len(plot_avg)
+                "min": float(plot_avg.min()),
+                "max": float(plot_avg.max()),
+                "mean": float(plot_avg.mean())
             },
             "min_diameter_stats": {
-                "min": min(plot_min),
-                "max": max(plot_min),
-                "mean": sum(plot_min) / len(plot_min)
+                "min": float(plot_min.min()),
+                "max": float(plot_min.max()),
+                "mean": float(plot_min.mean())
             }
         },
         "r_curves_info": r_curves_info
     }
 
-def extract_depth_and_r_values(df: pd.DataFrame) -> Dict:
+GR_CANDIDATES = ('GR', 'GTC_GR', 'GR_EDTC', 'CGR', 'SGR')
+TEMP_CANDIDATES = ('TEMP', 'GTC_WTEMP', 'WTEMP', 'BHST', 'BHT')
+R_CURVE_PATTERN = re.compile(r'^R(\d{1,2})$')
+
+
+@lru_cache(maxsize=32)
+def resolve_curve_columns(columns: Tuple[str, ...]) -> Dict:
     """
-    Extrae la profundidad y los valores de las variables R, GR y temperatura del DataFrame
+    Resuelve una sola vez por encabezado de dataset qué columnas son
+    profundidad, curvas R, GR y temperatura.
 
     Args:
-        df: DataFrame con las curvas del archivo LAS
+        columns: Nombres de las columnas del dataset (tupla, para poder cachear)
 
     Returns:
-        Dict con profundidad y valores de curvas por punto de profundidad
+        Dict con depth_column, r_curves, gr_curves y temp_curves
     """
-    if df is None or df.empty:
-        return {"error": "DataFrame vacío"}
+    depth_col = "DEPT" if "DEPT" in columns else columns[0]
 
-    # Detectar columna de profundidad
-    depth_col = "DEPT" if "DEPT" in df.columns else df.columns[0]
+    # Curvas R1..R40 (orden alfabético, igual que antes)
+    valid_r_curves = sorted(
+        col for col in columns
+        if (match := R_CURVE_PATTERN.match(col)) and 1 <= int(match.group(1)) <= 40
+    )
 
-    # Detectar curvas R
-    r_pattern = re.compile(r'^R\d{1,2}$')
-    r_columns = [col for col in df.columns if r_pattern.match(col)]
-    valid_r_curves = []
-    for col in r_columns:
-        match = re.match(r'R(\d{1,2})', col)
-        if match:
-            num = int(match.group(1))
-            if 1 <= num <= 40:
-                valid_r_curves.append(col)
-    valid_r_curves.sort()
-
-    # Detectar curvas adicionales: GR y temperatura
-    gr_curves = []
-    temp_curves = []
+    print(f"[DEBUG] First 10 available columns: {list(columns)[:10]}")
+    print(f"[DEBUG] Total columns: {len(columns)}")
 
-    print(f"[DEBUG] First 10 available columns: {list(df.columns)[:10]}")
-    print(f"[DEBUG] Total columns: {len(df.columns)}")
-
-    # Buscar columnas relacionadas con GR y temperatura
-    gr_related = [col for col in df.columns if 'GR' in col.upper()]
-    temp_related = [col for col in df.columns if 'TEMP' in col.upper() or 'WTEMP' in col.upper()]
+    gr_related = [col for col in columns if 'GR' in col.upper()]
+    temp_related = [col for col in columns if 'TEMP' in col.upper() or 'WTEMP' in col.upper()]
     print(f"[DEBUG] GR-related columns: {gr_related}")
     print(f"[DEBUG] Temperature-related columns: {temp_related}")
 
-    # Buscar GR (gamma ray) - posibles nombres
-    gr_candidates = ['GR', 'GTC_GR', 'GR_EDTC', 'CGR', 'SGR']
-    for candidate in gr_candidates:
-        if candidate in df.columns:
-            gr_curves.append(candidate)
-            print(f"[DEBUG] Found GR curve: {candidate}")
-            break  # Usar el primero encontrado
-
-    # Buscar temperatura - posibles nombres
-    temp_candidates = ['TEMP', 'GTC_WTEMP', 'WTEMP', 'BHST', 'BHT']
-    for candidate in temp_candidates:
-        if candidate in df.columns:
-            temp_curves.append(candidate)
-            print(f"[DEBUG] Found temperature curve: {candidate}")
-            break  # Usar el primero encontrado
+    # Usar el primer candidato encontrado de GR (gamma ray) y de temperatura
+    gr_curves = [candidate for candidate in GR_CANDIDATES if candidate in columns][:1]
+    temp_curves = [candidate for candidate in TEMP_CANDIDATES if candidate in columns][:1]
 
     print(f"[DEBUG] GR curves found: {gr_curves}")
     print(f"[DEBUG] Temperature curves found: {temp_curves}")
 
-    # Log sample values for debugging
-    if gr_curves:
-        sample_gr = df[gr_curves[0]].head(3).tolist()
-        print(f"[DEBUG] Sample GR values: {sample_gr}")
-    if temp_curves:
-        sample_temp = df[temp_curves[0]].head(3).tolist()
-        print(f"[DEBUG] Sample temperature values: {sample_temp}")
+    return {
+        "depth_column": depth_col,
+        "r_curves": valid_r_curves,
+        "gr_curves": gr_curves,
+        "temp_curves": temp_curves,
+    }
+
+
+def extract_curve_blocks(df: pd.DataFrame) -> Dict:
+    """
+    Extrae en una sola pasada vectorizada la profundidad y los bloques de
+    curvas R, GR y temperatura como arrays float con NaN en los nulos.
+
+    Args:
+        df: DataFrame con las curvas del archivo LAS
 
-    if not valid_r_curves:
+    Returns:
+        Dict con depth (filas,), r (filas × curvas R), gr y temp
+        (filas × curvas) y los nombres de columnas correspondientes
+    """
+    if df is None or df.empty:
+        return {"error": "DataFrame vacío"}
+
+    columns = resolve_curve_columns(tuple(df.columns))
+    depth_col = columns["depth_column"]
+    r_curves = columns["r_curves"]
+    gr_curves = columns["gr_curves"]
+    temp_curves = columns["temp_curves"]
+
+    if not r_curves:
         return {"error": "No se encontraron curvas R válidas"}
 
-    # Filtrar filas donde la profundidad no sea NaN
-    df_clean = df.dropna(subset=[depth_col])
+    # Todas las columnas necesarias se convierten juntas en una sola matriz
+    needed = [depth_col] + r_curves + gr_curves + temp_curves
+    matrix = numeric_matrix(df, needed)
+    matrix = matrix[~np.isnan(matrix[:, 0])]  # Filas con profundidad válida
 
-    if df_clean.empty:
+    if matrix.shape[0] == 0:
         return {"error": "No hay datos válidos de profundidad"}
 
-    # Extraer datos
-    depth_values = df_clean[depth_col].values.tolist()
-
-    # Extraer valores R para cada punto de profundidad y transponer los datos
-    r_values_by_depth = []
-    for idx, row in df_clean.iterrows():
-        depth_r_values = []
-        for r_col in valid_r_curves:
-            value = row.get(r_col)
-            try:
-                float_value = float(value)
-                if pd.notna(float_value) and -1000 < float_value < 1000:
-                    depth_r_values.append(float_value)
-                else:
-                    depth_r_values.append(None) # Mantener el placeholder si no es válido
-            except (ValueError, TypeError):
-                depth_r_values.append(None)
-        r_values_by_depth.append(depth_r_values)
-
-
-    # Extraer valores GR
-    gr_data = {}
-    for gr_col in gr_curves:
-        gr_values = []
-        for idx, row in df_clean.iterrows():
-            value = row[gr_col]
-            try:
-                float_value = float(value)
-                if pd.notna(float_value) and not pd.isna(float_value):
-                    gr_values.append(float_value)
-                else:
-                    gr_values.append(None)
-            except (ValueError, TypeError):
-                gr_values.append(None)
-        gr_data[gr_col] = gr_values
-
-    # Extraer valores de temperatura
-    temp_data = {}
-    for temp_col in temp_curves:
-        temp_values = []
-        for idx, row in df_clean.iterrows():
-            value = row[temp_col]
-            try:
-                float_value = float(value)
-                if pd.notna(float_value) and not pd.isna(float_value):
-                    temp_values.append(float_value)
-                else:
-                    temp_values.append(None)
-            except (ValueError, TypeError):
-                temp_values.append(None)
-        temp_data[temp_col] = temp_values
+    matrix[~np.isfinite(matrix)] = np.nan
+    r_end = 1 + len(r_curves)
+    gr_end = r_end + len(gr_curves)
+
+    r_block = matrix[:, 1:r_end]
+    r_block[~((r_block > -1000) & (r_block < 1000))] = np.nan
+
+    return {
+        "depth": matrix[:, 0],
+        "r": r_block,
+        "gr": matrix[:, r_end:gr_end],
+        "temp": matrix[:, gr_end:],
+        "r_curves": r_curves,
+        "gr_curves": gr_curves,
+        "temp_curves": temp_curves,
+    }
+
+
+def extract_depth_and_r_values(df: pd.DataFrame) -> Dict:
+    """
+    Extrae la profundidad y los valores de las variables R, GR y temperatura del DataFrame
+
+    Args:
+        df: DataFrame con las curvas del archivo LAS
+
+    Returns:
+        Dict con profundidad y valores de curvas por punto de profundidad
+    """
+    blocks = extract_curve_blocks(df)
+    if "error" in blocks:
+        return blocks
+    return blocks_to_raw_data(blocks)
+
+
+def blocks_to_raw_data(blocks: Dict) -> Dict:
+    """
+    Convierte los bloques de extract_curve_blocks en la representación de
+    respuesta. Las curvas quedan como arrays float (NaN en lugar de None);
+    serialization.py las escribe sin pasar por listas de Python.
+    """
+    gr_curves = blocks["gr_curves"]
+    temp_curves = blocks["temp_curves"]
+    if gr_curves:
+        print(f"[DEBUG] Sample GR values: {blocks['gr'][:3, 0].tolist()}")
+    if temp_curves:
+        print(f"[DEBUG] Sample temperature values: {blocks['temp'][:3, 0].tolist()}")
 
     return {
-        "depth": depth_values,
-        "r_curves": r_values_by_depth,
+        "depth": blocks["depth"],
+        "r_curves": blocks["r"],
         "gr_curves": gr_curves,
-        "gr_data": gr_data,
+        "gr_data": {col: blocks["gr"][:, i] for i, col in enumerate(gr_curves)},
         "temp_curves": temp_curves,
-        "temp_data": temp_data,
-        "total_points": len(depth_values)
+        "temp_data": {col: blocks["temp"][:, i] for i, col in enumerate(temp_curves)},
+        "total_points": int(blocks["depth"].shape[0])
+    }
+
+
+def downsample_plot_data(plot_data: Dict, max_points: int, method: str = ENVELOPE) -> Dict:
+    """
+    Reduce las curvas de diámetro (min, max, avg) sobre su profundidad compartida.
+    Con LTTB la curva guía es el diámetro mínimo, donde se ven las picaduras.
+    """
+    tracks = ["min_diameter", "max_diameter", "avg_diameter"]
+    values = np.column_stack([np.asarray(plot_data[key], dtype=np.float64) for key in tracks])
+    depth, values = downsample(plot_data["depth"], values, max_points, method, guide=values[:, 0])
+
+    reduced = {"depth": depth}
+    for i, key in enumerate(tracks):
+        reduced[key] = values[:, i]
+    return reduced
+
+
+def downsample_curve_blocks(blocks: Dict, max_points: int, method: str = ENVELOPE) -> Dict:
+    """
+    Reduce juntos los bloques R, GR y temperatura para que compartan profundidad.
+    Con LTTB la curva guía es el radio promedio de los dedos.
+    """
+    widths = [blocks[key].shape[1] for key in ("r", "gr", "temp")]
+    values = np.hstack([blocks["r"], blocks["gr"], blocks["temp"]])
+
+    guide = None
+    if method == LTTB:
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)
+            guide = np.nanmean(blocks["r"], axis=1)
+    depth, values = downsample(blocks["depth"], values, max_points, method, guide=guide)
+
+    r_end = widths[0]
+    gr_end = r_end + widths[1]
+    return {
+        **blocks,
+        "depth": depth,
+        "r": values[:, :r_end],
+        "gr": values[:, r_end:gr_end],
+        "temp": values[:, gr_end:],
     }
 
 
-def downsample_data(data: List, max_points: int = 50000) -> List:
+def downsample_od_id(od_id: pd.DataFrame, max_points: int, method: str = ENVELOPE) -> pd.DataFrame:
+    """Reduce la tabla DEPT/OD/ID conservando los cambios de tubería."""
+    values = od_id[["OD", "ID"]].to_numpy(dtype=np.float64)
+    depth, values = downsample(od_id["DEPT"].to_numpy(dtype=np.float64), values, max_points, method,
+                               guide=values[:, 0])
+    return pd.DataFrame({"DEPT": depth, "OD": values[:, 0], "ID": values[:, 1]})
+
+
+def run_joints_and_statistics(df: pd.DataFrame, filename: str = "",
+                              progress: Optional[ProgressCallback] = None,
+                              params: Optional[Dict] = None,
+                              export_dir: Optional[str] = None,
+                              od_id_samples: bool = False,
+                              source_key: Optional[str] = None) -> Tuple[np.ndarray, pd.DataFrame, Optional[pd.DataFrame], List[str]]:
     """
-    Reduce el número de puntos de datos para optimización del frontend.
-    Mantiene la integridad de los datos tomando puntos equiespaciados.
+    Ejecuta la detección de juntas y las estadísticas de integridad sobre el
+    DataFrame ya cargado, sin lanzar procesos ni releer CSV intermedios.
+
+    Las etapas (gradient, collars, statistics) se evalúan con el grafo de
+    pipeline.py: con source_key, las salidas se guardan en
+    export_dir/stages/ y solo se recalculan las etapas cuyos parámetros o
+    entradas cambiaron.
 
     Args:
-        data: Lista de datos a reducir
-        max_points: Número máximo de puntos permitidos
+        df: DataFrame centralizado con todas las curvas
+        filename: Nombre del dataset (solo para los logs)
+        progress: Callback opcional progress(etapa, porcentaje)
+        params: Parámetros de detection_params (por defecto las constantes)
+        export_dir: Directorio de la tabla de integridad (por defecto exports/)
+        od_id_samples: Si True, calcula también el OD/ID de cada muestra
+        source_key: Identificador del contenido de df (hash del dataset y
+            variante); sin él las etapas se calculan en memoria
 
     Returns:
-        Lista reducida de datos
+        Tupla (collars_data, od_id_intervals, od_id, exported) con la matriz de
+        collars para el frontend (array vacío si falla la detección), el OD/ID
+        por intervalos TOP/BOTTOM/OD/ID, el DataFrame DEPT/OD/ID por muestra
+        (None si no se pidió) y los archivos de integridad exportados (vacío si
+        fallan las estadísticas)
     """
-    if len(data) <= max_points:
-        return data
+    progress = progress or _no_progress
+    params = {**(params or detection_params()), "pipe_catalog": pipe_statistics.pipe_catalog.digest}
+    export_dir = export_dir or get_exports_dir()
+    run = caliper_pipeline.start(lambda: df, source_key, params, stage_store(export_dir), progress)
+    empty_intervals = pd.DataFrame(columns=pipe_statistics.OD_ID_INTERVAL_COLUMNS)
+    empty_od_id = pd.DataFrame(columns=["DEPT", "OD", "ID"]) if od_id_samples else None
+
+    print(f"[PROCESS] Generating collars and statistics for {filename}...")
+    try:
+        joints_result = run.get("collars")
+    except Exception as e:
+        print(f"[WARNING] Could not detect collars: {e}")
+        return np.empty((0, 2)), empty_intervals, empty_od_id, []
 
-    # Calcular el factor de downsampling
-    factor = len(data) // max_points
-    if factor < 2:
-        factor = 2  # Mínimo factor de reducción
+    # Mismo redondeo que tenía collars.csv (4 decimales)
+    collars = np.round(joints_result["collars"], 4)
+    collars_data = collars[~np.isnan(collars).all(axis=1)]
+    print(f"[PROCESS] Collars generated successfully for {filename}")
+    print(f"[DEBUG] Collars data loaded: {len(collars_data)} collars")
 
-    # Tomar cada N-ésimo punto
-    downsampled = []
-    for i in range(0, len(data), factor):
-        downsampled.append(data[i])
+    try:
+        stats = run.get("statistics")
+        progress("export", 85)
+        exported = export_integrity_files(stats, export_dir)
+        intervals = stats["od_id_intervals"].round(4)
+        od_id = pipe_statistics.od_id(run.get("gradient")[2], intervals) if od_id_samples else None
+        print(f"[PROCESS] Statistics generated successfully for {filename} ({len(intervals)} OD/ID intervals)")
+    except Exception as e:
+        print(f"[WARNING] Could not generate statistics: {e}")
+        intervals, od_id = empty_intervals, empty_od_id
+        exported = []
 
-    print(f"[DOWNSAMPLING] Reduced {len(data)} points to {len(downsampled)} points (factor: {factor})")
-    return downsampled
+    print(f"[PIPELINE] {filename}: {run.summary()}")
+    return collars_data, intervals, od_id, exported
 
 
-def process_caliper_data(use_centralized: bool = True) -> Dict:
+def export_integrity_files(stats: Dict, export_dir: str) -> List[str]:
     """
-    Función principal que procesa los datos del caliper más reciente
+    Exporta el CSV de integridad en un directorio temporal y lo mueve a
+    export_dir, de modo que dos procesos nunca dejan un archivo a medias. El
+    Excel con formato se genera al descargarlo (report.py).
+
+    Returns:
+        Rutas finales de los archivos exportados
+    """
+    os.makedirs(export_dir, exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(prefix=".export-", dir=export_dir)
+    try:
+        tmp_path = pipe_statistics.export_statistics_csv(stats["statistics_table"], tmp_dir)
+        path = os.path.join(export_dir, pipe_statistics.CSV_FILE)
+        os.replace(tmp_path, path)
+        return [path]
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def register_integrity_files(dataset, use_centralized: bool, export_dir: str) -> None:
+    """Registra como artefactos del dataset los archivos de integridad de una variante."""
+    if dataset_registry is None:
+        return
+    variant = variant_name(use_centralized)
+    path = os.path.join(export_dir, pipe_statistics.CSV_FILE)
+    if os.path.exists(path):
+        dataset_registry.set_artifact(dataset.dataset_id, f"{variant}/{pipe_statistics.CSV_FILE}", path)
+
+
+def process_caliper_data(use_centralized: bool = True, progress: Optional[ProgressCallback] = None,
+                         px: Optional[int] = None, method: str = ENVELOPE,
+                         detection: Optional[Dict] = None, dataset_id: Optional[str] = None,
+                         compute: Optional[Callable] = None, od_id_samples: bool = False) -> Dict:
+    """
+    Función principal que procesa un dataset del caliper (por defecto el más reciente).
+
+    La tabla de integridad (table_statistics.csv) se escribe en el directorio
+    de trabajo del dataset (workspace/<variante>/) y se registra como
+    artefacto; el Excel se genera solo al descargarlo (report.py). Los
+    resultados se cachean por hash de contenido del dataset, use_centralized,
+    parámetros de detección y downsampling (result_cache.py); un acierto
+    restaura también la tabla de integridad en el directorio de trabajo.
+
+    La búsqueda en la caché y el registro se hacen en este proceso; el
+    cálculo (compute_caliper_result) se delega en compute si se indica.
 
     Args:
         use_centralized: Si True, usa datos centralizados; si False, usa datos originales
+        progress: Callback opcional progress(etapa, porcentaje) con la etapa en curso
+        px: Altura del gráfico en píxeles; fija el presupuesto de puntos por curva
+            (por defecto DEFAULT_MAX_POINTS)
+        method: Método de downsampling, "minmax" (envolvente) o "lttb"
+        detection: Parámetros de detección que sustituyen a las constantes
+            (finger_jump, threshold, slim_threshold, tally_difference, pipe_od...)
+        dataset_id: Dataset a procesar (por defecto el usado más recientemente)
+        compute: Ejecutor opcional compute(func, progress=..., **kwargs), por
+            ejemplo compute_tier.call para ejecutar el cálculo en otro proceso
+        od_id_samples: Si True, incluye od_id_data (OD/ID por muestra) además
+            de los intervalos od_id_intervals
 
     Returns:
         Dict con todos los datos procesados para el frontend
     """
-    # Importar y actualizar progreso
-    from .routes import processing_progress
+    progress = progress or _no_progress
+    progress("load", 0)
+    params = detection_params(detection)
+
+    # Obtener el dataset (centralizado u original según el parámetro)
+    dataset = dataset_registry.resolve(dataset_id) if dataset_registry is not None else latest_dataset()
+    key = None
+    if dataset is None:
+        if dataset_id is not None:
+            return {"error": f"Dataset {dataset_id} no encontrado"}
+        export_dir = get_exports_dir()
+    else:
+        export_dir = dataset.workspace(variant_name(use_centralized))
+        if result_cache is not None:
+            key = cache_key(dataset.content_hash, use_centralized,
+                            {**params, "px": px, "method": method, "od_id_samples": od_id_samples,
+                             "pipe_catalog": pipe_statistics.pipe_catalog.digest})
+            cached = result_cache.get(key, restore_dir=export_dir)
+            if cached is not None:
+                print(f"[CACHE] Hit for {dataset.label(use_centralized)} [{key}]")
+                register_integrity_files(dataset, use_centralized, export_dir)
+                return {**cached, "dataset_id": dataset.dataset_id}
+
+    kwargs = dict(dataset_id=dataset.dataset_id if dataset is not None else None,
+                  use_centralized=use_centralized, px=px, method=method, params=params, export_dir=export_dir,
+                  od_id_samples=od_id_samples)
+    if compute is not None:
+        result, exported = compute(compute_caliper_result, progress=progress, **kwargs)
+    else:
+        result, exported = compute_caliper_result(progress=progress, **kwargs)
+
+    if "error" in result:
+        return result
+    if dataset is not None:
+        register_integrity_files(dataset, use_centralized, export_dir)
+    if key is not None:
+        result_cache.put(key, result, files=exported)
+    return result
+
+
+def compute_caliper_result(dataset_id: Optional[str], use_centralized: bool, px: Optional[int],
+                           method: str, params: Dict, export_dir: str,
+                           progress: Optional[ProgressCallback] = None,
+                           od_id_samples: bool = False) -> Tuple[Dict, List[str]]:
+    """
+    Cálculo de process_caliper_data: diámetros, curvas, juntas, estadísticas
+    de integridad y downsampling. No usa la caché ni el registro, así que
+    puede ejecutarse en un worker del nivel de cómputo (compute.py).
 
-    start_time = time.time()
-    processing_progress = 10
+    Args:
+        dataset_id: Dataset del almacén (None: CSV más reciente de exports/)
+        use_centralized: Radios centralizados (True) u originales (False)
+        px: Altura del gráfico en píxeles (presupuesto de puntos por curva)
+        method: Método de downsampling, "minmax" o "lttb"
+        params: Parámetros de detection_params
+        export_dir: Directorio donde se escribe la tabla de integridad
+        progress: Callback opcional progress(etapa, porcentaje)
+        od_id_samples: Si True, el resultado incluye también od_id_data (OD/ID por muestra)
 
-    # Obtener el CSV más reciente (centralizado u original según el parámetro)
-    df, filename = get_latest_csv_dataframe(use_centralized)
+    Returns:
+        Tupla (resultado, archivos de integridad exportados)
+    """
+    progress = progress or _no_progress
+
+    if dataset_id is None:
+        print("[WARNING] No hay datasets en exports/datasets, buscando CSV")
+        df, filename = get_latest_csv_dataframe(use_centralized)
+        source_key = None  # Sin hash de contenido: las etapas no se guardan
+    else:
+        dataset = open_dataset(dataset_id)
+        if dataset is None:
+            return {"error": f"Dataset {dataset_id} no encontrado"}, []
+        df, filename = dataset_dataframe(dataset, use_centralized)
+        source_key = f"{dataset.content_hash}:{variant_name(use_centralized)}"
 
     if df is None:
-        return {"error": "No se pudo cargar el archivo CSV más reciente"}
+        return {"error": "No se pudo cargar el dataset más reciente"}, []
 
-    elapsed = time.time() - start_time
-    processing_progress = min(100, max(20, (elapsed / 4.0) * 100))  # Estimate 4 seconds total
+    progress("diameters", 10)
 
     # Detectar curvas R
     r_curves_info = detect_r_curves(df)
@@ -452,10 +731,7 @@ def process_caliper_data(use_centralized: bool = True) -> Dict:
             "filename": filename,
             "total_columns": r_curves_info["total_columns"],
             "available_columns": list(df.columns)
-        }
-
-    elapsed = time.time() - start_time
-    processing_progress = min(100, max(30, (elapsed / 4.0) * 100))
+        }, []
 
     # Calcular estadísticas
     stats_result = calculate_caliper_statistics(df, r_curves_info)
@@ -465,181 +741,52 @@ def process_caliper_data(use_centralized: bool = True) -> Dict:
             "error": stats_result["error"],
             "filename": filename,
             "r_curves_info": r_curves_info
-        }
+        }, []
 
-    elapsed = time.time() - start_time
-    processing_progress = min(100, max(50, (elapsed / 4.0) * 100))
+    progress("curves", 25)
 
-    # Extraer datos crudos de profundidad y R
-    raw_data = extract_depth_and_r_values(df)
-    print(f"[DEBUG] Raw data extracted: depth_points={raw_data.get('total_points', 0)}, r_curves={len(raw_data.get('r_curves', []))}")
+    # Extraer datos crudos de profundidad, R, GR y temperatura
+    raw_blocks = extract_curve_blocks(df)
+    if "error" not in raw_blocks:
+        print(f"[DEBUG] Raw data extracted: depth_points={len(raw_blocks['depth'])}, r_curves={len(raw_blocks['r_curves'])}")
 
-    elapsed = time.time() - start_time
-    processing_progress = min(100, max(70, (elapsed / 4.0) * 100))
+    progress("gradient", 40)
 
-    # Importar y calcular collars data - ejecutar joints.py si es necesario
-    try:
-        import pandas as pd
-        import os
-        collars_path = os.path.join(os.path.dirname(__file__), "..", "..", "exports", "collars.csv")
-
-        # Verificar si el archivo collars.csv existe y es más reciente que el CSV de datos
-        csv_path = os.path.join(os.path.dirname(__file__), "..", "..", "exports", filename)
-        csv_mtime = os.path.getmtime(csv_path) if os.path.exists(csv_path) else 0
-        collars_mtime = os.path.getmtime(collars_path) if os.path.exists(collars_path) else 0
-
-        # Ejecutar joints.py y statistics.py en cada procesamiento
-        print(f"[PROCESS] Generating collars and statistics for {filename}...")
-        # Ejecutar la lógica de joints.py directamente
-        import subprocess
-        import sys
-        joints_success = False
-        try:
-            print("[PROCESS] Running joints.py")
-            # Ejecutar joints.py como script separado
-            result = subprocess.run([sys.executable, os.path.join(os.path.dirname(__file__), "joints.py")],
-                                  capture_output=True, text=True, cwd=os.path.dirname(__file__))
-            if result.returncode == 0:
-                print(f"[PROCESS] Collars generated successfully for {filename}")
-                joints_success = True
-            else:
-                print(f"[PROCESS] Error generating collars: returncode={result.returncode}, stderr={result.stderr}")
-        except Exception as e:
-            print(f"[PROCESS] Could not execute joints.py: {e}")
-
-        # Ejecutar statistics.py solo si joints.py fue exitoso
-        if joints_success:
-            try:
-                print("[PROCESS] Running statistics.py")
-                result_stats = subprocess.run([sys.executable, os.path.join(os.path.dirname(__file__), "statistics.py")],
-                                              capture_output=True, text=True, cwd=os.path.dirname(__file__))
-                if result_stats.returncode == 0:
-                    print(f"[PROCESS] Statistics generated successfully for {filename}")
-                else:
-                    print(f"[PROCESS] Error generating statistics: returncode={result_stats.returncode}, stderr={result_stats.stderr}")
-            except Exception as e:
-                print(f"[PROCESS] Could not execute statistics.py: {e}")
-        else:
-            print(f"[PROCESS] Skipping statistics.py because joints.py failed")
-
-        elapsed = time.time() - start_time
-        processing_progress = min(100, max(90, (elapsed / 4.0) * 100))
-
-        if os.path.exists(collars_path):
-            collars_df = pd.read_csv(collars_path)
-            # Filtrar filas que contengan NaN o valores vacíos
-            collars_df_clean = collars_df.dropna(how='all')  # Eliminar filas completamente vacías
-            # Convertir a lista filtrando valores NaN
-            collars_data = []
-            for _, row in collars_df_clean.iterrows():
-                clean_row = []
-                for val in row.values:
-                    # Verificar si el valor es válido (no NaN, no infinito, no string vacío)
-                    if pd.notna(val) and str(val).strip() != '' and str(val).lower() != 'nan':
-                        try:
-                            # Intentar convertir a float
-                            float_val = float(val)
-                            if not (float_val != float_val) and not pd.isna(float_val):  # Verificar NaN
-                                clean_row.append(float_val)
-                            else:
-                                clean_row.append(None)
-                        except (ValueError, TypeError):
-                            clean_row.append(None)
-                    else:
-                        clean_row.append(None)
-
-                # Solo agregar filas que tengan al menos un valor válido
-                if any(v is not None for v in clean_row):
-                    collars_data.append(clean_row)
-
-            print(f"[DEBUG] Collars data loaded: {len(collars_data)} collars (filtered from {len(collars_df)})")
-        else:
-            print(f"[WARNING] Collars CSV file not found at {collars_path}")
-            collars_data = []
-    except Exception as e:
-        print(f"[WARNING] Could not load collars data: {e}")
-        collars_data = []
+    # Detección de juntas y estadísticas de integridad en el mismo proceso
+    collars_data, od_id_intervals, od_id_frame, exported = run_joints_and_statistics(
+        df, filename, progress, params, export_dir, od_id_samples, source_key)
 
-    # Aplicar downsampling para optimización del frontend si hay demasiados puntos
+    # Downsampling que conserva picaduras y huecos (presupuesto según la altura del gráfico)
+    max_points = points_for_pixels(px) if px else DEFAULT_MAX_POINTS
     plot_data = stats_result["plot_data"]
     original_point_count = len(plot_data["depth"])
 
-    if original_point_count > 50000:
-        print(f"[DOWNSAMPLING] Applying downsampling to plot_data: {original_point_count} points")
-
-        # Downsampling de todos los arrays de plot_data
-        plot_data["depth"] = downsample_data(plot_data["depth"])
-        plot_data["min_diameter"] = downsample_data(plot_data["min_diameter"])
-        plot_data["max_diameter"] = downsample_data(plot_data["max_diameter"])
-        plot_data["avg_diameter"] = downsample_data(plot_data["avg_diameter"])
+    if original_point_count > max_points:
+        plot_data = downsample_plot_data(plot_data, max_points, method)
 
         # Actualizar estadísticas con los datos downsampled
         stats_result["statistics"]["total_points"] = len(plot_data["depth"])
         stats_result["statistics"]["original_points"] = original_point_count
 
-        print(f"[DOWNSAMPLING] Plot data reduced to {len(plot_data['depth'])} points for frontend")
-
-    # Downsample raw_data if necessary
-    if original_point_count > 10000:
-        print(f"[DOWNSAMPLING] Applying downsampling to raw_data: {len(raw_data['depth'])} points")
-
-        # Downsample depth
-        raw_data["depth"] = downsample_data(raw_data["depth"])
-
-        # Downsample r_curves (list of lists)
-        raw_data["r_curves"] = downsample_data(raw_data["r_curves"])
-
-        # Downsample GR and temp data
-        for key in raw_data["gr_data"]:
-            raw_data["gr_data"][key] = downsample_data(raw_data["gr_data"][key])
-        for key in raw_data["temp_data"]:
-            raw_data["temp_data"][key] = downsample_data(raw_data["temp_data"][key])
-
-        raw_data["total_points"] = len(raw_data["depth"])
-        print(f"[DOWNSAMPLING] Raw data reduced to {raw_data['total_points']} points for frontend")
-
-    # Load OD/ID data from CSV
-    od_id_data = []
-    od_id_path = os.path.join(get_exports_dir(), "OD_ID.csv")
-    if os.path.exists(od_id_path):
-        try:
-            od_id_df = pd.read_csv(od_id_path)
-            od_id_data = od_id_df.to_dict('records')
-            print(f"[DEBUG] OD/ID data loaded: {len(od_id_data)} records")
-
-            # Apply downsampling to od_id_data if necessary (same as plot_data)
-            if original_point_count > 50000 and len(od_id_data) > 50000:
-                print(f"[DOWNSAMPLING] Applying downsampling to od_id_data: {len(od_id_data)} points")
-
-                # Extract individual arrays for downsampling
-                dept_values = [item['DEPT'] for item in od_id_data]
-                od_values = [item['OD'] for item in od_id_data]
-                id_values = [item['ID'] for item in od_id_data]
-
-                # Downsample each array
-                dept_downsampled = downsample_data(dept_values)
-                od_downsampled = downsample_data(od_values)
-                id_downsampled = downsample_data(id_values)
-
-                # Reconstruct the list of dictionaries
-                od_id_data = []
-                for i in range(len(dept_downsampled)):
-                    od_id_data.append({
-                        'DEPT': dept_downsampled[i],
-                        'OD': od_downsampled[i],
-                        'ID': id_downsampled[i]
-                    })
-
-                print(f"[DOWNSAMPLING] OD/ID data reduced to {len(od_id_data)} points for frontend")
-
-        except Exception as e:
-            print(f"[WARNING] Could not load OD/ID data: {e}")
-            od_id_data = []
+        print(f"[DOWNSAMPLING] Plot data reduced from {original_point_count} to {len(plot_data['depth'])} points ({method})")
+
+    if "error" in raw_blocks:
+        raw_data = raw_blocks
     else:
-        print(f"[WARNING] OD_ID.csv not found at {od_id_path}")
+        raw_points = len(raw_blocks["depth"])
+        if raw_points > max_points:
+            raw_blocks = downsample_curve_blocks(raw_blocks, max_points, method)
+            print(f"[DOWNSAMPLING] Raw data reduced from {raw_points} to {len(raw_blocks['depth'])} points ({method})")
+        raw_data = blocks_to_raw_data(raw_blocks)
+
+    # OD/ID por muestra solo si se pidió (el frontend usa los intervalos)
+    if od_id_frame is not None and len(od_id_frame) > max_points:
+        od_id_frame = downsample_od_id(od_id_frame, max_points, method)
+        print(f"[DOWNSAMPLING] OD/ID data reduced to {len(od_id_frame)} points ({method})")
 
     # Retornar resultado completo
-    return {
+    result = {
+        "dataset_id": dataset_id,
         "filename": filename,
         "total_points": stats_result["statistics"]["total_points"],
         "original_points": stats_result["statistics"].get("original_points"),
@@ -648,8 +795,12 @@ def process_caliper_data(use_centralized: bool = True) -> Dict:
         "statistics": stats_result["statistics"],
         "raw_data": raw_data,
         "collars_data": collars_data,
-        "od_id_data": od_id_data
+        "od_id_intervals": od_id_intervals.to_dict('records'),
     }
+    if od_id_frame is not None:
+        result["od_id_data"] = od_id_frame.to_dict('records')
+    return result, exported
+
 
 # Código de prueba (solo se ejecuta si se corre este archivo directamente)
 if __name__ == "__main__":
@@ -0,0 +1,185 @@
+"""
+Reducción de puntos que conserva rasgos para las curvas enviadas al frontend.
+
+Dos métodos vectorizados sobre una profundidad compartida y una matriz de
+curvas (filas × columnas):
+
+- "minmax": envolvente por bucket. Cada bucket aporta dos filas con el
+  mínimo y el máximo de cada columna en el orden en que aparecen, de modo
+  que picaduras y huecos estrechos siguen visibles.
+- "lttb": Largest-Triangle-Three-Buckets sobre una curva guía; conserva la
+  forma de curvas suaves (GR, temperatura) con un punto real por bucket.
+
+El presupuesto de puntos sale de la altura en píxeles del gráfico.
+"""
+
+import warnings
+from typing import Optional, Tuple
+
+import numpy as np
+
+ENVELOPE = "minmax"
+LTTB = "lttb"
+METHODS = (ENVELOPE, LTTB)
+
+# Puntos por curva cuando la petición no indica la altura del gráfico
+DEFAULT_MAX_POINTS = 50000
+
+
+def points_for_pixels(px: int) -> int:
+    """Número de puntos para un gráfico de px píxeles de alto (dos por píxel: mínimo y máximo)."""
+    return 2 * max(int(px), 1)
+
+
+def bucket_edges(n: int, n_buckets: int) -> np.ndarray:
+    """
+    Límites de n_buckets buckets contiguos (casi iguales) sobre n filas.
+
+    Returns:
+        Array de n_buckets + 1 índices, del 0 a n
+    """
+    n_buckets = max(1, min(int(n_buckets), n))
+    return np.linspace(0, n, n_buckets + 1).astype(np.intp)
+
+
+def _as_matrix(values: np.ndarray) -> np.ndarray:
+    values = np.asarray(values, dtype=np.float64)
+    return values[:, None] if values.ndim == 1 else values
+
+
+def minmax_envelope(depth: np.ndarray, values: np.ndarray, max_points: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Reduce las curvas a una envolvente mínimo/máximo por bucket.
+
+    Cada bucket produce dos filas situadas en la primera y la última
+    profundidad del bucket. En cada columna la primera fila recibe el extremo
+    que aparece antes (mínimo o máximo) y la segunda el otro. Los NaN se
+    ignoran; un bucket sin valores queda en NaN.
+
+    Args:
+        depth: Profundidad (filas,)
+        values: Curvas (filas,) o (filas × columnas)
+        max_points: Número máximo de filas de salida
+
+    Returns:
+        Tupla (depth, values) reducida; sin cambios si ya cabe en max_points
+    """
+    depth = np.asarray(depth, dtype=np.float64)
+    matrix = _as_matrix(values)
+    n = len(depth)
+    if n <= max_points or n == 0:
+        return depth, np.asarray(values, dtype=np.float64)
+
+    edges = bucket_edges(n, max(max_points // 2, 1))
+    starts = edges[:-1]
+    sizes = np.diff(edges)
+    bucket_of_row = np.repeat(np.arange(len(starts)), sizes)
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        bucket_min = np.fmin.reduceat(matrix, starts, axis=0)
+        bucket_max = np.fmax.reduceat(matrix, starts, axis=0)
+
+    # Primera posición del mínimo y del máximo dentro de cada bucket
+    rows = np.arange(n)[:, None]
+    min_pos = np.minimum.reduceat(np.where(matrix == bucket_min[bucket_of_row], rows, n), starts, axis=0)
+    max_pos = np.minimum.reduceat(np.where(matrix == bucket_max[bucket_of_row], rows, n), starts, axis=0)
+    min_first = min_pos <= max_pos
+
+    out = np.empty((2 * len(starts), matrix.shape[1]))
+    out[0::2] = np.where(min_first, bucket_min, bucket_max)
+    out[1::2] = np.where(min_first, bucket_max, bucket_min)
+
+    out_depth = np.empty(2 * len(starts))
+    out_depth[0::2] = depth[starts]
+    out_depth[1::2] = depth[edges[1:] - 1]
+
+    if np.asarray(values).ndim == 1:
+        out = out[:, 0]
+    return out_depth, out
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, max_points: int) -> np.ndarray:
+    """
+    Índices seleccionados por Largest-Triangle-Three-Buckets.
+
+    Conserva el primer y el último punto; en cada bucket intermedio elige el
+    punto que forma el triángulo de mayor área con el punto elegido en el
+    bucket anterior y el promedio del bucket siguiente. El cálculo de áreas
+    de cada bucket es vectorizado; los NaN de y no se eligen salvo que el
+    bucket no tenga otro valor.
+
+    Args:
+        x: Coordenada de avance (profundidad)
+        y: Curva guía
+        max_points: Número de puntos a conservar (>= 3)
+
+    Returns:
+        Array ordenado de índices de filas
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(x)
+    if n <= max_points or max_points < 3:
+        return np.arange(n)
+
+    edges = bucket_edges(n - 2, max_points - 2) + 1
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        sizes = np.diff(edges)
+        x_means = np.add.reduceat(x[1:n - 1], edges[:-1] - 1) / sizes
+        y_sums = np.add.reduceat(np.nan_to_num(y[1:n - 1]), edges[:-1] - 1)
+        y_counts = np.add.reduceat(np.isfinite(y[1:n - 1]).astype(np.float64), edges[:-1] - 1)
+        y_means = y_sums / y_counts
+
+    selected = np.empty(len(edges) + 1, dtype=np.intp)
+    selected[0] = 0
+    selected[-1] = n - 1
+    a = 0
+    for b in range(len(edges) - 1):
+        start, end = edges[b], edges[b + 1]
+        if b + 1 < len(edges) - 1:
+            cx, cy = x_means[b + 1], y_means[b + 1]
+        else:
+            cx, cy = x[n - 1], y[n - 1]
+        area = np.abs((x[a] - cx) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (cy - y[a]))
+        if np.isnan(area).all():
+            a = start
+        else:
+            a = start + int(np.nanargmax(area))
+        selected[b + 1] = a
+    return selected
+
+
+def downsample(depth: np.ndarray, values: np.ndarray, max_points: int, method: str = ENVELOPE,
+               guide: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Reduce una profundidad compartida y sus curvas con el método indicado.
+
+    Args:
+        depth: Profundidad (filas,)
+        values: Curvas (filas,) o (filas × columnas)
+        max_points: Número máximo de filas de salida
+        method: "minmax" (envolvente) o "lttb"
+        guide: Curva guía para LTTB (por defecto el promedio de las columnas)
+
+    Returns:
+        Tupla (depth, values) reducida
+    """
+    if method not in METHODS:
+        raise ValueError(f"Método de downsampling no soportado: {method}")
+
+    depth = np.asarray(depth, dtype=np.float64)
+    values = np.asarray(values, dtype=np.float64)
+    if len(depth) <= max_points:
+        return depth, values
+
+    if method == ENVELOPE:
+        return minmax_envelope(depth, values, max_points)
+
+    if guide is None:
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)
+            guide = np.nanmean(_as_matrix(values), axis=1)
+    idx = lttb_indices(depth, guide, max_points)
+    return depth[idx], values[idx]
@@ -0,0 +1,205 @@
+"""
+Ingesta por streaming de archivos LAS / LAS.gz.
+
+Recibe el archivo por bloques (UploadFile) y hash_raw_stream calcula el
+SHA-256 de los bytes crudos (sin descomprimir) para buscar el archivo en el
+registro de datasets, copiándolos a un archivo temporal en disco (los objetos
+de R2 se descargan directamente a ese archivo, ver r2_storage.py). Si el archivo es nuevo, ingest_las_file lo descomprime de
+forma incremental desde ese archivo y lo entrega al LASStreamParser, de modo
+que en memoria solo viven el bloque de trabajo y la matriz de datos final.
+Los límites de tamaño se aplican mientras se recibe el archivo.
+"""
+
+import hashlib
+import zlib
+from typing import IO, AsyncIterator, Callable, Dict, Iterator, Optional, Tuple
+
+from .las_reader import LASStreamParser, UnsupportedLASError, read_las_with_lasio
+from ..config import INGEST_CHUNK_SIZE, MAX_FILE_SIZE, MAX_DECOMPRESSED_SIZE
+
+GZIP_MAGIC = b'\x1f\x8b'
+
+
+class FileTooLargeError(ValueError):
+    """El archivo supera el tamaño máximo permitido."""
+
+
+class StreamDecoder:
+    """
+    Descompresor incremental con salida acotada y contadores de bytes.
+
+    Detecta gzip por los bytes mágicos, así que acepta tanto .las como .las.gz.
+    """
+
+    def __init__(self, chunk_size: int = INGEST_CHUNK_SIZE,
+                 max_size: int = MAX_FILE_SIZE, max_decompressed_size: int = MAX_DECOMPRESSED_SIZE):
+        self.chunk_size = chunk_size
+        self.max_size = max_size
+        self.max_decompressed_size = max_decompressed_size
+        self.bytes_received = 0
+        self.bytes_decompressed = 0
+        self.gzipped: Optional[bool] = None
+        self._inflater = None
+        self._pending = b''
+
+    def feed(self, chunk: bytes):
+        """Recibe un bloque crudo y produce bloques descomprimidos de hasta chunk_size bytes."""
+        self.bytes_received += len(chunk)
+        if self.bytes_received > self.max_size:
+            raise FileTooLargeError(
+                f"El archivo supera el tamaño máximo de {self.max_size // (1024 * 1024)} MB"
+            )
+
+        if self.gzipped is None:
+            self._pending += chunk
+            if len(self._pending) < len(GZIP_MAGIC):
+                return
+            chunk, self._pending = self._pending, b''
+            self.gzipped = chunk.startswith(GZIP_MAGIC)
+            if self.gzipped:
+                self._inflater = zlib.decompressobj(16 + zlib.MAX_WBITS)
+
+        if not self.gzipped:
+            yield from self._emit(chunk)
+            return
+
+        data = chunk
+        while data:
+            out = self._inflater.decompress(data, self.chunk_size)
+            yield from self._emit(out)
+            data = self._inflater.unconsumed_tail
+            if self._inflater.eof and self._inflater.unused_data:
+                # gzip multi-miembro: continuar con el siguiente miembro
+                data = self._inflater.unused_data
+                self._inflater = zlib.decompressobj(16 + zlib.MAX_WBITS)
+
+    def flush(self):
+        """Entrega los bytes que queden pendientes al final del stream."""
+        if self.gzipped is None:
+            self.gzipped = False
+            yield from self._emit(self._pending)
+            self._pending = b''
+        elif self.gzipped:
+            yield from self._emit(self._inflater.flush())
+
+    def _emit(self, out: bytes):
+        if not out:
+            return
+        self.bytes_decompressed += len(out)
+        if self.bytes_decompressed > self.max_decompressed_size:
+            raise FileTooLargeError(
+                f"El archivo descomprimido supera el tamaño máximo de {self.max_decompressed_size // (1024 * 1024)} MB"
+            )
+        yield out
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "received": self.bytes_received,
+            "decompressed": self.bytes_decompressed,
+            "gzipped": bool(self.gzipped),
+        }
+
+
+async def iter_upload_chunks(file, chunk_size: int = INGEST_CHUNK_SIZE) -> AsyncIterator[bytes]:
+    """Itera un UploadFile de FastAPI por bloques desde el inicio."""
+    await file.seek(0)
+    while True:
+        chunk = await file.read(chunk_size)
+        if not chunk:
+            break
+        yield chunk
+
+
+async def hash_raw_stream(open_chunks: Callable[[], AsyncIterator[bytes]], spool: Optional[IO[bytes]] = None,
+                          max_size: int = MAX_FILE_SIZE) -> Dict[str, object]:
+    """
+    Calcula el SHA-256 de los bytes crudos del archivo a medida que llegan.
+
+    Args:
+        open_chunks: Función que abre el stream de bytes crudos desde el inicio
+        spool: Archivo opcional donde se copian los bytes (para parsearlos
+               en un worker sin volver a leer ni descargar el stream)
+        max_size: Tamaño máximo permitido
+
+    Returns:
+        Dict con sha256 y received (bytes leídos)
+
+    Raises:
+        FileTooLargeError: si se supera max_size
+    """
+    digest = hashlib.sha256()
+    received = 0
+    async for chunk in open_chunks():
+        received += len(chunk)
+        if received > max_size:
+            raise FileTooLargeError(f"El archivo supera el tamaño máximo de {max_size // (1024 * 1024)} MB")
+        digest.update(chunk)
+        if spool is not None:
+            spool.write(chunk)
+    return {"sha256": digest.hexdigest(), "received": received}
+
+
+def hash_file(path: str) -> Dict[str, object]:
+    """SHA-256 de un archivo ya descargado (mismo formato que hash_raw_stream)."""
+    digest = hashlib.sha256()
+    received = 0
+    for chunk in iter_file_chunks(path):
+        digest.update(chunk)
+        received += len(chunk)
+    return {"sha256": digest.hexdigest(), "received": received}
+
+
+def iter_file_chunks(path: str, chunk_size: int = INGEST_CHUNK_SIZE) -> Iterator[bytes]:
+    """Itera por bloques un archivo en disco (el spool escrito por hash_raw_stream)."""
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+
+
+def _read_all(path: str, decoder: StreamDecoder) -> bytes:
+    """Lee todo el archivo descomprimido en memoria (solo para el respaldo con lasio)."""
+    parts = []
+    for chunk in iter_file_chunks(path):
+        parts.extend(decoder.feed(chunk))
+    parts.extend(decoder.flush())
+    return b''.join(parts)
+
+
+def ingest_las_file(path: str, max_size: int = MAX_FILE_SIZE) -> Tuple[object, Dict[str, int]]:
+    """
+    Descomprime y parsea un LAS de forma incremental desde un archivo en disco.
+
+    Es CPU puro: se ejecuta en un worker del nivel de cómputo (compute.py).
+
+    Args:
+        path: Archivo con los bytes crudos (.las o .las.gz)
+        max_size: Tamaño máximo de los bytes crudos
+
+    Returns:
+        Tupla (las, stats) con el objeto LAS y los bytes procesados
+
+    Raises:
+        FileTooLargeError: si se superan MAX_FILE_SIZE o MAX_DECOMPRESSED_SIZE
+    """
+    decoder = StreamDecoder(max_size=max_size)
+    parser = LASStreamParser()
+
+    try:
+        for chunk in iter_file_chunks(path):
+            for block in decoder.feed(chunk):
+                parser.feed(block)
+        for block in decoder.flush():
+            parser.feed(block)
+        las = parser.close()
+        return las, decoder.stats()
+    except UnsupportedLASError as e:
+        print(f"[INGEST] Usando lasio como respaldo: {e}")
+
+    # Archivos envueltos o no estándar: se vuelve a leer el archivo completo para lasio
+    decoder = StreamDecoder(max_size=max_size)
+    contents = _read_all(path, decoder)
+    las = read_las_with_lasio(contents)
+    return las, decoder.stats()
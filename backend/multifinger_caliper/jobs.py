@@ -0,0 +1,179 @@
+"""
+Trabajos en segundo plano para el procesamiento del caliper.
+
+/process-caliper encola un trabajo en un pool acotado de workers y devuelve
+su id de inmediato. El pipeline informa cada etapa real mediante un callback
+de progreso; los clientes siguen el avance por Server-Sent Events y recogen
+el resultado por id cuando el trabajo termina.
+"""
+
+import asyncio
+import json
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+from ..config import PROCESSING_WORKERS, MAX_PENDING_JOBS, JOB_RESULT_TTL
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "error"
+
+
+class JobQueueFullError(RuntimeError):
+    """Hay demasiados trabajos pendientes en la cola."""
+
+
+class Job:
+    """Estado de un trabajo: etapa actual, progreso y resultado."""
+
+    def __init__(self, job_id: str, kind: str, params: Dict[str, Any]):
+        self.job_id = job_id
+        self.kind = kind
+        self.params = params
+        self.status = QUEUED
+        self.stage = QUEUED
+        self.progress = 0
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.updated_at = self.created_at
+        self._listeners: List[asyncio.Queue] = []
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (DONE, FAILED)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.job_id,
+            "kind": self.kind,
+            "status": self.status,
+            "stage": self.stage,
+            "progress": self.progress,
+            "error": self.error,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+        }
+
+
+class JobManager:
+    """
+    Ejecuta trabajos en un ThreadPoolExecutor acotado y publica su progreso.
+
+    El event loop nunca ejecuta el pipeline: solo recibe las actualizaciones
+    de progreso, que los workers le envían con call_soon_threadsafe.
+    """
+
+    def __init__(self, max_workers: int = PROCESSING_WORKERS, max_pending: int = MAX_PENDING_JOBS,
+                 result_ttl: float = JOB_RESULT_TTL):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.result_ttl = result_ttl
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="caliper-job")
+        self._jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.latest_job_id: Optional[str] = None
+
+    def submit(self, kind: str, func: Callable[..., Dict[str, Any]], **params) -> Job:
+        """
+        Encola func(**params, progress=callback) y devuelve el trabajo creado.
+
+        Raises:
+            JobQueueFullError: si ya hay max_pending trabajos sin terminar
+        """
+        self._loop = asyncio.get_running_loop()
+        self._prune()
+
+        with self._lock:
+            pending = sum(1 for job in self._jobs.values() if not job.finished)
+            if pending >= self.max_pending:
+                raise JobQueueFullError(f"Hay {pending} trabajos pendientes; intente de nuevo más tarde")
+            job = Job(uuid.uuid4().hex, kind, params)
+            self._jobs[job.job_id] = job
+            self.latest_job_id = job.job_id
+
+        self._executor.submit(self._run, job, func)
+        print(f"[JOBS] Job {job.job_id} queued ({kind})")
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def latest(self) -> Optional[Job]:
+        return self._jobs.get(self.latest_job_id) if self.latest_job_id else None
+
+    def _run(self, job: Job, func: Callable[..., Dict[str, Any]]) -> None:
+        def progress(stage: str, percent: float) -> None:
+            if not job.finished:  # El progreso de otro proceso puede llegar tarde
+                self._update(job, stage=stage, progress=percent)
+
+        self._update(job, status=RUNNING, stage="start", progress=0)
+        started = time.time()
+        try:
+            result = func(**job.params, progress=progress)
+        except Exception as e:
+            print(f"[JOBS] Job {job.job_id} failed: {e}")
+            self._update(job, status=FAILED, stage=FAILED, error=str(e))
+            return
+
+        job.result = result
+        if isinstance(result, dict) and "error" in result:
+            self._update(job, status=FAILED, stage=FAILED, error=result["error"])
+        else:
+            self._update(job, status=DONE, stage=DONE, progress=100)
+        print(f"[JOBS] Job {job.job_id} finished in {time.time() - started:.2f}s ({job.status})")
+
+    def _update(self, job: Job, **changes) -> None:
+        if "progress" in changes:
+            # El progreso nunca retrocede
+            changes["progress"] = max(job.progress, int(changes["progress"]))
+        for key, value in changes.items():
+            setattr(job, key, value)
+        job.updated_at = time.time()
+
+        snapshot = job.snapshot()
+        if self._loop is not None and not self._loop.is_closed():
+            for queue in list(job._listeners):
+                self._loop.call_soon_threadsafe(queue.put_nowait, snapshot)
+
+    async def events(self, job: Job, heartbeat: float = 15.0) -> AsyncIterator[str]:
+        """
+        Genera los eventos SSE de un trabajo hasta que termina.
+
+        Cada actualización se envía como evento "progress"; el último es
+        "done" o "error". Se envía un comentario periódico para mantener viva
+        la conexión a través de proxies.
+        """
+        queue: asyncio.Queue = asyncio.Queue()
+        job._listeners.append(queue)
+        try:
+            snapshot = job.snapshot()
+            while True:
+                event = snapshot["status"] if snapshot["status"] in (DONE, FAILED) else "progress"
+                yield f"event: {event}\ndata: {json.dumps(snapshot)}\n\n"
+                if event != "progress":
+                    break
+                while True:
+                    try:
+                        snapshot = await asyncio.wait_for(queue.get(), timeout=heartbeat)
+                        break
+                    except asyncio.TimeoutError:
+                        yield ": keep-alive\n\n"
+        finally:
+            job._listeners.remove(queue)
+
+    def _prune(self) -> None:
+        """Descarta los trabajos terminados hace más de result_ttl segundos."""
+        cutoff = time.time() - self.result_ttl
+        with self._lock:
+            expired = [job_id for job_id, job in self._jobs.items() if job.finished and job.updated_at < cutoff]
+            for job_id in expired:
+                del self._jobs[job_id]
+
+
+job_manager = JobManager()
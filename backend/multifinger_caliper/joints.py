@@ -1,10 +1,17 @@
+"""
+Detección de juntas (collars) sobre la matriz de radios centralizados.
+
+Las funciones reciben arrays y parámetros y devuelven arrays, de modo que
+df_manage las llama en el mismo proceso sobre el dataset ya cargado.
+Ejecutado como script, procesa el último dataset y exporta los CSV de
+diagnóstico (df, grad, mask, collars...) en exports/.
+"""
+
 import pandas as pd
 import os
 import re
-from df_manage import get_latest_csv_dataframe
 import numpy as np
-
-
+from typing import Dict, Tuple
 
 
 # definir constantes
@@ -17,24 +24,16 @@ slim_threshold_1 = 0.4  # umbral para detectar cuellos delgados, porcentaje
 collar_lenght_steps = 20  # con un step de 0.1 ft, XX pasos  para funcion range() = XX*0.1 ft de longitud máxima del cuello
 
 
+def get_exports_dir() -> str:
+    """Obtiene la ruta del directorio exports"""
+    return os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'exports'))
 
-#leer el último archivo CSV centralizado exportado en "exports"
-def read_latest_centralized_csv():
-    """
-    Lee el último archivo CSV centralizado de la carpeta exports
-    """
-    df, filename = get_latest_csv_dataframe(use_centralized=True)
-    if df is None:
-        print(f"[ERROR] No se pudo cargar el archivo CSV centralizado más reciente")
-        return None, None
-
-    print(f"[SUCCESS] CSV centralizado cargado: {filename} ({len(df)} filas, {len(df.columns)} columnas)")
-    return df
 
-df = read_latest_centralized_csv()
-zero_counts = (df==0).sum(axis=1)
-threshold_zero= df.shape[1]/1.5
-df = df[zero_counts < threshold_zero]
+# descartar filas donde la mayoría de las curvas son cero
+def filter_zero_rows(df: pd.DataFrame) -> pd.DataFrame:
+    zero_counts = (df==0).sum(axis=1)
+    threshold_zero= df.shape[1]/1.5
+    return df[zero_counts < threshold_zero]
 
 # Filtrar los nombres de columnas R01-R40 y la columna DEPT o la primera columna si DEPT no existe
 def curves_and_depth(df: pd.DataFrame):
@@ -53,7 +52,18 @@ def curves_and_depth(df: pd.DataFrame):
     return valid_r_curves, dept
 
 # detectar cuellos con criterios refinados: cambio en mayoría de fingers, duración 0.2-2 ft, y retorno a baseline
-def to_numpy(df: pd.DataFrame):
+def to_numpy(df: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Convierte el DataFrame del dataset en la matriz [DEPT, R...] usada por la detección.
+
+    Args:
+        df: DataFrame con todas las curvas del dataset centralizado
+
+    Returns:
+        Tupla (data, dept): matriz con la profundidad en la columna 0 y los radios, y la profundidad
+    """
+    df = filter_zero_rows(df)
+
     #crea un dataframe con solo las columnas eg R01-R40 y DEPT
     valid_r_curves, depth_col = curves_and_depth(df)
     df=df[[depth_col] +valid_r_curves]
@@ -62,30 +72,28 @@ def to_numpy(df: pd.DataFrame):
 
     # eliminar filas donde TODAS las columnas (excepto depth_col) estén vacías
     df = df.dropna(how='all', subset=cols)
-    dept=df[depth_col]
-    dept=dept.reset_index(drop=True)
-    # Exporta el dataframe a CSV para ver si se esta creando correctamente
-    df.to_csv(os.path.join(os.path.dirname(__file__), '..', '..', 'exports', 'df.csv'), index=False)
 
     #convertir pandas to numpy array
-    data=df.to_numpy()
-    dept=dept.to_numpy()
-    #calcula el gradiente de las columnas R01-R40
+    data=df.to_numpy(dtype=np.float64)
+    dept=df[depth_col].to_numpy(dtype=np.float64)
     return data, dept
 
 
-data, dept = to_numpy(df)
-
-# definir constantes
-
+def finger_masks(data: np.ndarray, finger_jump=finger_jump, finger_jump_slim=finger_jump_slim):
+    """
+    Calcula el gradiente por dedo y las máscaras de cambio (-1, 0, 1).
 
-def grad_and_boottable(data: np.ndarray, dept: np.ndarray, finger_jump): # calcular gradiente y table booleana
+    Args:
+        data: Matriz [DEPT, R...] de to_numpy
+        finger_jump: Cambio mínimo para la máscara principal
+        finger_jump_slim: Cambio mínimo para la máscara de cuellos delgados
 
+    Returns:
+        Tupla (grad, mask, mask_slim) con forma (filas - 1, dedos)
+    """
     # Calculo de diferencia usando diff
-
     grad = np.diff(data, axis=0) #gradiente a lo largo de las filas (profundidad)
     grad = grad.round(4)  # solo 4 cifras decimales
-    dept = dept[1:]  # ajustar la profundidad para que coincida con el tamaño de grad
     grad = np.delete(grad, 0 , axis = 1)
 
     # crear mascara booleana donde el cambio es mayor que finger_jump
@@ -99,236 +107,283 @@ def grad_and_boottable(data: np.ndarray, dept: np.ndarray, finger_jump): # calcu
 
     mask = np.select(conditions, choices)
 
-
-
     conditions=[
         grad < -finger_jump_slim,
         (grad >= -finger_jump_slim) & (grad <= finger_jump_slim),
         grad > finger_jump_slim
     ]
 
-    choices = [ -1, 0, 1]
-
     mask_slim = np.select(conditions, choices)
-
-    # calcular promedio de dedos en true
-    avg_fingers_changed = mask.mean(axis=1)
-    avg_fingers_changed_slim = np.round(mask_slim.mean(axis=1),4)
-
-    # insetar promedios en la utlima fila de mask
-    mask = np.column_stack((mask, avg_fingers_changed))
-    mask_slim = np.column_stack((mask_slim, avg_fingers_changed_slim))
-
-    # Convertir a DataFrame y guardar a CSV del gradiente y la mascara
-    grad = pd.DataFrame(grad)
-    grad.insert(0, "DEPT", dept)
-    grad.to_csv(os.path.join(os.path.dirname(__file__), '..', '..', 'exports', 'grad.csv'), index=False, float_format='%.4f')
-
-    mask = pd.DataFrame(mask)
-    mask.insert(0, "DEPT", dept)
-    mask.to_csv(os.path.join(os.path.dirname(__file__), '..', '..', 'exports', 'mask.csv'), index=False, float_format='%.4f')
-    mask_slim = pd.DataFrame(mask_slim)
-    mask_slim.insert(0, "DEPT", dept)
-    mask_slim.to_csv(os.path.join(os.path.dirname(__file__), '..', '..', 'exports', 'mask_slim.csv'), index=False, float_format='%.4f')
-
-    return avg_fingers_changed, avg_fingers_changed_slim, dept
-
-
-grad_and_boottable(data, dept, finger_jump)
-avg_fingers_changed, avg_fingers_changed_slim, dept = grad_and_boottable(data, dept, finger_jump)
+    return grad, mask, mask_slim
 
 
+def grad_and_boottable(data: np.ndarray, dept: np.ndarray, finger_jump=finger_jump, finger_jump_slim=finger_jump_slim): # calcular gradiente y table booleana
+    """
+    Calcula la fracción promedio de dedos que cambian en cada paso de profundidad.
 
+    Args:
+        data: Matriz [DEPT, R...] de to_numpy
+        dept: Profundidad de cada fila de data
+        finger_jump: Cambio mínimo para la máscara principal
+        finger_jump_slim: Cambio mínimo para la máscara de cuellos delgados
 
+    Returns:
+        Tupla (avg_fingers_changed, avg_fingers_changed_slim, dept) con la
+        profundidad ajustada al tamaño del gradiente
+    """
+    _, mask, mask_slim = finger_masks(data, finger_jump, finger_jump_slim)
+    dept = dept[1:]  # ajustar la profundidad para que coincida con el tamaño de grad
 
-# funcion para detectar cuellos delgados
+    # calcular promedio de dedos en true
+    avg_fingers_changed = mask.mean(axis=1)
+    avg_fingers_changed_slim = np.round(mask_slim.mean(axis=1),4)
 
-def detect_slim_collars(avg_fingers_changed_slim: np.ndarray, dept: np.ndarray, collars: np.ndarray, slim_threshold, slim_threshold_1):
-    slim_collars = np.empty((0,2)) # almacenar los cuellos delgados detectados (profundidad inicio, profundidad fin)
-    slim_collars_2 = np.empty((0,2))
-    new_row = np.empty((0,2)) 
-    i= 0
-    M = len(collars)
-    N = len(avg_fingers_changed_slim)
-    j = 0
+    return avg_fingers_changed, avg_fingers_changed_slim, dept
 
 
-    # hacer un barrido de la data de mascara de cambio promedio, en las zonas donde collars no tiene reportados cuellos
-    # solo para cambios que no son tan fuertes como los detectados en collars
+# funcion principal de detección de collars, todos los que sean grandes y muy distinguibles a simple vista
+#
+# La detección trabaja sobre eventos en lugar de recorrer la señal muestra a muestra:
+#   1. candidatos: muestras donde |avg_fingers_changed| supera threshold
+#   2. eventos: cada candidato abre una ventana de hasta collar_lenght_steps - 1 muestras
+#      (la mitad de lo que queda de registro cerca del final); el siguiente evento es el
+#      primer candidato después de la ventana (el recorrido solo salta entre eventos)
+#   3. cierre: el último cruce de signo opuesto dentro de la ventana (searchsorted sobre
+#      los índices de los cruces positivos y negativos)
+#   4. cambios de libraje: un evento donde todos los dedos cambian (|avg| == 1) añade
+#      además un cuello de +-0.6 ft alrededor del evento
+#   5. los cuellos que empiezan a menos de 4 ft del final del anterior se unen
+#
+# Los cuellos se manejan como índices de muestra (bounds) y solo al final se pasan a
+# profundidad, así la detección de cuellos delgados no tiene que buscar las profundidades.
+
+MARGIN_STEPS = 6  # 0.6 ft antes y después del cuello
+MERGE_GAP = 4  # ft: cuellos más cercanos que esto se unen en uno
+
+
+def forward_steps(events: np.ndarray, N: int, collar_lenght_steps=collar_lenght_steps) -> np.ndarray:
+    """Muestras examinadas después de cada evento (la mitad de lo que queda de registro cerca del final)."""
+    return np.clip(np.minimum(collar_lenght_steps - 1, (N - events) // 2), 0, None)
+
+
+def collar_events(avg_fingers_changed: np.ndarray, threshold, collar_lenght_steps=collar_lenght_steps):
+    """
+    Índices donde empieza la búsqueda de un cuello y longitud de su ventana.
 
-    while i < M:
-    
-        idx = np.where(dept == collars[i,0])[0][0]
-        
-        
+    Returns:
+        Tupla (events, steps): muestras de inicio y número de muestras
+        examinadas después de cada una
+    """
+    N = len(avg_fingers_changed)
+    candidates = np.flatnonzero(np.abs(avg_fingers_changed) > threshold)
+    steps = forward_steps(candidates, N, collar_lenght_steps)
+    next_start = np.where(steps > 0, candidates + steps + 1, candidates + collar_lenght_steps + 1)
+    chosen = _walk(candidates, next_start)
+    return candidates[chosen], steps[chosen]
 
-        while dept[j] < (dept[idx] -0.5):  
-            score = 0
-           
-            if abs(avg_fingers_changed_slim[j]) > slim_threshold:
-  
-                if abs(avg_fingers_changed_slim[j+1]) < slim_threshold and abs(avg_fingers_changed_slim[j-1]) < slim_threshold:
-                    
-
-                    for k in range(2,5):
-                        if abs(avg_fingers_changed_slim[j+k]) < slim_threshold_1 and abs(avg_fingers_changed_slim[j-k]) < slim_threshold_1:
-                            score += 1
-                            
-                    
-                    if score >= 3:
-                        
-                        new_row = np.array([[dept[j-2], dept[j+2]]])
-                        slim_collars = np.vstack([slim_collars, new_row])
-                        j += 4
-                        print(new_row)
-            j += 1
-
-        j = np.where(dept == collars[i,1])[0][0] + 5
-                
-        i += 1
 
+def _walk(candidates: np.ndarray, next_start: np.ndarray) -> np.ndarray:
+    """
+    Recorre los candidatos (ordenados) saltando de cada elegido al primero en
+    next_start o después. Solo itera sobre los elegidos.
 
+    Returns:
+        Posiciones en candidates de los elegidos
+    """
+    next_pos = np.searchsorted(candidates, next_start).tolist()
+    chosen = []
+    pos = 0
+    while pos < len(candidates):
+        chosen.append(pos)
+        pos = next_pos[pos]
+    return np.array(chosen, dtype=np.int64)
 
-    #Collars parecidos a los principales pero con unos thresholds mas pequeños.
-    i=0
-    j=0
-   
-    while i < M:
 
-        idx = np.where(dept == collars[i,0])[0][0]
-    
+def _last_crossing(crossings: np.ndarray, events: np.ndarray, steps: np.ndarray):
+    """Último índice de crossings en (evento, evento + steps], y si existe."""
+    k = np.searchsorted(crossings, events + steps, side="right") - 1
+    last = crossings[np.clip(k, 0, None)] if len(crossings) else np.zeros(len(events), dtype=np.int64)
+    found = (k >= 0) & (last > events) if len(crossings) else np.zeros(len(events), dtype=bool)
+    return last, found
 
-        while j < N and dept[j] < (dept[idx] -5):
 
-            if abs(avg_fingers_changed_slim[j]) > slim_threshold:
-                
-                
-                pivot = avg_fingers_changed_slim[j]
-                dept_final = None  # Inicializar dept_final
-                dept_ini = None
-                x=j
-                for direction in (1,-1):
-                    for k in range(1,collar_lenght_steps):
-                        if j + k < N:  # Verificar límites del array
-                            j = j +(1*direction)
-                            if pivot < 0:
-                                if avg_fingers_changed_slim[j] > slim_threshold_1:
-                                    dept_ini = dept[x] if x >= 4 else dept[0]  # marcar inicio del cuello 0.4 ft antes
-                                    dept_final = dept[j] if j + 4 < N else dept[N-1] # marcar fin del cuello 0.4 ft después
-                                
-                                    
-                            elif pivot > 0:
-                                if avg_fingers_changed_slim[j] < -slim_threshold_1:
-                                    dept_ini = dept[x] if x >= 4 else dept[0]  # marcar inicio del cuello 0.4 ft antes
-                                    dept_final = dept[j] if j + 4 < N else dept[N-1] # marcar fin del cuello 0.4 ft después
-
-                    if dept_ini is None and dept_final is None: 
-                        j=x
-                    elif dept_final is not None and dept_ini is not None:
-                        break
-
-
-                if dept_final is not None and dept_ini is not None: 
-                    if dept_final > dept_ini:
-                        slim_collars_2 = np.vstack([slim_collars_2, [dept_ini - 0.4, dept_final+0.4]])
-                        print("\nThis is a slim collar positive")
-                        print(f'{dept_ini-0.4}, {dept_final+0.4}')
-                    elif dept_final < dept_ini:
-                        slim_collars_2 = np.vstack([slim_collars_2, [dept_final-0.4, dept_ini+0.4]])
-                        print("\nThis ais a slim collar negative")
-                        print(f'{dept_final-0.4}, {dept_ini+0.4}')
-
-                j += collar_lenght_steps*2
-
-            j += 1
-        j = np.where(dept == collars[i,1])[0][0] + 5
-        i += 1
+def _first_crossing(crossings: np.ndarray, events: np.ndarray, lower: np.ndarray):
+    """Primer índice de crossings en [lower, evento), y si existe."""
+    k = np.searchsorted(crossings, lower, side="left")
+    first = crossings[np.minimum(k, len(crossings) - 1)] if len(crossings) else np.zeros(len(events), dtype=np.int64)
+    found = (k < len(crossings)) & (first < events) if len(crossings) else np.zeros(len(events), dtype=bool)
+    return first, found
 
 
-    return slim_collars,slim_collars_2
+def merge_collars(ini: np.ndarray, fin: np.ndarray, dept: np.ndarray, gap=MERGE_GAP) -> np.ndarray:
+    """
+    Une los tramos (en orden) que empiezan a menos de gap ft del final del anterior:
+    el cuello resultante va del inicio del primero al final del último.
 
+    Args:
+        ini, fin: Índices de muestra de inicio y fin de cada tramo
+        dept: Profundidad de cada muestra
 
-            
-# funcion principal de detección de collars, todos los que sean grandes y muy distinguibles a simple vista
+    Returns:
+        Matriz (cuellos × 2) de índices de muestra
+    """
+    if len(ini) == 0:
+        return np.empty((0, 2), dtype=np.int64)
+    starts = np.ones(len(ini), dtype=bool)
+    starts[1:] = ~(dept[ini[1:]] < dept[fin[:-1]] + gap)
+    first = np.flatnonzero(starts)
+    last = np.append(first[1:] - 1, len(ini) - 1)
+    return np.column_stack([ini[first], fin[last]])
 
-def detect_caliper_collars(avg_fingers_changed: np.ndarray, dept: np.ndarray,collar_lenght_steps, threshold):
 
+# funcion para detectar cuellos delgados
+#
+# Solo se buscan en los tramos entre cuellos principales: desde 5 muestras después del
+# final del cuello anterior (o desde el inicio del registro) hasta 0.5 ft antes del
+# inicio del siguiente (slim_collars) o 5 ft antes (slim_collars_2). Los límites de
+# los tramos salen de los índices de los cuellos con un único searchsorted sobre la
+# profundidad (creciente), y las dos búsquedas comparten la misma pasada:
+#
+#   slim_collars: pico aislado, |s[j]| > slim_threshold con |s[j+-1]| < slim_threshold y
+#       |s[j+-2..4]| < slim_threshold_1 (comparaciones vectorizadas sobre la señal
+#       desplazada; la ventana de +-4 muestras tiene que estar dentro del registro).
+#       Cuello [dept[j-2], dept[j+2]]; el siguiente pico se busca 5 muestras después.
+#   slim_collars_2: |s[j]| > slim_threshold y el último cruce de signo contrario
+#       (|s| > slim_threshold_1) en las collar_lenght_steps - 1 muestras siguientes o,
+#       si no hay, el más lejano en las anteriores (sin salir del registro).
+#       Cuello de dept[j] al cruce, +-0.4 ft; la búsqueda sigue 2 * collar_lenght_steps
+#       muestras más allá.
+
+SLIM_NEIGHBOURS = (2, 3, 4)  # muestras a cada lado que deben quedar por debajo de slim_threshold_1
+SLIM_GAP_STEPS = 5  # el tramo después de un cuello empieza 5 muestras después de su final
+SLIM_MARGIN = 0.4  # ft antes y después de los cuellos de slim_collars_2
+
+
+def _isolated_peaks(s: np.ndarray, slim_threshold, slim_threshold_1) -> np.ndarray:
+    """Máscara de las muestras que pasan la prueba de la ventana de +-4 muestras."""
+    N = len(s)
+    pad = SLIM_NEIGHBOURS[-1]
+    a = np.pad(np.abs(s), pad, constant_values=np.inf)  # fuera del registro nunca pasa
+
+    def around(k: int):
+        return a[pad - k:pad - k + N], a[pad + k:pad + k + N]
+
+    peaks = np.abs(s) > slim_threshold
+    before, after = around(1)
+    peaks &= (before < slim_threshold) & (after < slim_threshold)
+    for k in SLIM_NEIGHBOURS:
+        before, after = around(k)
+        peaks &= (before < slim_threshold_1) & (after < slim_threshold_1)
+    return peaks
+
+
+def _in_segments(candidates: np.ndarray, starts: np.ndarray, stops: np.ndarray):
+    """Candidatos dentro de algún tramo [start, stop) y el final del tramo de cada uno."""
+    seg = np.searchsorted(starts, candidates, side="right") - 1
+    stop = stops[np.clip(seg, 0, None)]
+    inside = (seg >= 0) & (candidates < stop)
+    return candidates[inside], stop[inside]
+
+
+def detect_slim_collars(avg_fingers_changed_slim: np.ndarray, dept: np.ndarray, bounds: np.ndarray, slim_threshold, slim_threshold_1, collar_lenght_steps=collar_lenght_steps):
+    """
+    Detecta los cuellos delgados entre los cuellos principales.
 
-    # funcion para detectar cuellos
+    Args:
+        avg_fingers_changed_slim: Fracción promedio de dedos que cambian (máscara slim)
+        dept: Profundidad de cada muestra (creciente)
+        bounds: Índices de muestra [inicio, fin] de los cuellos principales, en orden
+        slim_threshold, slim_threshold_1: Umbrales de detección
+        collar_lenght_steps: Longitud máxima del cuello en muestras
 
-    collars = np.empty((0,2)) # almacenar los cuellos detectados (profundidad inicio, profundidad fin)
+    Returns:
+        Tupla (slim_collars, slim_collars_2) de matrices (cuellos × 2) en profundidad
+    """
+    s = avg_fingers_changed_slim
+    N = len(s)
+    L = collar_lenght_steps
+    if len(bounds) == 0 or N == 0:
+        return np.empty((0, 2)), np.empty((0, 2))
+
+    # Tramos entre cuellos: mismo inicio para las dos búsquedas, distinto final
+    starts = np.concatenate([[0], bounds[:-1, 1] + SLIM_GAP_STEPS])
+    limits = dept[bounds[:, 0]]
+    stops = np.searchsorted(dept, np.concatenate([limits - 0.5, limits - 5])).reshape(2, -1)
+    stops = np.minimum(stops, N)
+
+    # slim_collars: picos aislados, al menos SLIM_GAP_STEPS muestras entre uno y el siguiente
+    peaks, stop = _in_segments(np.flatnonzero(_isolated_peaks(s, slim_threshold, slim_threshold_1)), starts, stops[0])
+    peaks = peaks[_walk(peaks, np.minimum(peaks + SLIM_GAP_STEPS, stop))] if len(peaks) else peaks
+    slim_collars = np.column_stack([dept[peaks - 2], dept[peaks + 2]]) if len(peaks) else np.empty((0, 2))
+
+    # slim_collars_2: cambio con retorno en sentido contrario, hacia adelante o hacia atrás
+    events, stop = _in_segments(np.flatnonzero(np.abs(s) > slim_threshold), starts, stops[1])
+    pivot = s[events]
+    up = np.flatnonzero(s > slim_threshold_1)
+    down = np.flatnonzero(s < -slim_threshold_1)
+
+    ahead = forward_steps(events, N, L)
+    behind = np.where(events + 1 < N, max(L - 1, 0), 0)
+    lower = np.maximum(events - behind, 0)
+    up_fwd, up_fwd_found = _last_crossing(up, events, ahead)
+    down_fwd, down_fwd_found = _last_crossing(down, events, ahead)
+    up_back, up_back_found = _first_crossing(up, events, lower)
+    down_back, down_back_found = _first_crossing(down, events, lower)
+    fwd = np.where(pivot < 0, up_fwd, down_fwd)
+    fwd_found = np.where(pivot < 0, up_fwd_found, down_fwd_found)
+    back = np.where(pivot < 0, up_back, down_back)
+    fwd_found &= pivot != 0
+    back_found = np.where(pivot < 0, up_back_found, down_back_found) & ~fwd_found & (pivot != 0)
+    found = fwd_found | back_found
+    close = np.where(fwd_found, fwd, back)
+
+    # Muestra donde sigue la búsqueda después de cada evento
+    moved = np.where(fwd_found, ahead, np.where(back_found, -behind, 0))
+    chosen = _walk(events, np.minimum(events + moved + 2 * L + 1, stop)) if len(events) else events
+    events, close, found = events[chosen], close[chosen], found[chosen]
+
+    events, close = events[found], close[found]
+    dept_ini = np.where(events >= 4, dept[events], dept[0])
+    dept_final = np.where(close + 4 < N, dept[close], dept[N - 1])
+    lo = np.minimum(dept_ini, dept_final) - SLIM_MARGIN
+    hi = np.maximum(dept_ini, dept_final) + SLIM_MARGIN
+    slim_collars_2 = np.column_stack([lo, hi])[dept_final != dept_ini]
+
+    return slim_collars, slim_collars_2
+
+
+def detect_caliper_collars(avg_fingers_changed: np.ndarray, avg_fingers_changed_slim: np.ndarray, dept: np.ndarray, collar_lenght_steps, threshold,
+                           slim_threshold=slim_threshold, slim_threshold_1=slim_threshold_1):
 
-    i= 0
     N = len(avg_fingers_changed)
+    events, steps = collar_events(avg_fingers_changed, threshold, collar_lenght_steps)
+    pivot = avg_fingers_changed[events]
+
+    # Cierre del cuello: último cruce en sentido contrario al del evento
+    up, up_found = _last_crossing(np.flatnonzero(avg_fingers_changed > threshold), events, steps)
+    down, down_found = _last_crossing(np.flatnonzero(avg_fingers_changed < -threshold), events, steps)
+    close = np.where(pivot < 0, up, down)
+    found = np.where(pivot < 0, up_found, down_found)
+
+    ini_idx = np.maximum(events - MARGIN_STEPS, 0)  # inicio del cuello 0.6 ft antes
+    fin_idx = np.minimum(close + MARGIN_STEPS, N - 1)  # fin del cuello 0.6 ft después
+    valid = found & (dept[fin_idx] > dept[ini_idx])
+
+    # Cambios de libraje: todos los dedos cambian pero no regresan a la posición original
+    weight_change = np.abs(pivot) == 1
+    weight_idx = np.minimum(events + MARGIN_STEPS, N - 1)
+
+    # Por evento: primero el tramo del cambio de libraje y después el del cuello
+    ini = np.column_stack([ini_idx, ini_idx]).ravel()
+    fin = np.column_stack([weight_idx, fin_idx]).ravel()
+    keep = np.column_stack([weight_change, valid]).ravel()
+    bounds = merge_collars(ini[keep], fin[keep], dept)
+    collars = dept[bounds]
 
-    while i < N:
-
-        if abs(avg_fingers_changed[i]) > threshold:
-            
-            # Sirve para detectar  cuellos en cambios de libraje, donde todos los dedos cambian pero no regresan a la posición original
-            if abs(avg_fingers_changed[i]) == 1:
-                dept_ini = dept[i-6] if i >= 6 else dept[0]
-                dept_final = dept[i+6] if i + 6 < N else dept[N-1]
-                if collars.shape[0]>0:
-                    if dept_ini < (collars[-1,1] + 4): # Si el cuello detectado esta muy pegado al anterior pone como dept final del nuevo cuello
-                        collars[-1,1] = dept_final
-                        
-                    else:
-                        collars = np.vstack([collars, [dept_ini, dept_final]])
-                else:
-                    collars = np.vstack([collars, [dept_ini, dept_final]])
-
-            
-            dept_ini = dept[i-6] if i >= 6 else dept[0]  # marcar inicio del cuello 0.6 ft antes
-            pivot = avg_fingers_changed[i]
-            dept_final = None  # Inicializar dept_final
-            x=i
-            for j in range(1,collar_lenght_steps):
-                if i + j < N:  # Verificar límites del array
-                    i += 1
-                    if pivot < 0:
-                        
-                        if avg_fingers_changed[i] > threshold:
-                            dept_final = dept[i+6] if i + 6 < N else dept[N-1] # marcar fin del cuello 0.6 ft después
-                           
-                                               
-                    elif pivot > 0:
-                        
-                        if avg_fingers_changed[i] < -threshold:
-                            dept_final = dept[i+6] if i + 6 < N else dept[N-1] # marcar fin del cuello 0.6 ft después
-                          
-            if dept_final is None:
-                dept_ini = None  # No se encontró un cuello válido
-            if i == x:
-                i+=collar_lenght_steps # avanzar si no se encontró un cuello
-
-            if dept_final is not None and dept_ini is not None:            
-                if dept_final > dept_ini:
-                    # print(f'collars[-1,1]{collars[-1,1]}, dept_ini {dept_ini}')
-                    if collars.shape[0]>0:
-                        if dept_ini < (collars[-1,1] + 4): # Si el cuello detectado esta muy pegado al anterior pone como dept final del nuevo cuello
-                            collars[-1,1] = dept_final
-                            
-                        else:
-                            collars = np.vstack([collars, [dept_ini, dept_final]])
-                    else:
-                        collars = np.vstack([collars, [dept_ini, dept_final]])
-                
-        
-        i += 1
-
-    
-
-      
     # Detectar collars delgados con la función detect_slim_collars
-    
-    slim_collars, slim_collars_2 = detect_slim_collars(avg_fingers_changed_slim, dept, collars, slim_threshold, slim_threshold_1)
-
+    slim_collars, slim_collars_2 = detect_slim_collars(avg_fingers_changed_slim, dept, bounds, slim_threshold, slim_threshold_1, collar_lenght_steps)
 
     return collars,slim_collars,slim_collars_2
-                
-
-collars, slim_collars, slim_collars_2 = detect_caliper_collars(avg_fingers_changed, dept, collar_lenght_steps, threshold)
 
 
 # colocar las lineas para primero y ultima junta 
@@ -345,9 +400,6 @@ def collars_top_bottom(collars, dept):
 
     return collars
 
-collars = collars_top_bottom(collars, dept)
-
-
 
 #definir promedio de juntas validas 
 
@@ -364,11 +416,6 @@ def collars_avg(collars):
     avg = abs(sum/joints_ok)
     return avg
 
-avg= collars_avg(collars)
-print(avg)
-
-
-
 
 # insertar los slim collars en collars original
 
@@ -445,40 +492,108 @@ def insert_slim_collars_and_others(collars, slim_collars, slim_collars_2, avg):
     return collars_full
 
 
+def locate_collars(avg_fingers_changed: np.ndarray, avg_fingers_changed_slim: np.ndarray, dept: np.ndarray,
+                   threshold=threshold, slim_threshold=slim_threshold,
+                   slim_threshold_1=slim_threshold_1, collar_lenght_steps=collar_lenght_steps) -> Dict[str, np.ndarray]:
+    """
+    Detecta los collars sobre el gradiente ya calculado (grad_and_boottable).
 
+    Args:
+        avg_fingers_changed, avg_fingers_changed_slim, dept: Salida de grad_and_boottable
+        threshold, slim_threshold, slim_threshold_1, collar_lenght_steps: Parámetros de detección
 
-collars_full = insert_slim_collars_and_others(collars, slim_collars, slim_collars_2, avg)
-
-collars_copy = collars.copy()
-
-collars = collars_full.copy()
+    Returns:
+        Dict con collars (tabla final con cuellos delgados y por geometría), collars_detected
+        (antes de insertar los adicionales), slim_collars, slim_collars_2 y avg_joint_length
+    """
+    collars, slim_collars, slim_collars_2 = detect_caliper_collars(
+        avg_fingers_changed, avg_fingers_changed_slim, dept, collar_lenght_steps, threshold,
+        slim_threshold, slim_threshold_1
+    )
+    collars = collars_top_bottom(collars, dept)
+    avg = collars_avg(collars)
+
+    return {
+        "collars": insert_slim_collars_and_others(collars, slim_collars, slim_collars_2, avg),
+        "collars_detected": collars,
+        "slim_collars": slim_collars,
+        "slim_collars_2": slim_collars_2,
+        "avg_joint_length": avg,
+    }
+
+
+def detect_joints(data: np.ndarray, dept: np.ndarray,
+                  finger_jump=finger_jump, finger_jump_slim=finger_jump_slim,
+                  threshold=threshold, slim_threshold=slim_threshold,
+                  slim_threshold_1=slim_threshold_1, collar_lenght_steps=collar_lenght_steps,
+                  progress=None) -> Dict[str, np.ndarray]:
+    """
+    Ejecuta toda la detección de juntas sobre la matriz ya cargada.
 
-                    
-               
-            
-                    
+    Args:
+        data: Matriz [DEPT, R...] de to_numpy
+        dept: Profundidad de cada fila de data
+        finger_jump, finger_jump_slim, threshold, slim_threshold, slim_threshold_1,
+        collar_lenght_steps: Parámetros de detección (por defecto las constantes del módulo)
+        progress: Callback opcional progress(etapa, porcentaje)
 
+    Returns:
+        Dict de locate_collars más dept (profundidad ajustada al gradiente)
+    """
+    avg_fingers_changed, avg_fingers_changed_slim, dept = grad_and_boottable(data, dept, finger_jump, finger_jump_slim)
+    if progress:
+        progress("collars", 55)
 
-        
+    result = locate_collars(avg_fingers_changed, avg_fingers_changed_slim, dept, threshold,
+                            slim_threshold, slim_threshold_1, collar_lenght_steps)
+    if progress:
+        progress("statistics", 70)
 
+    return {**result, "dept": dept}
 
 
+def export_debug_csvs(data: np.ndarray, joints: Dict[str, np.ndarray], columns=None, exports_dir: str = None) -> None:
+    """Exporta los CSV intermedios de la detección (df, grad, mask, collars...) para diagnóstico."""
+    exports_dir = exports_dir or get_exports_dir()
+    os.makedirs(exports_dir, exist_ok=True)
 
+    def path(name: str) -> str:
+        return os.path.join(exports_dir, name)
 
+    pd.DataFrame(data, columns=columns).to_csv(path('df.csv'), index=False)
 
+    grad, mask, mask_slim = finger_masks(data)
+    grad_dept = joints["dept"]
+    mask = np.column_stack((mask, mask.mean(axis=1)))
+    mask_slim = np.column_stack((mask_slim, np.round(mask_slim.mean(axis=1), 4)))
+    for name, values in (('grad.csv', grad), ('mask.csv', mask), ('mask_slim.csv', mask_slim)):
+        frame = pd.DataFrame(values)
+        frame.insert(0, "DEPT", grad_dept)
+        frame.to_csv(path(name), index=False, float_format='%.4f')
 
-#exportar array collars a pandas y csv
-collars= pd.DataFrame(collars)
-collars.to_csv(os.path.join(os.path.dirname(__file__), '..', '..', 'exports', 'collars.csv'), index=False, float_format='%.4f')
-collars_copy= pd.DataFrame(collars_copy)
-collars_copy.to_csv(os.path.join(os.path.dirname(__file__), '..', '..', 'exports', 'collars_copy.csv'), index=False, float_format='%.4f')
-slim_collars= pd.DataFrame(slim_collars)
-slim_collars.to_csv(os.path.join(os.path.dirname(__file__), '..', '..', 'exports', 'slim_collars.csv'), index=False, float_format='%.4f')
-slim_collars_2= pd.DataFrame(slim_collars_2)
-slim_collars_2.to_csv(os.path.join(os.path.dirname(__file__), '..', '..', 'exports', 'slim_collars_2.csv'), index=False)
+    pd.DataFrame(joints["collars"]).to_csv(path('collars.csv'), index=False, float_format='%.4f')
+    pd.DataFrame(joints["collars_detected"]).to_csv(path('collars_copy.csv'), index=False, float_format='%.4f')
+    pd.DataFrame(joints["slim_collars"]).to_csv(path('slim_collars.csv'), index=False, float_format='%.4f')
+    pd.DataFrame(joints["slim_collars_2"]).to_csv(path('slim_collars_2.csv'), index=False)
 
 
+if __name__ == "__main__":
+    from df_manage import get_latest_dataframe
+    from dataset_store import latest_dataset
 
+    #leer el último dataset centralizado guardado en "exports/datasets"
+    df, filename = get_latest_dataframe(use_centralized=True)
+    if df is None:
+        print(f"[ERROR] No se pudo cargar el dataset centralizado más reciente")
+        raise SystemExit(1)
+    print(f"[SUCCESS] Dataset centralizado cargado: {filename} ({len(df)} filas, {len(df.columns)} columnas)")
 
+    data, dept = to_numpy(df)
+    joints = detect_joints(data, dept)
+    print(joints["avg_joint_length"])
 
-    
+    # Los CSV de diagnóstico van al directorio de trabajo del dataset
+    dataset = latest_dataset()
+    debug_dir = dataset.workspace("debug") if dataset is not None else None
+    valid_r_curves, depth_col = curves_and_depth(df)
+    export_debug_csvs(data, joints, columns=[depth_col] + valid_r_curves, exports_dir=debug_dir)
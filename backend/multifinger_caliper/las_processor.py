@@ -1,16 +1,24 @@
 """
 LAS File Processing Module - Versión mínima
-Contiene process_las_data(las) y export_las_curves_to_csv(las)
+Contiene process_las_data(las), export_las_curves_to_dataset(las), export_las_curves_to_csv(las)
+e ingest_las_to_dataset(path), que ejecuta la ingesta completa en un worker del nivel de cómputo
 """
 
 import lasio
-import csv
 import os
 import math
+import numpy as np
+import pandas as pd
 from typing import Dict, List, Any, Tuple
 
 # Import utilities
-from .utils import get_las_file_info, validate_las_curves
+from .utils import get_las_file_info, validate_las_curves, extract_las_metadata
+from .centralization import taubin_centralize_matrix
+from .dataset_store import save_dataset
+from .lod import build_pyramids
+from .registry import dataset_registry
+from .ingest import ingest_las_file
+from ..config import MAX_FILE_SIZE
 
 
 
@@ -173,6 +181,8 @@ def apply_taubin_centralization(r_values: List[float]) -> List[float]:
     """
     Aplica centralización usando ajuste robusto de círculo (método de Taubin).
     Encuentra el círculo que mejor se ajusta a las mediciones y centraliza.
+    Versión por fila; para matrices completas usar
+    centralization.taubin_centralize_matrix.
 
     Args:
         r_values: Lista de valores radiales (R01, R02, ..., RN)
@@ -200,8 +210,6 @@ def apply_taubin_centralization(r_values: List[float]) -> List[float]:
     # Aplicar ajuste de círculo usando método de Taubin
     center_x, center_y, fitted_radius = taubin_circle_fit(points_cartesian)
 
-    print(f"[TAUBIN] Círculo ajustado - Centro: ({center_x:.3f}, {center_y:.3f}), Radio: {fitted_radius:.3f}")
-
     # Recalcular radios desde el centro del círculo ajustado
     centralized_r_values = []
     for i, r in enumerate(r_values):
@@ -220,6 +228,134 @@ def apply_taubin_centralization(r_values: List[float]) -> List[float]:
     return centralized_r_values
 
 
+def curves_to_matrix(las, curves: List[Any] = None) -> np.ndarray:
+    """
+    Devuelve los datos de las curvas como una matriz float64 (profundidad × curvas).
+
+    Usa la matriz ya cargada por el lector rápido (las.data) cuando está
+    disponible y si no apila las columnas de cada curva.
+
+    Args:
+        las: LASData del lector rápido o LASFile de lasio
+        curves: Curvas a incluir (por defecto todas)
+
+    Returns:
+        Nueva matriz float64 (se puede modificar sin afectar al objeto LAS)
+    """
+    if curves is None:
+        curves = list(las.curves)
+    data = getattr(las, "data", None)
+    if isinstance(data, np.ndarray) and data.ndim == 2 and data.shape[1] == len(curves) == len(las.curves):
+        return np.array(data, dtype=np.float64)
+    return np.column_stack([np.asarray(curve.data, dtype=np.float64) for curve in curves])
+
+
+def prepare_curve_matrices(las) -> Tuple[List[str], np.ndarray, List[int], np.ndarray]:
+    """
+    Construye la matriz de curvas y la matriz de radios centralizados.
+
+    Args:
+        las: LASData del lector rápido o LASFile de lasio
+
+    Returns:
+        Tupla (headers, data, r_columns_indices, centralized_r):
+        mnemónicos, matriz original (profundidad × curvas) con NaN en nulos e
+        infinitos, índices de las columnas R y radios centralizados (profundidad × dedos)
+    """
+    # Obtener todas las curvas válidas
+    valid_curves = []
+    for curve in las.curves:
+        if hasattr(curve, 'data') and len(curve.data) > 0:
+            valid_curves.append(curve)
+
+    if not valid_curves:
+        raise ValueError("No se encontraron curvas válidas en el archivo LAS")
+
+    # Headers (nombres de las curvas)
+    headers = [curve.mnemonic for curve in valid_curves]
+
+    # Matriz (profundidad × curvas); los valores nulos (-999.25) e infinitos quedan como NaN
+    data = curves_to_matrix(las, valid_curves)
+    data[(data == -999.25) | ~np.isfinite(data)] = np.nan
+
+    # Identificar columnas R para aplicar el algoritmo
+    r_columns_indices = [
+        i for i, header in enumerate(headers)
+        if header and header.startswith('R') and header[1:].isdigit()
+    ]
+
+    print(f"[CENTRALIZATION] Aplicando algoritmo de Elipse Excéntrica a {len(r_columns_indices)} columnas R")
+
+    # Centralización por lotes de todas las filas en una sola pasada
+    centralized_r = taubin_centralize_matrix(data[:, r_columns_indices])
+
+    return headers, data, r_columns_indices, centralized_r
+
+
+def export_las_curves_to_dataset(las) -> Dict[str, Any]:
+    """
+    Guarda las curvas del LAS en el almacén binario de datasets: la matriz
+    original y la matriz R centralizada se guardan una sola vez cada una.
+    Los CSV se generan solo bajo demanda (Dataset.export_csv).
+
+    Args:
+        las: LASData del lector rápido o LASFile de lasio
+
+    Returns:
+        Dict con el id y la ruta del dataset creado
+    """
+    headers, data, r_columns_indices, centralized_r = prepare_curve_matrices(las)
+    dataset = save_dataset(headers, data, r_columns_indices, centralized_r, extract_las_metadata(las))
+    build_pyramids(dataset)
+    dataset_registry.register_dataset(dataset)
+
+    print(f"[DATASET] Curvas exportadas: {len(headers)}")
+    print(f"[DATASET] Filas de datos: {data.shape[0]}")
+
+    return {
+        "dataset_id": dataset.dataset_id,
+        "path": dataset.path
+    }
+
+
+def ingest_las_to_dataset(path: str, tag: str = "INGEST", max_size: int = MAX_FILE_SIZE) -> Dict[str, Any]:
+    """
+    Parsea un LAS (o LAS.gz) desde disco, extrae el resumen y lo guarda como dataset.
+
+    Se ejecuta en un worker del nivel de cómputo (compute.py): el event loop
+    solo recibe el resumen.
+
+    Args:
+        path: Archivo con los bytes crudos subidos
+        tag: Prefijo de los logs
+        max_size: Tamaño máximo de los bytes crudos
+
+    Returns:
+        Resumen de process_las_data con bytes_processed, dataset_id y
+        dataset_exported (o dataset_error si no se pudo guardar)
+    """
+    las, bytes_processed = ingest_las_file(path, max_size)
+    print(f"[{tag}] File size: {bytes_processed['received']} bytes, "
+          f"decompressed: {bytes_processed['decompressed']} bytes")
+
+    print(f"[{tag}] Processing LAS data")
+    result = process_las_data(las)
+    result["bytes_processed"] = bytes_processed
+    print(f"[{tag}] LAS data processed successfully")
+
+    # Guardar el dataset binario (matriz original y centralizada)
+    try:
+        print(f"[{tag}] Storing dataset")
+        dataset_info = export_las_curves_to_dataset(las)
+        result["dataset_id"] = dataset_info["dataset_id"]
+        result["dataset_exported"] = dataset_info
+        print(f"[{tag}] Dataset stored successfully")
+    except Exception as e:
+        print(f"[{tag}] Dataset export error: {e}")
+        result["dataset_error"] = str(e)
+    return result
+
+
 def export_las_curves_to_csv(las: lasio.LASFile, output_path: str = None) -> Dict[str, str]:
     """
     Exporta todas las curvas del archivo LAS a dos archivos CSV:
@@ -246,95 +382,25 @@ def export_las_curves_to_csv(las: lasio.LASFile, output_path: str = None) -> Dic
     centralized_path = os.path.join(exports_dir, f"{well_name}_curves_centralized.csv")
     decentralized_path = os.path.join(exports_dir, f"{well_name}_curves_decentralized.csv")
 
-    # Obtener todas las curvas válidas
-    valid_curves = []
-    for curve in las.curves:
-        if hasattr(curve, 'data') and len(curve.data) > 0:
-            valid_curves.append(curve)
+    headers, data, r_columns_indices, centralized_r = prepare_curve_matrices(las)
+    num_rows = data.shape[0]
 
-    if not valid_curves:
-        raise ValueError("No se encontraron curvas válidas en el archivo LAS")
-
-    # Crear lista de datos para CSV
-    csv_data = []
-
-    # Headers (nombres de las curvas)
-    headers = [curve.mnemonic for curve in valid_curves]
-    csv_data.append(headers)
-
-    # Datos de las curvas
-    num_rows = len(valid_curves[0].data)
-    for i in range(num_rows):
-        row = []
-        for curve in valid_curves:
-            value = curve.data[i]
-            # Convertir valores nulos (-999.25) a vacío
-            if value == -999.25 or str(value).lower() in ['nan', 'inf', '-inf']:
-                row.append("")  # Celda vacía para valores nulos
-            else:
-                row.append(str(value))
-        csv_data.append(row)
-
-    # Escribir archivo CSV ORIGINAL
-    with open(original_path, 'w', newline='', encoding='utf-8') as csvfile:
-        writer = csv.writer(csvfile)
-        writer.writerows(csv_data)
+    # Escribir archivo CSV ORIGINAL (NaN -> celda vacía)
+    df_original = pd.DataFrame(data, columns=headers, copy=False)
+    df_original.to_csv(original_path, index=False, na_rep="", encoding='utf-8', lineterminator="\r\n")
 
     print(f"[CSV] Archivo CSV original creado: {original_path}")
-    print(f"[CSV] Curvas exportadas: {len(valid_curves)}")
+    print(f"[CSV] Curvas exportadas: {len(headers)}")
     print(f"[CSV] Filas de datos: {num_rows}")
 
-    # Crear archivo CSV CENTRALIZADO con algoritmo de Elipse Excéntrica aplicado
-    centralized_data = [csv_data[0]]  # Copiar headers
-
-    # Identificar columnas R para aplicar el algoritmo
-    r_columns_indices = []
-    for i, header in enumerate(csv_data[0]):
-        if header and header.startswith('R') and header[1:].isdigit():
-            r_columns_indices.append(i)
-
-    print(f"[CENTRALIZATION] Aplicando algoritmo de Elipse Excéntrica a {len(r_columns_indices)} columnas R")
+    centralized = data.copy()
+    centralized[:, r_columns_indices] = centralized_r
 
-    # Procesar cada fila aplicando el algoritmo de centralización
-    for row in csv_data[1:]:  # Saltar headers
-        new_row = row.copy()
-
-        # Extraer valores R de esta fila
-        r_values = []
-        for idx in r_columns_indices:
-            if idx < len(row):
-                try:
-                    val = row[idx]
-                    if val and val != "" and val != "-999.25":
-                        r_values.append(float(val))
-                    else:
-                        r_values.append(None)
-                except (ValueError, TypeError):
-                    r_values.append(None)
-            else:
-                r_values.append(None)
-
-        # Aplicar algoritmo de elipse excéntrica
-        if r_values and any(v is not None for v in r_values):
-            centralized_r_values = apply_taubin_centralization(r_values)
-            centralized_r_values = [round(valor, 4) for valor in centralized_r_values]
-            # Actualizar la fila con los valores centralizados
-            for i, idx in enumerate(r_columns_indices):
-                if i < len(centralized_r_values) and centralized_r_values[i] is not None:
-                    new_row[idx] = str(centralized_r_values[i])
-
-        centralized_data.append(new_row)
-
-    # Agregar comentario indicando que se aplicó el algoritmo
-
-    with open(centralized_path, 'w', newline='', encoding='utf-8') as csvfile:
-        writer = csv.writer(csvfile)
-        writer.writerows(centralized_data)
+    df_centralized = pd.DataFrame(centralized, columns=headers, copy=False)
+    df_centralized.to_csv(centralized_path, index=False, na_rep="", encoding='utf-8', lineterminator="\r\n")
 
     # Crear archivo CSV DESCENTRALIZADO (datos originales sin procesar)
-    with open(decentralized_path, 'w', newline='', encoding='utf-8') as csvfile:
-        writer = csv.writer(csvfile)
-        writer.writerows(csv_data)
+    df_original.to_csv(decentralized_path, index=False, na_rep="", encoding='utf-8', lineterminator="\r\n")
 
     print(f"[CSV] Archivo CSV descentralizado creado: {decentralized_path}")
 
@@ -0,0 +1,491 @@
+"""
+Lector rápido de archivos LAS 2.0.
+
+Lee las secciones de encabezado de forma perezosa y carga la sección ~A
+directamente desde bytes a una matriz 2-D contigua (NULL -> NaN). Expone la
+misma interfaz que usa el resto del módulo de lasio (las.version, las.well,
+las.curves, curve.data, las.data), por lo que process_las_data y
+export_las_curves_to_csv funcionan sin cambios. Los archivos que este lector
+no soporta (WRAP YES, LAS 3.0, datos no numéricos) se leen con lasio.
+"""
+
+import io
+import math
+import re
+import warnings
+from typing import Any, Dict, List, Optional
+
+import lasio
+import numpy as np
+
+from ..config import MAX_DECOMPRESSED_SIZE
+
+DEFAULT_NULL_VALUE = -999.25
+SUPPORTED_VERSIONS = (1.2, 2.0)
+ENCODINGS_TO_TRY = ['utf-8', 'iso-8859-1', 'latin1', 'cp1252']
+
+
+class UnsupportedLASError(ValueError):
+    """El archivo no puede leerse con el lector rápido (usar lasio)."""
+
+
+class HeaderItem:
+    """Línea de encabezado LAS: MNEM.UNIT  VALUE : DESCRIPTION"""
+
+    def __init__(self, mnemonic: str, unit: str = "", value: Any = "", descr: str = ""):
+        self.mnemonic = mnemonic
+        self.original_mnemonic = mnemonic
+        self.unit = unit
+        self.value = value
+        self.descr = descr
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}(mnemonic="{self.mnemonic}", unit="{self.unit}", value="{self.value}", descr="{self.descr}")'
+
+
+class CurveItem(HeaderItem):
+    """Curva de la sección ~C con su columna de datos."""
+
+    def __init__(self, mnemonic: str, unit: str = "", value: Any = "", descr: str = "", data: Optional[np.ndarray] = None):
+        super().__init__(mnemonic, unit, value, descr)
+        self.data = data if data is not None else np.empty(0)
+
+
+class HeaderSection:
+    """
+    Sección de encabezado parseada bajo demanda.
+
+    Guarda las líneas crudas y solo las interpreta la primera vez que se
+    accede a un item (las.well.WELL, 'NULL' in las.well, iteración, ...).
+    """
+
+    def __init__(self, lines: List[bytes], encoding: Optional[str] = None):
+        self._lines = lines
+        self._encoding = encoding
+        self._items: Optional[List[HeaderItem]] = None
+
+    @property
+    def items(self) -> List[HeaderItem]:
+        if self._items is None:
+            self._items = [item for item in (parse_header_line(line, self._encoding) for line in self._lines) if item]
+        return self._items
+
+    def _find(self, mnemonic: str) -> Optional[HeaderItem]:
+        for item in self.items:
+            if item.mnemonic == mnemonic:
+                return item
+        return None
+
+    def __getattr__(self, name: str) -> HeaderItem:
+        if name.startswith('_'):
+            raise AttributeError(name)
+        item = self._find(name)
+        if item is None:
+            raise AttributeError(f"Header section does not contain '{name}'")
+        return item
+
+    def __getitem__(self, key):
+        if isinstance(key, int):
+            return self.items[key]
+        item = self._find(key)
+        if item is None:
+            raise KeyError(key)
+        return item
+
+    def __contains__(self, mnemonic: str) -> bool:
+        return self._find(mnemonic) is not None
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+
+class LASData:
+    """Resultado del lector rápido, compatible con el subconjunto de lasio.LASFile que usa el módulo."""
+
+    def __init__(self, sections: Dict[str, HeaderSection], curves: List[CurveItem], data: np.ndarray, other: str = ""):
+        self.version = sections.get("V", HeaderSection([]))
+        self.well = sections.get("W", HeaderSection([]))
+        self.params = sections.get("P", HeaderSection([]))
+        self.curves = curves
+        self.data = data
+        self.other = other
+
+    def keys(self) -> List[str]:
+        return [curve.mnemonic for curve in self.curves]
+
+    def __getitem__(self, mnemonic: str) -> np.ndarray:
+        for curve in self.curves:
+            if curve.mnemonic == mnemonic:
+                return curve.data
+        raise KeyError(mnemonic)
+
+
+def decode_bytes(raw: bytes, encoding: Optional[str] = None) -> str:
+    """Decodifica bytes probando las codificaciones habituales de archivos LAS."""
+    if encoding:
+        return raw.decode(encoding, errors='replace')
+    for candidate in ENCODINGS_TO_TRY:
+        try:
+            return raw.decode(candidate)
+        except UnicodeDecodeError:
+            continue
+    return raw.decode('latin1', errors='replace')
+
+
+def _convert_value(value: str) -> Any:
+    """Convierte el valor a int/float cuando es numérico (igual que lasio)."""
+    try:
+        return int(value)
+    except ValueError:
+        pass
+    try:
+        return float(value)
+    except ValueError:
+        return value
+
+
+def parse_header_line(line: bytes, encoding: Optional[str] = None) -> Optional[HeaderItem]:
+    """
+    Parsea una línea de encabezado LAS 2.0.
+
+    Args:
+        line: Línea cruda (sin salto de línea)
+        encoding: Codificación a usar (None para autodetectar)
+
+    Returns:
+        HeaderItem o None si la línea está vacía o es un comentario
+    """
+    text = decode_bytes(line, encoding).strip()
+    if not text or text.startswith('#'):
+        return None
+
+    dot = text.find('.')
+    colon = text.rfind(':')
+    if dot == -1 or (colon != -1 and colon < dot):
+        # Línea sin punto: se interpreta todo antes de ':' como mnemónico
+        mnemonic, _, descr = text.partition(':')
+        return HeaderItem(mnemonic.strip().upper(), "", "", descr.strip())
+
+    # Los mnemónicos se normalizan a mayúsculas, como hace lasio por defecto
+    mnemonic = text[:dot].strip().upper()
+    rest = text[dot + 1:]
+    if colon != -1:
+        colon -= dot + 1
+        body, descr = rest[:colon], rest[colon + 1:]
+    else:
+        body, descr = rest, ""
+
+    # La unidad va pegada al punto y termina en el primer espacio
+    if body[:1].isspace():
+        unit, value = "", body
+    else:
+        unit, _, value = body.partition(' ')
+
+    return HeaderItem(mnemonic, unit.strip(), _convert_value(value.strip()), descr.strip())
+
+
+def _unique_mnemonics(mnemonics: List[str]) -> List[str]:
+    """Renombra mnemónicos duplicados como lasio (GR:1, GR:2, ...)."""
+    counts = {m: mnemonics.count(m) for m in mnemonics}
+    seen: Dict[str, int] = {}
+    unique = []
+    for mnemonic in mnemonics:
+        if counts[mnemonic] > 1:
+            seen[mnemonic] = seen.get(mnemonic, 0) + 1
+            unique.append(f"{mnemonic}:{seen[mnemonic]}")
+        else:
+            unique.append(mnemonic)
+    return unique
+
+
+def parse_data_block(block, num_curves: int, null_value: Optional[float] = DEFAULT_NULL_VALUE, dtype=np.float64) -> np.ndarray:
+    """
+    Convierte la sección ~A (bytes) en una matriz (filas × curvas).
+
+    Args:
+        block: Bytes de la sección de datos (sin la línea ~A)
+        num_curves: Número de curvas declaradas en ~C
+        null_value: Valor NULL del archivo, se reemplaza por NaN
+        dtype: np.float64 o np.float32
+
+    Returns:
+        Matriz 2-D C-contigua
+
+    Raises:
+        UnsupportedLASError: si el bloque no es una tabla numérica regular
+    """
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        try:
+            values = np.fromstring(block, dtype=dtype, sep=' ')
+        except (ValueError, DeprecationWarning) as e:
+            raise UnsupportedLASError(f"Sección ~A no numérica: {e}")
+
+    if num_curves == 0 or values.size % num_curves != 0:
+        raise UnsupportedLASError(
+            f"Sección ~A irregular: {values.size} valores para {num_curves} curvas"
+        )
+
+    data = values.reshape(-1, num_curves)
+    if null_value is not None:
+        data[data == np.asarray(null_value, dtype=dtype)] = np.nan
+    return data
+
+
+class _ParsedHeader:
+    """Secciones de encabezado ya validadas para el lector rápido."""
+
+    def __init__(self, sections: Dict[str, HeaderSection], curve_items: List[HeaderItem],
+                 null_value: Optional[float], other: str):
+        self.sections = sections
+        self.curve_items = curve_items
+        self.null_value = null_value
+        self.other = other
+
+    @property
+    def num_curves(self) -> int:
+        return len(self.curve_items)
+
+    def estimated_rows(self) -> Optional[int]:
+        """Número de filas esperado según STRT/STOP/STEP (None si no se puede estimar).
+
+        Los valores vienen del encabezado sin validar: solo sirven para
+        preasignar la matriz, nunca como límite.
+        """
+        well = self.sections.get("W")
+        if well is None or not all(m in well for m in ("STRT", "STOP", "STEP")):
+            return None
+        strt, stop, step = well.STRT.value, well.STOP.value, well.STEP.value
+        if not all(isinstance(v, (int, float)) and math.isfinite(v) for v in (strt, stop, step)) or step == 0:
+            return None
+        return int(round(abs(stop - strt) / abs(step))) + 1
+
+    def build(self, data: np.ndarray) -> LASData:
+        mnemonics = _unique_mnemonics([item.mnemonic or "UNKNOWN" for item in self.curve_items])
+        curves = [
+            CurveItem(mnemonic, item.unit, item.value, item.descr, data[:, i])
+            for i, (mnemonic, item) in enumerate(zip(mnemonics, self.curve_items))
+        ]
+        return LASData(self.sections, curves, data, self.other)
+
+
+_DATA_SECTION = re.compile(rb'(?m)^[ \t]*~[Aa]')
+
+
+def _find_data_section(buffer: bytes) -> Optional[int]:
+    """Devuelve la posición donde empieza la sección ~A (None si aún no aparece)."""
+    match = _DATA_SECTION.search(buffer)
+    return match.start() if match else None
+
+
+def _parse_header(header: bytes) -> _ParsedHeader:
+    """
+    Separa las secciones de encabezado (todo lo anterior a ~A) y valida que
+    el archivo pueda leerse con el lector rápido.
+
+    Raises:
+        UnsupportedLASError: si el archivo requiere el lector completo de lasio
+    """
+    sections: Dict[str, List[bytes]] = {}
+    other_lines: List[bytes] = []
+    current = None
+
+    for line in header.split(b'\n'):
+        line = line.rstrip(b'\r')
+        stripped = line.lstrip()
+        if stripped.startswith(b'~'):
+            current = stripped[1:2].upper().decode('ascii', errors='replace')
+            sections.setdefault(current, [])
+        elif current == 'O':
+            other_lines.append(line)
+        elif current is not None:
+            sections[current].append(line)
+
+    parsed = {key: HeaderSection(lines) for key, lines in sections.items()}
+
+    version_section = parsed.get("V")
+    if version_section is None:
+        raise UnsupportedLASError("No se encontró la sección ~V")
+    version = version_section.VERS.value if "VERS" in version_section else None
+    if version not in SUPPORTED_VERSIONS:
+        raise UnsupportedLASError(f"Versión LAS {version} no soportada por el lector rápido")
+    wrap = version_section.WRAP.value if "WRAP" in version_section else "NO"
+    if str(wrap).strip().upper() != "NO":
+        raise UnsupportedLASError("Archivos LAS envueltos (WRAP YES) no soportados por el lector rápido")
+
+    curve_section = parsed.get("C")
+    if curve_section is None or len(curve_section) == 0:
+        raise UnsupportedLASError("No se encontró la sección ~C")
+
+    well_section = parsed.get("W", HeaderSection([]))
+    null_value = well_section.NULL.value if "NULL" in well_section else DEFAULT_NULL_VALUE
+    if not isinstance(null_value, (int, float)):
+        null_value = None
+
+    other = decode_bytes(b'\n'.join(other_lines)) if other_lines else ""
+    return _ParsedHeader(parsed, curve_section.items, null_value, other)
+
+
+def read_las_bytes(contents: bytes, dtype=np.float64) -> LASData:
+    """
+    Lee un archivo LAS 1.2/2.0 sin envolver (WRAP NO) desde bytes.
+
+    Args:
+        contents: Contenido completo del archivo (ya descomprimido)
+        dtype: Tipo de la matriz de datos (np.float64 o np.float32)
+
+    Returns:
+        LASData con encabezados perezosos y la matriz de datos
+
+    Raises:
+        UnsupportedLASError: si el archivo requiere el lector completo de lasio
+    """
+    data_section = _find_data_section(contents)
+    if data_section is None:
+        raise UnsupportedLASError("No se encontró la sección ~A")
+
+    header = _parse_header(contents[:data_section])
+    line_end = contents.find(b'\n', data_section)
+    block = contents[line_end + 1:] if line_end != -1 else b''
+    data = parse_data_block(block, header.num_curves, header.null_value, dtype)
+    return header.build(data)
+
+
+class LASStreamParser:
+    """
+    Parser incremental: recibe el archivo por bloques (feed) y construye la
+    matriz de datos sin mantener el texto completo en memoria.
+
+    El encabezado se acumula hasta encontrar ~A; a partir de ahí cada bloque
+    se convierte a números hasta su último salto de línea y el resto queda
+    pendiente para el bloque siguiente.
+    """
+
+    MAX_HEADER_SIZE = 4 * 1024 * 1024
+
+    def __init__(self, dtype=np.float64):
+        self.dtype = np.dtype(dtype)
+        self._buffer = b''
+        self._header: Optional[_ParsedHeader] = None
+        self._values = np.empty(0, dtype=self.dtype)
+        self._count = 0
+
+    @property
+    def header_parsed(self) -> bool:
+        return self._header is not None
+
+    def feed(self, chunk: bytes) -> None:
+        """
+        Procesa un bloque de bytes ya descomprimidos.
+
+        Raises:
+            UnsupportedLASError: si el archivo requiere el lector completo de lasio
+        """
+        if not chunk:
+            return
+        if self._header is None:
+            self._buffer += chunk
+            self._try_parse_header()
+            return
+
+        block = self._buffer + chunk
+        cut = block.rfind(b'\n')
+        if cut == -1:
+            self._buffer = block
+            return
+        self._append(block[:cut])
+        self._buffer = block[cut + 1:]
+
+    def close(self) -> LASData:
+        """
+        Termina el parseo y devuelve el LAS leído.
+
+        Raises:
+            UnsupportedLASError: si el archivo requiere el lector completo de lasio
+        """
+        if self._header is None:
+            raise UnsupportedLASError("No se encontró la sección ~A")
+        if self._buffer.strip():
+            self._append(self._buffer)
+        self._buffer = b''
+
+        num_curves = self._header.num_curves
+        if self._count % num_curves != 0:
+            raise UnsupportedLASError(
+                f"Sección ~A irregular: {self._count} valores para {num_curves} curvas"
+            )
+        values = self._values[:self._count]
+        self._values = np.empty(0, dtype=self.dtype)
+        if values.base is not None and values.size < values.base.size:
+            values = values.copy()  # liberar la capacidad sobrante
+
+        data = values.reshape(-1, num_curves)
+        if self._header.null_value is not None:
+            data[data == np.asarray(self._header.null_value, dtype=self.dtype)] = np.nan
+        return self._header.build(data)
+
+    def _try_parse_header(self) -> None:
+        data_section = _find_data_section(self._buffer)
+        if data_section is None:
+            if len(self._buffer) > self.MAX_HEADER_SIZE:
+                raise UnsupportedLASError("Encabezado LAS demasiado grande o sin sección ~A")
+            return
+        line_end = self._buffer.find(b'\n', data_section)
+        if line_end == -1:
+            return  # la línea ~A todavía no está completa
+
+        self._header = _parse_header(self._buffer[:data_section])
+        rest = self._buffer[line_end + 1:]
+        self._buffer = b''
+
+        rows = self._header.estimated_rows()
+        if rows:
+            # Un encabezado con STEP diminuto no puede reservar más de lo que cabe en
+            # un LAS de MAX_DECOMPRESSED_SIZE; si hay más filas, _append hace crecer la matriz
+            size = min(rows * self._header.num_curves, MAX_DECOMPRESSED_SIZE // self.dtype.itemsize)
+            self._values = np.empty(size, dtype=self.dtype)
+        self.feed(rest)
+
+    def _append(self, block: bytes) -> None:
+        with warnings.catch_warnings():
+            warnings.simplefilter('error')
+            try:
+                values = np.fromstring(block, dtype=self.dtype, sep=' ')
+            except (ValueError, DeprecationWarning) as e:
+                raise UnsupportedLASError(f"Sección ~A no numérica: {e}")
+
+        needed = self._count + values.size
+        if needed > self._values.size:
+            grown = np.empty(max(needed, 2 * self._values.size), dtype=self.dtype)
+            grown[:self._count] = self._values[:self._count]
+            self._values = grown
+        self._values[self._count:needed] = values
+        self._count = needed
+
+
+def read_las_with_lasio(contents: bytes):
+    """Decodifica el contenido y lo lee con lasio (archivos envueltos o no estándar)."""
+    decoded_content = decode_bytes(contents)
+    return lasio.read(io.StringIO(decoded_content))
+
+
+def load_las(contents: bytes, dtype=np.float64):
+    """
+    Lee un archivo LAS con el lector rápido y, si no lo soporta, con lasio.
+
+    Args:
+        contents: Contenido completo del archivo (ya descomprimido)
+        dtype: Tipo de la matriz de datos del lector rápido
+
+    Returns:
+        LASData o lasio.LASFile
+    """
+    try:
+        return read_las_bytes(contents, dtype=dtype)
+    except UnsupportedLASError as e:
+        print(f"[LAS_READER] Usando lasio como respaldo: {e}")
+
+    return read_las_with_lasio(contents)
@@ -0,0 +1,207 @@
+"""
+Pirámide de niveles de detalle (LOD) por dataset.
+
+Al ingestar un dataset se precalculan niveles potencia de dos: el nivel k
+agrupa bloques de 2**k filas y guarda el mínimo, máximo y promedio de cada
+curva (ignorando NaN). Una consulta de ventana busca el rango de profundidad
+en el índice y sirve el nivel más fino que cabe en los píxeles pedidos,
+leyendo solo ese tramo de los arrays con memoria mapeada.
+
+    exports/datasets/<dataset_id>/lod/<variant>/
+        lod.json             # curvas y número de niveles
+        level_00.npy         # nivel 0: matriz (filas × curvas)
+        level_01.npy ...     # nivel k: (3, bloques, curvas) con min, max, mean
+"""
+
+import json
+import math
+import os
+import warnings
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from .dataset_store import Dataset, _save_array, variant_name
+from .df_manage import compute_diameter_tracks, resolve_curve_columns
+
+LOD_DIR = "lod"
+LOD_HEADER = "lod.json"
+LOD_MIN_ROWS = 256  # Se deja de agrupar cuando el nivel tiene menos filas que esto
+DIAMETER_CURVES = ["MIN_DIAMETER", "MAX_DIAMETER", "AVG_DIAMETER"]
+STATS = ("min", "max", "mean")
+
+
+def _lod_path(dataset: Dataset, use_centralized: bool) -> str:
+    return os.path.join(dataset.path, LOD_DIR, variant_name(use_centralized))
+
+
+def base_curves(dataset: Dataset, use_centralized: bool = True):
+    """
+    Matriz de nivel 0: profundidad, diámetros (mínimo por dedos opuestos,
+    máximo y promedio), radios R y curvas GR / temperatura.
+
+    Returns:
+        Tupla (nombres, matriz filas × curvas)
+    """
+    r_matrix = np.asarray(dataset.r_matrix(use_centralized), dtype=np.float64)
+    tracks = compute_diameter_tracks(r_matrix)
+    no_values = tracks["valid_count"] == 0
+    diameters = np.column_stack([tracks["min_opposite"], tracks["max"], tracks["avg"]])
+    diameters[no_values] = np.nan  # Sin placeholders en 0: sesgarían los mínimos
+
+    columns = resolve_curve_columns(tuple(dataset.curves))
+    extra = columns["gr_curves"] + columns["temp_curves"]
+    extra_idx = [dataset.curves.index(name) for name in extra]
+
+    names = ["DEPT"] + DIAMETER_CURVES + dataset.r_columns + extra
+    matrix = np.column_stack([np.asarray(dataset.depth, dtype=np.float64), diameters, r_matrix,
+                              np.asarray(dataset.raw[:, extra_idx], dtype=np.float64)])
+    return names, matrix
+
+
+def _halve(mins: np.ndarray, maxs: np.ndarray, sums: np.ndarray, counts: np.ndarray):
+    """Combina pares de bloques consecutivos (un bloque impar final se combina con vacío)."""
+    def pad(a: np.ndarray, value: float) -> np.ndarray:
+        return np.vstack([a, np.full((1, a.shape[1]), value)])
+
+    if len(mins) % 2:
+        mins, maxs = pad(mins, np.nan), pad(maxs, np.nan)
+        sums, counts = pad(sums, 0.0), pad(counts, 0.0)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        return (np.fmin(mins[0::2], mins[1::2]), np.fmax(maxs[0::2], maxs[1::2]),
+                sums[0::2] + sums[1::2], counts[0::2] + counts[1::2])
+
+
+def build_pyramid(dataset: Dataset, use_centralized: bool = True) -> Dict[str, Any]:
+    """
+    Construye y guarda la pirámide LOD de un dataset.
+
+    Args:
+        dataset: Dataset del almacén
+        use_centralized: Radios centralizados (True) u originales (False)
+
+    Returns:
+        Encabezado de la pirámide (curvas, filas y niveles)
+    """
+    names, matrix = base_curves(dataset, use_centralized)
+    path = _lod_path(dataset, use_centralized)
+    os.makedirs(path, exist_ok=True)
+    _save_array(os.path.join(path, "level_00.npy"), matrix)
+
+    finite = np.isfinite(matrix)
+    mins, maxs = matrix, matrix
+    sums = np.where(finite, matrix, 0.0)
+    counts = finite.astype(np.float64)
+
+    level_rows = [len(matrix)]
+    while level_rows[-1] > LOD_MIN_ROWS:
+        mins, maxs, sums, counts = _halve(mins, maxs, sums, counts)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            means = np.where(counts > 0, sums / counts, np.nan)
+        level = len(level_rows)
+        _save_array(os.path.join(path, f"level_{level:02d}.npy"), np.stack([mins, maxs, means]))
+        level_rows.append(len(mins))
+
+    header = {"curves": names, "rows": len(matrix), "levels": len(level_rows), "level_rows": level_rows}
+    tmp_header = os.path.join(path, f"{LOD_HEADER}.tmp")
+    with open(tmp_header, "w", encoding="utf-8") as f:
+        json.dump(header, f)
+    os.replace(tmp_header, os.path.join(path, LOD_HEADER))
+
+    print(f"[LOD] Pirámide {variant_name(use_centralized)} de {dataset.dataset_id}: {len(level_rows)} niveles, {len(names)} curvas")
+    return header
+
+
+def build_pyramids(dataset: Dataset) -> None:
+    """Construye las pirámides centralizada y original de un dataset recién ingestado."""
+    build_pyramid(dataset, use_centralized=True)
+    build_pyramid(dataset, use_centralized=False)
+
+
+def load_pyramid_header(dataset: Dataset, use_centralized: bool = True) -> Dict[str, Any]:
+    """Encabezado de la pirámide; se construye si el dataset no la tiene todavía."""
+    header_path = os.path.join(_lod_path(dataset, use_centralized), LOD_HEADER)
+    if not os.path.exists(header_path):
+        return build_pyramid(dataset, use_centralized)
+    with open(header_path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def depth_range_indices(depth: np.ndarray, top: float, bottom: float):
+    """
+    Busca por bisección el rango de filas [i0, i1) con profundidad entre top y bottom.
+    Acepta profundidad creciente o decreciente.
+    """
+    top, bottom = min(top, bottom), max(top, bottom)
+    if len(depth) > 1 and depth[0] > depth[-1]:
+        n = len(depth)
+        reversed_depth = depth[::-1]
+        j0 = int(np.searchsorted(reversed_depth, top, side="left"))
+        j1 = int(np.searchsorted(reversed_depth, bottom, side="right"))
+        return n - j1, n - j0
+    return int(np.searchsorted(depth, top, side="left")), int(np.searchsorted(depth, bottom, side="right"))
+
+
+def choose_level(rows: int, px: int, levels: int) -> int:
+    """Nivel más fino cuyo número de bloques en el rango no supera px."""
+    if rows <= px:
+        return 0
+    return min(int(math.ceil(math.log2(rows / px))), levels - 1)
+
+
+def query_window(dataset: Dataset, top: float, bottom: float, px: int,
+                 use_centralized: bool = True, curves: Optional[List[str]] = None) -> Dict[str, Any]:
+    """
+    Devuelve las curvas de un rango de profundidad al nivel de detalle adecuado.
+
+    Args:
+        dataset: Dataset del almacén
+        top, bottom: Rango de profundidad
+        px: Altura del gráfico en píxeles (máximo de bloques devueltos)
+        use_centralized: Radios centralizados (True) u originales (False)
+        curves: Curvas a devolver (por defecto todas)
+
+    Returns:
+        Dict con level, block_size, depth (promedio por bloque) y min/max/mean por curva
+
+    Raises:
+        ValueError: si se pide una curva que no existe
+    """
+    header = load_pyramid_header(dataset, use_centralized)
+    names = header["curves"]
+    wanted = [name for name in names if name != "DEPT"] if not curves else curves
+    unknown = [name for name in wanted if name not in names]
+    if unknown:
+        raise ValueError(f"Curvas no encontradas: {', '.join(unknown)}")
+
+    path = _lod_path(dataset, use_centralized)
+    i0, i1 = depth_range_indices(dataset.depth, top, bottom)
+    level = choose_level(i1 - i0, px, header["levels"])
+    b0 = i0 >> level
+    b1 = (i1 + (1 << level) - 1) >> level
+
+    columns = [names.index(name) for name in ["DEPT"] + wanted]
+    data = np.load(os.path.join(path, f"level_{level:02d}.npy"), mmap_mode="r")
+    if level == 0:
+        block = np.asarray(data[b0:b1][:, columns])
+        stats = {stat: block for stat in STATS}
+    else:
+        block = np.asarray(data[:, b0:b1][:, :, columns])
+        stats = dict(zip(STATS, block))
+
+    return {
+        "dataset_id": dataset.dataset_id,
+        "centralized": use_centralized,
+        "top": min(top, bottom),
+        "bottom": max(top, bottom),
+        "px": px,
+        "level": level,
+        "block_size": 1 << level,
+        "points": b1 - b0,
+        "depth": stats["mean"][:, 0],
+        "curves": {
+            name: {stat: stats[stat][:, i + 1] for stat in STATS}
+            for i, name in enumerate(wanted)
+        },
+    }
@@ -0,0 +1,179 @@
+"""
+Catálogo de tubulares (casing y tubing API 5CT).
+
+La tabla completa (TYPE, OD, WEIGHT, GRADE, WALL, ID) vive en
+pipe_catalog.csv y se carga una sola vez al importar el módulo; con
+PIPE_CATALOG_FILE se puede usar otra tabla con las mismas columnas. GRADE
+lista los grados habituales de cada tubo separados por "/".
+
+Las filas se ordenan por ID nominal (a igual ID se conserva el orden del
+archivo), de modo que el tubo de todas las juntas se busca con un único
+searchsorted sobre los diámetros promedio. Con restrict(od) la búsqueda se
+limita a los diámetros externos indicados, por ejemplo cuando se sabe que la
+sarta es de 7". Como los ID nominales de distintos OD se intercalan (un 7"
+de 6.004" queda junto a un 6 5/8" de 6.049"), primero se elige el OD de cada
+junta por tramos (joint_od) y después cada junta se busca solo entre los
+tubos de su OD; así una sarta combinada (7" sobre 5 1/2") o un liner
+conservan un OD por tramo.
+"""
+
+import hashlib
+import os
+from typing import Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+try:
+    from ..config import PIPE_CATALOG_FILE
+except ImportError:  # ejecutado como script
+    PIPE_CATALOG_FILE = None
+
+CATALOG_FILE = os.path.join(os.path.dirname(__file__), "pipe_catalog.csv")
+COLUMNS = ["TYPE", "OD", "WEIGHT", "GRADE", "WALL", "ID"]
+OD_TOLERANCE = 0.001  # in: tolerancia al comparar diámetros externos nominales
+
+
+class PipeCatalog:
+    """Tabla de tubulares ordenada por ID nominal."""
+
+    def __init__(self, table: pd.DataFrame):
+        order = np.argsort(table["ID"].to_numpy(dtype=np.float64), kind="stable")
+        self.table = table.iloc[order].reset_index(drop=True)
+        self.ids = self.table["ID"].to_numpy(dtype=np.float64)
+        self.digest = hashlib.sha256(self.table.to_csv(index=False).encode("utf-8")).hexdigest()[:16]
+
+    def __len__(self) -> int:
+        return len(self.table)
+
+    def restrict(self, od: Optional[Iterable[float]] = None) -> "PipeCatalog":
+        """
+        Catálogo limitado a los diámetros externos nominales indicados (sin od, el completo).
+
+        Raises:
+            ValueError: si ningún tubo tiene esos diámetros externos
+        """
+        if not od:
+            return self
+        od = np.asarray(list(od), dtype=np.float64)
+        catalog_od = self.table["OD"].to_numpy(dtype=np.float64)
+        keep = (np.abs(catalog_od[:, None] - od[None, :]) <= OD_TOLERANCE).any(axis=1)
+        if not keep.any():
+            raise ValueError(f"No hay tubos con OD {', '.join(f'{value:g}' for value in od)} en el catálogo")
+        return PipeCatalog(self.table[keep])
+
+    def match(self, mean: np.ndarray, tally_difference: float):
+        """
+        Tubo nominal de cada diámetro promedio: normalmente el de ID nominal justo
+        por debajo del promedio, pero si el ID nominal siguiente hacia arriba está
+        a menos de mean * tally_difference, ese. Como antes, hace falta un tubo por
+        debajo y otro por encima del promedio (o el del lado que falta a menos de
+        mean * tally_difference): una junta más ancha que todos los ID del
+        catálogo no se asigna al de ID más grande.
+
+        Args:
+            mean: Diámetro promedio de cada junta
+            tally_difference: Diferencia relativa máxima para asignar el ID de arriba
+
+        Returns:
+            Tupla (rows, found): fila del catálogo de cada junta y si se encontró tubo
+        """
+        mean = np.asarray(mean, dtype=np.float64)
+        n = len(self.ids)
+        down = np.searchsorted(self.ids, mean, side="right") - 1
+        up = np.searchsorted(self.ids, mean, side="left")
+        has_down = down >= 0
+        has_up = up < n
+
+        down = np.searchsorted(self.ids, self.ids[np.clip(down, 0, n - 1)], side="left")  # a igual ID, el primero
+        up = np.minimum(up, n - 1)
+        with np.errstate(invalid="ignore"):
+            near_up = has_up & (np.abs(mean - self.ids[up]) < mean * tally_difference)
+            near_down = has_down & (np.abs(mean - self.ids[down]) < mean * tally_difference)
+        found = (has_down & (has_up | near_down)) | near_up
+        return np.where(near_up, up, down), found & ~np.isnan(mean)
+
+    def joint_od(self, mean: np.ndarray, tally_difference: float):
+        """
+        OD nominal de cada junta, elegido por tramos de juntas consecutivas.
+
+        Los candidatos de una junta son los OD con un ID nominal a menos de
+        mean * tally_difference de su promedio; una junta sin candidatos puede
+        tomar cualquier OD. Cada junta reparte un voto entre sus candidatos (sin
+        candidatos, vota por el OD de match() sobre todo el catálogo). Entre las
+        asignaciones posibles se elige la de menos cambios de OD a lo largo de la
+        sarta y, entre ellas, la de más votos: una junta ambigua (6.03" encaja en
+        7" 6.004" y en 6 5/8" 6.049") toma el OD de su tramo, y cada tramo de una
+        sarta combinada conserva su OD. Con empate gana el OD menor.
+
+        Args:
+            mean: Diámetro promedio de cada junta, en orden de profundidad (NaN: sin OD)
+            tally_difference: Diferencia relativa máxima entre el promedio y el ID nominal
+
+        Returns:
+            Tupla (od, fits): OD de cada junta (NaN sin promedio) y si tiene un ID
+            nominal de ese OD a menos de mean * tally_difference
+        """
+        mean = np.asarray(mean, dtype=np.float64)
+        od = np.full(len(mean), np.nan)
+        fits = np.zeros(len(mean), dtype=bool)
+        valid = np.flatnonzero(~np.isnan(mean))
+        if not len(valid):
+            return od, fits
+
+        m = mean[valid]
+        catalog_od = self.table["OD"].to_numpy(dtype=np.float64)
+        values, column = np.unique(catalog_od, return_inverse=True)
+        close = np.abs(m[:, None] - self.ids[None, :]) < (m * tally_difference)[:, None]
+        candidates = np.zeros((len(m), len(values)))
+        np.maximum.at(candidates.T, column, close.T)  # junta × OD: algún ID nominal cerca
+        weight = candidates.sum(axis=1)
+        votes = np.divide(candidates, weight[:, None], out=np.zeros_like(candidates), where=weight[:, None] > 0)
+        allowed = (candidates > 0) | (weight == 0)[:, None]
+        rows, found = self.match(m, tally_difference)
+        loose = np.flatnonzero((weight == 0) & found)
+        votes[loose, column[rows[loose]]] = 1
+
+        # Programación dinámica sobre las juntas: cambiar de OD cuesta más que todos los votos juntos
+        switch = len(m) + 1.0
+        states = np.arange(len(values))
+        score = np.where(allowed[0], votes[0], -np.inf)
+        back = np.zeros((len(m), len(values)), dtype=np.intp)
+        for i in range(1, len(m)):
+            best = np.argmax(score)
+            move = score[best] - switch
+            back[i] = np.where(score >= move, states, best)
+            score = np.where(allowed[i], np.maximum(score, move) + votes[i], -np.inf)
+        path = np.empty(len(m), dtype=np.intp)
+        path[-1] = np.argmax(score)
+        for i in range(len(m) - 1, 0, -1):
+            path[i - 1] = back[i, path[i]]
+
+        od[valid] = values[path]
+        fits[valid] = candidates[np.arange(len(m)), path] > 0
+        return od, fits
+
+    def sizes(self, rows: np.ndarray) -> np.ndarray:
+        """Matriz (filas × [OD, ID, WEIGHT]) de las filas indicadas."""
+        return self.table[["OD", "ID", "WEIGHT"]].to_numpy(dtype=np.float64)[rows]
+
+
+def load_pipe_catalog(path: Optional[str] = None) -> PipeCatalog:
+    """
+    Lee el catálogo de tubulares.
+
+    Raises:
+        ValueError: si faltan columnas o el catálogo está vacío
+    """
+    path = path or PIPE_CATALOG_FILE or CATALOG_FILE
+    table = pd.read_csv(path)
+    missing = [column for column in COLUMNS if column not in table.columns]
+    if missing or table.empty:
+        raise ValueError(f"Catálogo de tubulares inválido en {path}: faltan {', '.join(missing) or 'filas'}")
+    table = table[COLUMNS].astype({"OD": np.float64, "WEIGHT": np.float64, "WALL": np.float64, "ID": np.float64})
+    catalog = PipeCatalog(table)
+    print(f"[CATALOG] {len(catalog)} tubulares, OD {table['OD'].min():g}-{table['OD'].max():g} in ({os.path.basename(path)})")
+    return catalog
+
+
+pipe_catalog = load_pipe_catalog()
@@ -0,0 +1,251 @@
+"""
+Grafo de etapas del procesamiento de juntas con caché por contenido.
+
+Cada etapa declara de qué etapas depende y qué parámetros de detección usa.
+La clave de su salida es el hash de su nombre, su versión, esos parámetros y
+las claves de sus entradas; la fuente (el DataFrame del dataset) se identifica
+por el hash de contenido del dataset y la variante.
+
+    etapa       entradas                      parámetros
+    matrix      frame                         -
+    gradient    matrix                        finger_jump, finger_jump_slim
+    collars     gradient                      threshold, slim_threshold, slim_threshold_1,
+                                              collar_lenght_steps
+    statistics  matrix, gradient, collars     tally_difference, pipe_od, pipe_catalog
+
+Cambiar threshold cambia la clave de collars y, a través de ella, la de
+statistics, pero no la de gradient.
+
+Las salidas se guardan en el directorio de trabajo del dataset, una por
+clave, y solo se calculan las etapas cuya clave no está guardada (y las
+entradas que esas etapas necesitan):
+
+    workspace/<variante>/stages/
+        gradient/<key>.pkl
+        collars/<key>.pkl
+        statistics/<key>.pkl
+
+matrix no se guarda: es una vista de los arrays del almacén de datasets, que
+ya están en disco. La ingesta y la centralización tampoco forman parte del
+grafo porque ocurren una sola vez al subir el archivo (dataset_store.py).
+Se guardan como máximo PIPELINE_STAGE_ENTRIES salidas por etapa; se borran
+primero las usadas hace más tiempo.
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+try:
+    from ..config import PIPELINE_STAGE_ENTRIES
+    from . import joints
+    from . import statistics as pipe_statistics
+except ImportError:  # ejecutado como script
+    PIPELINE_STAGE_ENTRIES = 8
+    import joints
+    import statistics as pipe_statistics
+
+SOURCE = "frame"
+STAGES_DIR = "stages"
+
+
+class Stage:
+    """Etapa del grafo: func(*entradas, **parámetros)."""
+
+    def __init__(self, name: str, func: Callable, inputs: Iterable[str] = (),
+                 params: Iterable[str] = (), persist: bool = True, version: int = 1,
+                 progress: Optional[float] = None):
+        self.name = name
+        self.func = func
+        self.inputs = tuple(inputs)
+        self.params = tuple(params)
+        self.persist = persist
+        self.version = version  # Se incrementa cuando cambia el formato o el cálculo de la salida
+        self.progress = progress  # Porcentaje que se reporta al llegar a la etapa
+
+
+class StageStore:
+    """Salidas de etapas en disco: <directorio>/<etapa>/<clave>.pkl."""
+
+    def __init__(self, path: str, max_entries: int = PIPELINE_STAGE_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+
+    def _file(self, stage: str, key: str) -> str:
+        return os.path.join(self.path, stage, f"{key}.pkl")
+
+    def get(self, stage: str, key: str) -> Tuple[bool, Any]:
+        """Tupla (encontrado, salida)."""
+        path = self._file(stage, key)
+        try:
+            with open(path, "rb") as f:
+                value = pickle.load(f)
+        except FileNotFoundError:
+            return False, None
+        except Exception as e:
+            print(f"[PIPELINE] Corrupt {stage} output {key}, discarding: {e}")
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return False, None
+        os.utime(path)  # Marca de uso para el desalojo
+        return True, value
+
+    def put(self, stage: str, key: str, value: Any) -> None:
+        stage_dir = os.path.join(self.path, stage)
+        tmp_path = None
+        try:
+            os.makedirs(stage_dir, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(prefix=".stage-", suffix=".tmp", dir=stage_dir)
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self._file(stage, key))
+        except OSError as e:
+            print(f"[PIPELINE] Could not write {stage} output {key}: {e}")
+            if tmp_path is not None and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+        self._evict(stage_dir)
+
+    def _evict(self, stage_dir: str) -> None:
+        """Deja las max_entries salidas usadas más recientemente."""
+        entries = sorted(
+            ((entry.stat().st_mtime, entry.path) for entry in os.scandir(stage_dir)
+             if entry.name.endswith(".pkl")),
+            reverse=True,
+        )
+        for _, path in entries[self.max_entries:]:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+
+class Pipeline:
+    """
+    Grafo de etapas. Las etapas se declaran en orden: cada una solo puede
+    depender de la fuente y de etapas anteriores.
+
+    Raises:
+        ValueError: si una etapa depende de una etapa desconocida o posterior
+    """
+
+    def __init__(self, stages: List[Stage]):
+        self.stages: Dict[str, Stage] = {}
+        for stage in stages:
+            unknown = [name for name in stage.inputs if name != SOURCE and name not in self.stages]
+            if unknown or stage.name in self.stages or stage.name == SOURCE:
+                raise ValueError(f"Etapa inválida {stage.name}: entradas desconocidas {unknown}")
+            self.stages[stage.name] = stage
+
+    def keys(self, source_key: str, params: Dict[str, Any]) -> Dict[str, str]:
+        """Clave de cada etapa a partir de la clave de la fuente y los parámetros."""
+        keys = {SOURCE: source_key}
+        for stage in self.stages.values():
+            payload = json.dumps(
+                {"stage": stage.name, "version": stage.version,
+                 "params": {name: params[name] for name in stage.params},
+                 "inputs": [keys[name] for name in stage.inputs]},
+                sort_keys=True, default=str,
+            )
+            keys[stage.name] = hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+        return keys
+
+    def start(self, source: Callable[[], Any], source_key: Optional[str], params: Dict[str, Any],
+              store: Optional[StageStore] = None, progress: Optional[Callable[[str, float], None]] = None) -> "PipelineRun":
+        """
+        Prepara una ejecución; las etapas se evalúan al pedirlas con get().
+
+        Args:
+            source: Función que devuelve la fuente (solo se llama si alguna etapa la necesita)
+            source_key: Identificador del contenido de la fuente (None: sin caché en disco)
+            params: Parámetros de las etapas (detection_params más los que falten)
+            store: Almacén de salidas (None: todo se calcula en memoria)
+            progress: Callback opcional progress(etapa, porcentaje)
+        """
+        if source_key is None:
+            store = None
+        return PipelineRun(self, source, self.keys(source_key or "", params), params, store, progress)
+
+
+class PipelineRun:
+    """Una ejecución del grafo: memoriza las salidas ya obtenidas y su origen."""
+
+    def __init__(self, pipeline: Pipeline, source: Callable[[], Any], keys: Dict[str, str],
+                 params: Dict[str, Any], store: Optional[StageStore], progress):
+        self.pipeline = pipeline
+        self.source = source
+        self.keys = keys
+        self.params = params
+        self.store = store
+        self.progress = progress
+        self.outputs: Dict[str, Any] = {}
+        self.status: Dict[str, str] = {}  # etapa -> "cached" | "computed"
+
+    def get(self, name: str) -> Any:
+        """Salida de una etapa: de memoria, del almacén o calculada (con sus entradas)."""
+        if name in self.outputs:
+            return self.outputs[name]
+        if name == SOURCE:
+            self.outputs[SOURCE] = self.source()
+            return self.outputs[SOURCE]
+
+        stage = self.pipeline.stages[name]
+        key = self.keys[name]
+        found, value = (False, None)
+        if self.store is not None and stage.persist:
+            found, value = self.store.get(name, key)
+        if not found:
+            args = [self.get(input_name) for input_name in stage.inputs]
+        if self.progress and stage.progress is not None:
+            self.progress(name, stage.progress)
+        if not found:
+            value = stage.func(*args, **{param: self.params[param] for param in stage.params})
+            if self.store is not None and stage.persist:
+                self.store.put(name, key, value)
+        if stage.persist:
+            self.status[name] = "cached" if found else "computed"
+        self.outputs[name] = value
+        return value
+
+    def summary(self) -> str:
+        return ", ".join(f"{name} {status}" for name, status in self.status.items())
+
+
+# Etapas del procesamiento de juntas
+
+def _gradient(matrix, finger_jump, finger_jump_slim):
+    data, dept = matrix
+    return joints.grad_and_boottable(data, dept, finger_jump, finger_jump_slim)
+
+
+def _collars(gradient, threshold, slim_threshold, slim_threshold_1, collar_lenght_steps):
+    avg_fingers_changed, avg_fingers_changed_slim, dept = gradient
+    return joints.locate_collars(avg_fingers_changed, avg_fingers_changed_slim, dept, threshold,
+                                 slim_threshold, slim_threshold_1, collar_lenght_steps)
+
+
+def _statistics(matrix, gradient, collars, tally_difference, pipe_od, pipe_catalog):
+    # pipe_catalog (digest del catálogo) solo forma parte de la clave
+    stats = pipe_statistics.compute_statistics(matrix[0], gradient[2], collars["collars"],
+                                               tally_difference=tally_difference, pipe_od=pipe_od)
+    return {"statistics_table": stats["statistics_table"], "od_id_intervals": stats["od_id_intervals"]}
+
+
+caliper_pipeline = Pipeline([
+    Stage("matrix", joints.to_numpy, inputs=[SOURCE], persist=False),
+    Stage("gradient", _gradient, inputs=["matrix"], params=["finger_jump", "finger_jump_slim"]),
+    Stage("collars", _collars, inputs=["gradient"], progress=55,
+          params=["threshold", "slim_threshold", "slim_threshold_1", "collar_lenght_steps"]),
+    Stage("statistics", _statistics, inputs=["matrix", "gradient", "collars"], progress=70, version=3,
+          params=["tally_difference", "pipe_od", "pipe_catalog"]),
+])
+
+
+def stage_store(export_dir: str) -> StageStore:
+    """Almacén de salidas en el directorio de trabajo de una variante."""
+    return StageStore(os.path.join(export_dir, STAGES_DIR))
@@ -0,0 +1,181 @@
+"""
+Acceso a Cloudflare R2 (API compatible con S3).
+
+El cliente de boto3 se construye una sola vez por proceso y se comparte entre
+peticiones (los clientes de boto3 son seguros entre hilos), con un pool de
+conexiones HTTP de R2_MAX_POOL_CONNECTIONS para no repetir el handshake TLS
+en cada /get-presigned-url o /upload-from-r2.
+
+download_object se ejecuta fuera del event loop (en el threadpool) y descarga
+el objeto a un archivo temporal preasignado: los objetos mayores que
+R2_DOWNLOAD_PART_SIZE se piden en rangos HTTP (Range: bytes=a-b) que
+R2_DOWNLOAD_CONCURRENCY hilos escriben en paralelo en su posición. Cada rango
+se pide con If-Match sobre el ETag de la cabecera, de modo que un objeto
+reemplazado a mitad de la descarga falla en lugar de mezclar versiones.
+
+Con R2_ENDPOINT_URL se puede apuntar a un servidor S3 local (MinIO...) para
+medir la descarga sin salir de la máquina.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Tuple
+
+import boto3
+from botocore.client import Config
+
+from .ingest import FileTooLargeError
+from ..config import (
+    R2_ACCESS_KEY_ID, R2_SECRET_ACCESS_KEY, R2_REGION, R2_ENDPOINT_URL,
+    R2_MAX_POOL_CONNECTIONS, R2_DOWNLOAD_PART_SIZE, R2_DOWNLOAD_CONCURRENCY,
+    INGEST_CHUNK_SIZE, MAX_FILE_SIZE
+)
+
+_client = None
+_client_lock = threading.Lock()
+
+
+class R2NotConfiguredError(RuntimeError):
+    """Faltan credenciales o endpoint de R2."""
+
+
+def r2_configured() -> bool:
+    return all([R2_ACCESS_KEY_ID, R2_SECRET_ACCESS_KEY, R2_ENDPOINT_URL])
+
+
+def get_r2_client():
+    """
+    Cliente S3 compartido por todo el proceso (se crea en la primera llamada).
+
+    Raises:
+        R2NotConfiguredError: si falta la configuración de R2
+    """
+    global _client
+    if _client is None:
+        if not r2_configured():
+            raise R2NotConfiguredError("R2 configuration not complete")
+        with _client_lock:
+            if _client is None:
+                _client = boto3.session.Session().client(
+                    's3',
+                    endpoint_url=R2_ENDPOINT_URL,
+                    aws_access_key_id=R2_ACCESS_KEY_ID,
+                    aws_secret_access_key=R2_SECRET_ACCESS_KEY,
+                    region_name=R2_REGION,
+                    config=Config(signature_version='s3v4', max_pool_connections=R2_MAX_POOL_CONNECTIONS,
+                                  retries={"max_attempts": 3, "mode": "standard"})
+                )
+                print(f"[R2] Client created for {R2_ENDPOINT_URL}")
+    return _client
+
+
+def part_ranges(size: int, part_size: int) -> List[Tuple[int, int]]:
+    """Rangos [inicio, fin] (inclusivos) que cubren size bytes en partes de part_size."""
+    return [(start, min(start + part_size, size) - 1) for start in range(0, size, part_size)]
+
+
+def _copy_body(body, f, chunk_size: int = INGEST_CHUNK_SIZE) -> int:
+    """Copia un StreamingBody a un archivo por bloques."""
+    written = 0
+    try:
+        while True:
+            chunk = body.read(chunk_size)
+            if not chunk:
+                break
+            f.write(chunk)
+            written += len(chunk)
+    finally:
+        body.close()
+    return written
+
+
+class DownloadMetrics:
+    """Descargas de R2: número, bytes, tiempo y descargas por rangos."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.downloads = 0
+        self.ranged = 0
+        self.bytes = 0
+        self.seconds = 0.0
+
+    def record(self, size: int, seconds: float, parts: int) -> None:
+        with self._lock:
+            self.downloads += 1
+            self.ranged += parts > 1
+            self.bytes += size
+            self.seconds += seconds
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "downloads": self.downloads,
+                "ranged_downloads": self.ranged,
+                "bytes": self.bytes,
+                "seconds": round(self.seconds, 3),
+                "mb_per_s": round(self.bytes / self.seconds / 1e6, 2) if self.seconds else None,
+            }
+
+
+download_metrics = DownloadMetrics()
+
+
+def download_object(client, bucket: str, key: str, path: str,
+                    part_size: int = R2_DOWNLOAD_PART_SIZE, concurrency: int = R2_DOWNLOAD_CONCURRENCY,
+                    max_size: int = MAX_FILE_SIZE) -> Dict[str, Any]:
+    """
+    Descarga un objeto a un archivo local, por rangos en paralelo si es grande.
+
+    Es bloqueante: llamarlo desde el threadpool, nunca desde el event loop.
+
+    Args:
+        client: Cliente S3 (get_r2_client)
+        bucket, key: Objeto a descargar
+        path: Archivo de destino (se sobrescribe)
+        part_size: Tamaño de cada rango
+        concurrency: Rangos descargados a la vez
+        max_size: Tamaño máximo permitido
+
+    Returns:
+        Dict con size, parts y seconds
+
+    Raises:
+        FileTooLargeError: si el objeto supera max_size (antes de descargarlo)
+    """
+    started = time.time()
+    head = client.head_object(Bucket=bucket, Key=key)
+    size = head["ContentLength"]
+    if size > max_size:
+        raise FileTooLargeError(f"El archivo supera el tamaño máximo de {max_size // (1024 * 1024)} MB")
+
+    ranges = part_ranges(size, part_size)
+    if len(ranges) <= 1:
+        with open(path, "wb") as f:
+            size = _copy_body(client.get_object(Bucket=bucket, Key=key)["Body"], f)
+    else:
+        # Archivo preasignado: cada rango se escribe en su posición
+        with open(path, "wb") as f:
+            f.truncate(size)
+        etag = head.get("ETag")
+
+        def fetch(byte_range: Tuple[int, int]) -> int:
+            start, end = byte_range
+            params: Dict[str, Any] = {"Bucket": bucket, "Key": key, "Range": f"bytes={start}-{end}"}
+            if etag:
+                params["IfMatch"] = etag
+            with open(path, "r+b") as f:
+                f.seek(start)
+                written = _copy_body(client.get_object(**params)["Body"], f)
+            if written != end - start + 1:
+                raise IOError(f"Rango {start}-{end} de {key} incompleto ({written} bytes)")
+            return written
+
+        with ThreadPoolExecutor(max_workers=min(concurrency, len(ranges)), thread_name_prefix="r2-range") as pool:
+            list(pool.map(fetch, ranges))
+
+    seconds = time.time() - started
+    download_metrics.record(size, seconds, len(ranges))
+    print(f"[R2] Downloaded {key}: {size} bytes in {len(ranges)} part(s), "
+          f"{seconds:.2f}s ({size / max(seconds, 1e-6) / 1e6:.1f} MB/s)")
+    return {"size": size, "parts": len(ranges), "seconds": seconds}
@@ -0,0 +1,250 @@
+"""
+Registro de datasets en SQLite.
+
+Cada dataset ingestado queda registrado con su id, metadatos, curvas, ruta
+y directorio de trabajo aislado, junto con los artefactos que se generan al
+procesarlo (tabla de integridad por variante...). Los endpoints reciben un
+dataset_id y lo resuelven aquí, sin listar directorios; el "dataset más
+reciente" es solo el valor por defecto cuando no se indica ninguno.
+
+También relaciona el hash SHA-256 de los bytes crudos de cada archivo subido
+(antes de descomprimir) con el dataset que produjo y con el resumen que
+devolvió /upload. Si el mismo .las o .las.gz se sube de nuevo, el dataset ya
+parseado y centralizado se reutiliza y el resumen se sirve desde aquí.
+
+    exports/datasets/registry.sqlite3
+"""
+
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from .dataset_store import Dataset, get_datasets_dir, open_dataset, latest_dataset
+
+REGISTRY_FILE = "registry.sqlite3"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS datasets (
+    dataset_id    TEXT PRIMARY KEY,
+    well_name     TEXT,
+    filename      TEXT,
+    path          TEXT NOT NULL,
+    workspace     TEXT NOT NULL,
+    rows          INTEGER,
+    content_hash  TEXT,
+    curves        TEXT NOT NULL,
+    r_columns     TEXT NOT NULL,
+    metadata      TEXT NOT NULL,
+    created_at    TEXT NOT NULL,
+    last_used_at  TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS datasets_last_used ON datasets (last_used_at);
+
+CREATE TABLE IF NOT EXISTS artifacts (
+    dataset_id    TEXT NOT NULL,
+    name          TEXT NOT NULL,
+    path          TEXT NOT NULL,
+    created_at    TEXT NOT NULL,
+    PRIMARY KEY (dataset_id, name)
+);
+
+CREATE TABLE IF NOT EXISTS uploads (
+    upload_sha256 TEXT PRIMARY KEY,
+    dataset_id    TEXT NOT NULL,
+    filename      TEXT,
+    size          INTEGER,
+    summary       TEXT NOT NULL,
+    created_at    TEXT NOT NULL,
+    last_seen_at  TEXT NOT NULL,
+    upload_count  INTEGER NOT NULL DEFAULT 1
+);
+CREATE INDEX IF NOT EXISTS uploads_dataset ON uploads (dataset_id);
+"""
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _dataset_row(row: sqlite3.Row) -> Dict[str, Any]:
+    return {
+        "dataset_id": row["dataset_id"],
+        "well_name": row["well_name"],
+        "filename": row["filename"],
+        "path": row["path"],
+        "workspace": row["workspace"],
+        "rows": row["rows"],
+        "content_hash": row["content_hash"],
+        "curves": json.loads(row["curves"]),
+        "r_columns": json.loads(row["r_columns"]),
+        "metadata": json.loads(row["metadata"]),
+        "created_at": row["created_at"],
+        "last_used_at": row["last_used_at"],
+    }
+
+
+class DatasetRegistry:
+    """Registro de datasets, artefactos y subidas."""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.path.join(get_datasets_dir(), REGISTRY_FILE)
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    # Datasets
+
+    def register_dataset(self, dataset: Dataset, filename: Optional[str] = None) -> None:
+        """Registra (o actualiza) un dataset del almacén."""
+        now = _now()
+        header = dataset.header
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                "INSERT INTO datasets (dataset_id, well_name, filename, path, workspace, rows, content_hash, "
+                "curves, r_columns, metadata, created_at, last_used_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (dataset_id) DO UPDATE SET last_used_at = excluded.last_used_at, "
+                "filename = COALESCE(excluded.filename, datasets.filename)",
+                (dataset.dataset_id, dataset.well_name, filename, dataset.path, dataset.workspace(),
+                 header.get("rows"), header.get("content_hash"), json.dumps(dataset.curves),
+                 json.dumps(dataset.r_columns), json.dumps(header.get("metadata", {})),
+                 header.get("created_at", now), now),
+            )
+            conn.commit()
+
+    def touch(self, dataset_id: str) -> None:
+        """Marca el dataset como el usado más recientemente."""
+        with self._lock:
+            conn = self._connection()
+            conn.execute("UPDATE datasets SET last_used_at = ? WHERE dataset_id = ?", (_now(), dataset_id))
+            conn.commit()
+
+    def get(self, dataset_id: str) -> Optional[Dict[str, Any]]:
+        """Entrada del registro de un dataset con sus artefactos (None si no existe)."""
+        with self._lock:
+            conn = self._connection()
+            row = conn.execute("SELECT * FROM datasets WHERE dataset_id = ?", (dataset_id,)).fetchone()
+        if row is None:
+            return None
+        return {**_dataset_row(row), "artifacts": self.artifacts(dataset_id)}
+
+    def list_datasets(self, limit: int = 50) -> List[Dict[str, Any]]:
+        """Datasets registrados, del usado más recientemente al más antiguo."""
+        with self._lock:
+            conn = self._connection()
+            rows = conn.execute("SELECT * FROM datasets ORDER BY last_used_at DESC LIMIT ?", (limit,)).fetchall()
+        return [_dataset_row(row) for row in rows]
+
+    def resolve(self, dataset_id: Optional[str] = None) -> Optional[Dataset]:
+        """
+        Abre un dataset por id, o el usado más recientemente si no se indica.
+
+        Los datasets del almacén anteriores al registro se registran al abrirlos.
+
+        Returns:
+            Dataset o None si no existe
+        """
+        if dataset_id is None:
+            with self._lock:
+                row = self._connection().execute(
+                    "SELECT dataset_id FROM datasets ORDER BY last_used_at DESC LIMIT 1"
+                ).fetchone()
+            dataset = open_dataset(row["dataset_id"]) if row is not None else latest_dataset()
+        else:
+            dataset = open_dataset(dataset_id)
+
+        if dataset is not None and self.get(dataset.dataset_id) is None:
+            self.register_dataset(dataset)
+        return dataset
+
+    # Artefactos
+
+    def set_artifact(self, dataset_id: str, name: str, path: str) -> None:
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO artifacts (dataset_id, name, path, created_at) VALUES (?, ?, ?, ?)",
+                (dataset_id, name, path, _now()),
+            )
+            conn.commit()
+
+    def artifact_path(self, dataset_id: str, name: str) -> Optional[str]:
+        """Ruta de un artefacto si está registrado y sigue en disco."""
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT path FROM artifacts WHERE dataset_id = ? AND name = ?", (dataset_id, name)
+            ).fetchone()
+        if row is None or not os.path.exists(row["path"]):
+            return None
+        return row["path"]
+
+    def artifacts(self, dataset_id: str) -> Dict[str, str]:
+        with self._lock:
+            rows = self._connection().execute(
+                "SELECT name, path FROM artifacts WHERE dataset_id = ? ORDER BY name", (dataset_id,)
+            ).fetchall()
+        return {row["name"]: row["path"] for row in rows}
+
+    # Subidas
+
+    def find_upload(self, upload_sha256: str) -> Optional[Dict[str, Any]]:
+        """
+        Busca una subida anterior con el mismo hash.
+
+        Si el dataset de esa subida ya no existe en disco, la entrada se borra
+        y se trata como un archivo nuevo.
+
+        Returns:
+            Dict con dataset_id, filename, upload_count y summary, o None
+        """
+        with self._lock:
+            conn = self._connection()
+            row = conn.execute("SELECT * FROM uploads WHERE upload_sha256 = ?", (upload_sha256,)).fetchone()
+            if row is None:
+                return None
+            if open_dataset(row["dataset_id"]) is None:
+                conn.execute("DELETE FROM uploads WHERE upload_sha256 = ?", (upload_sha256,))
+                conn.commit()
+                return None
+            conn.execute(
+                "UPDATE uploads SET last_seen_at = ?, upload_count = upload_count + 1 WHERE upload_sha256 = ?",
+                (_now(), upload_sha256),
+            )
+            conn.commit()
+            return {
+                "dataset_id": row["dataset_id"],
+                "filename": row["filename"],
+                "upload_count": row["upload_count"] + 1,
+                "summary": json.loads(row["summary"]),
+            }
+
+    def register_upload(self, upload_sha256: str, dataset_id: str, summary: Dict[str, Any],
+                        filename: Optional[str] = None, size: Optional[int] = None) -> None:
+        """Guarda el dataset y el resumen producidos por una subida."""
+        now = _now()
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO uploads "
+                "(upload_sha256, dataset_id, filename, size, summary, created_at, last_seen_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (upload_sha256, dataset_id, filename, size, json.dumps(summary, default=str), now, now),
+            )
+            conn.execute("UPDATE datasets SET filename = COALESCE(filename, ?) WHERE dataset_id = ?",
+                         (filename, dataset_id))
+            conn.commit()
+
+
+dataset_registry = DatasetRegistry()
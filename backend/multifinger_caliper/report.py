@@ -0,0 +1,171 @@
+"""
+Reporte Excel de la tabla de integridad.
+
+/process-caliper solo guarda la tabla de integridad en table_statistics.csv;
+el Excel con formato se genera al pedirlo en /download-integrity-table. Se
+escribe en una sola pasada con openpyxl en modo write-only: los formatos
+(encabezado, celdas con borde, clase de penetración con su color) son estilos
+con nombre registrados una vez en el libro, y cada fila se emite ya con su
+estilo, sin volver a abrir ni recorrer el archivo.
+
+El reporte se guarda junto al CSV con el hash del contenido de la tabla, de
+modo que solo se vuelve a generar si cambian las estadísticas del dataset:
+
+    workspace/<variante>/
+        table_statistics.csv
+        reports/<hash>.xlsx
+"""
+
+import hashlib
+import math
+import os
+import tempfile
+from typing import Dict, List, Optional
+
+import pandas as pd
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Border, Font, NamedStyle, PatternFill, Side
+
+REPORT_DIR = "reports"
+SHEET_NAME = "Sheet1"
+HEADER_HEIGHT = 30
+CLASS_COLUMN = "CLASS_PEN"
+
+# Color de fondo de cada clase de penetración (classify_penetration)
+CLASS_FILLS = {
+    "I": "FFFF00",    # yellow
+    "II": "008000",   # green
+    "III": "FFA500",  # orange
+    "IV": "FF4500",   # orangered
+    "V": "8B0000",    # darkred
+}
+
+_thin = Side(style="thin")
+_border = Border(left=_thin, right=_thin, top=_thin, bottom=_thin)
+_center = Alignment(horizontal="center", vertical="center", wrap_text=True)
+
+
+def _solid(color: str) -> PatternFill:
+    return PatternFill(start_color=color, end_color=color, fill_type="solid")
+
+
+def named_styles() -> List[NamedStyle]:
+    """Estilos con nombre del reporte: encabezado, celda, clase vacía y una por clase."""
+    styles = [
+        NamedStyle("integrity_header", font=Font(color="FFFFFF", bold=True), fill=_solid("708090"),
+                   alignment=_center, border=_border),
+        NamedStyle("integrity_cell", border=_border),
+        NamedStyle("integrity_class", alignment=_center),
+    ]
+    styles += [NamedStyle(f"integrity_class_{name}", fill=_solid(color), alignment=_center, border=_border)
+               for name, color in CLASS_FILLS.items()]
+    return styles
+
+
+def statistics_hash(csv_path: str) -> str:
+    """Hash del contenido de table_statistics.csv."""
+    digest = hashlib.sha256()
+    with open(csv_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()[:32]
+
+
+def read_statistics_table(csv_path: str) -> pd.DataFrame:
+    """Lee table_statistics.csv conservando las clases vacías como cadena vacía."""
+    table = pd.read_csv(csv_path)
+    if CLASS_COLUMN in table.columns:
+        table[CLASS_COLUMN] = table[CLASS_COLUMN].fillna("").astype(str)
+    return table
+
+
+def _value(value):
+    """Valor de celda: None para NaN o vacío, tipos de Python para numpy."""
+    if value is None or value == "":
+        return None
+    if hasattr(value, "item"):
+        value = value.item()
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    return value
+
+
+def write_integrity_report(statistics_table: pd.DataFrame, path: str) -> str:
+    """
+    Escribe la tabla de integridad con formato en un libro write-only.
+
+    Args:
+        statistics_table: Tabla de pipe_statistics (o leída de table_statistics.csv)
+        path: Archivo .xlsx de destino
+
+    Returns:
+        Ruta del archivo escrito
+    """
+    wb = Workbook(write_only=True)
+    for style in named_styles():
+        wb.add_named_style(style)
+    ws = wb.create_sheet(SHEET_NAME)
+    ws.row_dimensions[1].height = HEADER_HEIGHT
+
+    def cell(value, style: Optional[str]) -> WriteOnlyCell:
+        c = WriteOnlyCell(ws, value)
+        if style is not None:
+            c.style = style
+        return c
+
+    columns = list(statistics_table.columns)
+    ws.append([cell(str(name), "integrity_header") for name in columns])
+
+    class_index = columns.index(CLASS_COLUMN) if CLASS_COLUMN in columns else -1
+    for row in statistics_table.itertuples(index=False, name=None):
+        cells = []
+        for i, raw in enumerate(row):
+            value = _value(raw)
+            if i == class_index:
+                style = f"integrity_class_{value}" if value in CLASS_FILLS else "integrity_class"
+            else:
+                style = "integrity_cell" if value is not None else None
+            cells.append(cell(value, style))
+        ws.append(cells)
+
+    wb.save(path)
+    return path
+
+
+def integrity_report(csv_path: str, report_dir: Optional[str] = None) -> Dict[str, str]:
+    """
+    Reporte Excel de una tabla de integridad, generado solo si no está en caché.
+
+    Args:
+        csv_path: table_statistics.csv de la variante del dataset
+        report_dir: Directorio de la caché de reportes (por defecto reports/ junto al CSV)
+
+    Returns:
+        Dict con path (archivo .xlsx), hash de la tabla y cached (si ya existía)
+    """
+    report_dir = report_dir or os.path.join(os.path.dirname(csv_path), REPORT_DIR)
+    table_hash = statistics_hash(csv_path)
+    path = os.path.join(report_dir, f"{table_hash}.xlsx")
+    if os.path.exists(path):
+        return {"path": path, "hash": table_hash, "cached": True}
+
+    os.makedirs(report_dir, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=".report-", suffix=".xlsx", dir=report_dir)
+    os.close(fd)
+    try:
+        write_integrity_report(read_statistics_table(csv_path), tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    # Los reportes de tablas anteriores de esta variante ya no se pueden pedir
+    for entry in os.scandir(report_dir):
+        if entry.name.endswith(".xlsx") and not entry.name.startswith(".") and entry.path != path:
+            try:
+                os.remove(entry.path)
+            except FileNotFoundError:
+                pass
+    print(f"[REPORT] Integrity report {table_hash} written ({os.path.basename(csv_path)})")
+    return {"path": path, "hash": table_hash, "cached": False}
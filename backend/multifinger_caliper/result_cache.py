@@ -0,0 +1,217 @@
+"""
+Caché de resultados de /process-caliper direccionada por contenido.
+
+La clave combina el hash de contenido del dataset, use_centralized, los
+parámetros de detección y de downsampling y la versión del formato del
+resultado. Cualquier cambio en esas entradas produce otra clave, por lo que
+nunca hace falta invalidar entradas: las viejas simplemente dejan de pedirse
+y el LRU las descarta.
+
+Dos niveles:
+
+- memoria: LRU acotado por número de resultados.
+- disco: un directorio por clave con result.pkl y los archivos exportados
+  junto al resultado (tabla de integridad), acotado por tamaño total; se
+  desalojan primero las entradas usadas hace más tiempo.
+
+    exports/cache/results/<key>/
+        result.pkl
+        table_statistics.csv
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from ..config import RESULT_CACHE_MEMORY_ITEMS, RESULT_CACHE_DISK_BYTES
+
+# Se incrementa cuando cambia el formato del resultado de process_caliper_data
+RESULT_FORMAT_VERSION = 5
+RESULT_FILE = "result.pkl"
+
+
+def get_cache_dir() -> str:
+    """Obtiene la ruta del directorio exports/cache/results"""
+    cache_dir = os.path.join(os.path.dirname(__file__), "..", "..", "exports", "cache", "results")
+    return os.path.abspath(cache_dir)
+
+
+def cache_key(content_hash: str, use_centralized: bool, params: Dict[str, Any]) -> str:
+    """
+    Clave de un resultado.
+
+    Args:
+        content_hash: Hash de contenido del dataset
+        use_centralized: Radios centralizados (True) u originales (False)
+        params: Parámetros de detección y downsampling que afectan al resultado
+
+    Returns:
+        Hash hexadecimal de las entradas
+    """
+    payload = json.dumps(
+        {"version": RESULT_FORMAT_VERSION, "dataset": content_hash,
+         "centralized": bool(use_centralized), "params": params},
+        sort_keys=True, default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+
+def _dir_size(path: str) -> int:
+    return sum(entry.stat().st_size for entry in os.scandir(path) if entry.is_file())
+
+
+class ResultCache:
+    """LRU en memoria sobre una caché en disco acotada por tamaño."""
+
+    def __init__(self, memory_items: int = RESULT_CACHE_MEMORY_ITEMS,
+                 disk_bytes: int = RESULT_CACHE_DISK_BYTES, cache_dir: Optional[str] = None):
+        self.memory_items = memory_items
+        self.disk_bytes = disk_bytes
+        self.cache_dir = cache_dir or get_cache_dir()
+        self._memory: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.counters = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "stores": 0,
+                         "memory_evictions": 0, "disk_evictions": 0}
+
+    def _entry_dir(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key)
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self.counters[name] += 1
+
+    def _remember(self, key: str, result: Dict[str, Any]) -> None:
+        with self._lock:
+            self._memory[key] = result
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_items:
+                self._memory.popitem(last=False)
+                self.counters["memory_evictions"] += 1
+
+    def get(self, key: str, restore_dir: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Busca un resultado en memoria y después en disco.
+
+        Args:
+            key: Clave de cache_key
+            restore_dir: Si se indica, se copian ahí los archivos guardados con
+                el resultado (por ejemplo la tabla de integridad en exports/)
+
+        Returns:
+            Resultado cacheado o None si no existe
+        """
+        with self._lock:
+            result = self._memory.get(key)
+            if result is not None:
+                self._memory.move_to_end(key)
+        entry_dir = self._entry_dir(key)
+
+        if result is None:
+            try:
+                with open(os.path.join(entry_dir, RESULT_FILE), "rb") as f:
+                    result = pickle.load(f)
+            except FileNotFoundError:
+                self._count("misses")
+                return None
+            except Exception as e:
+                print(f"[CACHE] Corrupt entry {key}, discarding: {e}")
+                shutil.rmtree(entry_dir, ignore_errors=True)
+                self._count("misses")
+                return None
+            self._remember(key, result)
+            self._count("disk_hits")
+        else:
+            self._count("memory_hits")
+
+        if os.path.isdir(entry_dir):
+            os.utime(entry_dir)  # Marca de uso para el desalojo en disco
+            if restore_dir:
+                for entry in os.scandir(entry_dir):
+                    if entry.name != RESULT_FILE:
+                        shutil.copyfile(entry.path, os.path.join(restore_dir, entry.name))
+        return result
+
+    def put(self, key: str, result: Dict[str, Any], files: Optional[List[str]] = None) -> None:
+        """
+        Guarda un resultado en memoria y en disco.
+
+        Args:
+            key: Clave de cache_key
+            result: Resultado de process_caliper_data
+            files: Archivos generados junto al resultado que se restauran en cada acierto
+        """
+        self._remember(key, result)
+        self._count("stores")
+
+        entry_dir = self._entry_dir(key)
+        tmp_dir = None
+        try:
+            # Directorio temporal propio: dos trabajos que terminan la misma clave no se pisan
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_dir = tempfile.mkdtemp(prefix=f"{key}.", suffix=".tmp", dir=self.cache_dir)
+            with open(os.path.join(tmp_dir, RESULT_FILE), "wb") as f:
+                pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+            for path in files or []:
+                if os.path.exists(path):
+                    shutil.copyfile(path, os.path.join(tmp_dir, os.path.basename(path)))
+            try:
+                os.replace(tmp_dir, entry_dir)
+            except OSError:
+                # La entrada ya existe: las entradas solo aparecen completas (por rename) y
+                # la misma clave es el mismo resultado, así que la nuestra sobra
+                if not os.path.exists(os.path.join(entry_dir, RESULT_FILE)):
+                    shutil.rmtree(entry_dir, ignore_errors=True)
+                    os.replace(tmp_dir, entry_dir)
+        except OSError as e:
+            print(f"[CACHE] Could not write entry {key}: {e}")
+            return
+        finally:
+            if tmp_dir is not None:
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+        self._evict_disk()
+
+    def _evict_disk(self) -> None:
+        """Borra las entradas menos usadas hasta quedar bajo disk_bytes."""
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.is_dir() and not entry.name.endswith(".tmp"):
+                try:
+                    entries.append((entry.stat().st_mtime, _dir_size(entry.path), entry.path))
+                except FileNotFoundError:  # borrada por otro hilo mientras se recorría
+                    continue
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.disk_bytes:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+            self._count("disk_evictions")
+
+    def clear(self) -> None:
+        """Vacía ambos niveles."""
+        with self._lock:
+            self._memory.clear()
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = dict(self.counters)
+            memory_entries = len(self._memory)
+        lookups = counters["memory_hits"] + counters["disk_hits"] + counters["misses"]
+        hits = counters["memory_hits"] + counters["disk_hits"]
+        return {
+            **counters,
+            "hit_rate": round(hits / lookups, 3) if lookups else None,
+            "memory_entries": memory_entries,
+            "memory_limit": self.memory_items,
+            "disk_limit_bytes": self.disk_bytes,
+        }
+
+
+result_cache = ResultCache()
@@ -3,18 +3,35 @@ Multifinger Caliper API Routes
 Handles LAS file processing and analysis for multifinger caliper applications.
 """
 
-import io
-import lasio
-import gzip
 import uuid
+import math
 import os
-import boto3
-from botocore.client import Config
-from fastapi import APIRouter, File, UploadFile, HTTPException
-from pydantic import BaseModel
+import tempfile
+from botocore.exceptions import ClientError
+from fastapi import APIRouter, File, UploadFile, HTTPException, Query, Header
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from typing import List, Literal, Optional
+from pydantic import BaseModel, Field
+
+class DetectionParams(BaseModel):
+    # Overrides for the joint detection constants (joints.py / statistics.py)
+    finger_jump: Optional[float] = Field(default=None, gt=0)
+    finger_jump_slim: Optional[float] = Field(default=None, gt=0)
+    threshold: Optional[float] = Field(default=None, gt=0, le=1)
+    slim_threshold: Optional[float] = Field(default=None, gt=0, le=1)
+    slim_threshold_1: Optional[float] = Field(default=None, gt=0, le=1)
+    collar_lenght_steps: Optional[int] = Field(default=None, gt=0)
+    tally_difference: Optional[float] = Field(default=None, gt=0)
+    pipe_od: Optional[List[float]] = Field(default=None, min_length=1)  # Nominal ODs (in) to match pipes against
 
 class ProcessCaliperRequest(BaseModel):
     use_centralized: bool = True
+    px: Optional[int] = Field(default=None, gt=0, le=100000)  # Plot height in pixels (point budget)
+    downsample: Literal["minmax", "lttb"] = "minmax"
+    detection: Optional[DetectionParams] = None
+    dataset_id: Optional[str] = None  # Defaults to the most recently used dataset
+    od_id_samples: bool = False  # Also return per-sample OD/ID (od_id_data) besides the intervals
 
 class PresignedUrlRequest(BaseModel):
     filename: str
@@ -22,36 +39,136 @@ class PresignedUrlRequest(BaseModel):
 class UploadFromR2Request(BaseModel):
     key: str
 
+class MultipartInitiateRequest(BaseModel):
+    filename: str
+    size: int = Field(gt=0)  # File size in bytes, used to plan the parts
+
+class MultipartPartsRequest(BaseModel):
+    key: str
+    upload_id: str
+    part_numbers: List[int] = Field(min_length=1, max_length=1000)
+
+class CompletedPart(BaseModel):
+    part_number: int = Field(ge=1, le=10000)
+    etag: str
+
+class MultipartCompleteRequest(BaseModel):
+    key: str
+    upload_id: str
+    parts: List[CompletedPart] = Field(min_length=1, max_length=10000)
+
+class MultipartAbortRequest(BaseModel):
+    key: str
+    upload_id: str
+
 # Import LAS processing module
-from .las_processor import process_las_data, export_las_curves_to_csv
+from .las_processor import ingest_las_to_dataset
+from .dataset_store import variant_name, export_dataset_csv
+from .lod import query_window
+from .serialization import NumpyJSONResponse, negotiated_response, serialization_metrics
+from .result_cache import result_cache
+from .ingest import hash_raw_stream, hash_file, iter_upload_chunks, FileTooLargeError
+from .r2_storage import get_r2_client as shared_r2_client, download_object, download_metrics, R2NotConfiguredError
+from .compute import compute_tier, ComputeBusyError
+from .registry import dataset_registry
+from .statistics import CSV_FILE, EXCEL_FILE
+from .report import integrity_report
+from .pipe_catalog import pipe_catalog
 
 # Import data management module
 from .df_manage import process_caliper_data
+from .jobs import job_manager, JobQueueFullError, FAILED
 
 # Import configuration
 from ..config import (
-    R2_ACCOUNT_ID, R2_ACCESS_KEY_ID, R2_SECRET_ACCESS_KEY,
-    R2_BUCKET_NAME, R2_REGION, R2_ENDPOINT_URL
+    R2_BUCKET_NAME, R2_PRESIGNED_URL_EXPIRES, MULTIPART_PART_SIZE, MULTIPART_MAX_PARTS,
+    MAX_FILE_SIZE, MAX_R2_FILE_SIZE
 )
 
 # Create router for multifinger caliper endpoints
 router = APIRouter(prefix="/api/multifinger-caliper", tags=["multifinger-caliper"])
 
-# Global progress variable for processing
-processing_progress = 0
+def is_las_filename(filename: str) -> bool:
+    """Accept plain and gzip-compressed LAS files (.las / .las.gz)."""
+    name = (filename or "").lower()
+    return name.endswith('.las') or name.endswith('.las.gz')
 
-# R2 S3 client
+
+# R2 S3 client (built once per process and shared by all requests)
 def get_r2_client():
-    if not all([R2_ACCESS_KEY_ID, R2_SECRET_ACCESS_KEY, R2_ENDPOINT_URL]):
-        raise HTTPException(status_code=500, detail="R2 configuration not complete")
-    return boto3.client(
-        's3',
-        endpoint_url=R2_ENDPOINT_URL,
-        aws_access_key_id=R2_ACCESS_KEY_ID,
-        aws_secret_access_key=R2_SECRET_ACCESS_KEY,
-        region_name=R2_REGION,
-        config=Config(signature_version='s3v4')
-    )
+    try:
+        return shared_r2_client()
+    except R2NotConfiguredError as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+async def ingest_with_registry(open_chunks, filename: str, tag: str) -> dict:
+    """
+    Hash the raw upload bytes while spooling them to disk, then ingest them
+    through the dataset registry (see ingest_spooled).
+
+    Args:
+        open_chunks: Callable returning an async iterator over the raw bytes
+        filename: Original file name (for the registry)
+        tag: Log prefix
+    """
+    fd, spool_path = tempfile.mkstemp(prefix="upload-", suffix=".raw")
+    try:
+        with os.fdopen(fd, "wb") as spool:
+            upload_hash = await hash_raw_stream(open_chunks, spool)
+        return await ingest_spooled(spool_path, upload_hash, filename, tag)
+    finally:
+        os.remove(spool_path)
+
+
+async def ingest_spooled(spool_path: str, upload_hash: dict, filename: str, tag: str,
+                         max_size: int = MAX_FILE_SIZE) -> dict:
+    """
+    Look the raw bytes up in the dataset registry by their hash.
+    On a hit the stored dataset is reused and the registered summary is
+    returned without decompressing, parsing or centralizing again. Otherwise
+    the spooled file is parsed, stored as a dataset and registered by a
+    compute tier worker, so the event loop stays free while it runs.
+
+    Args:
+        spool_path: Temp file holding the raw upload bytes
+        upload_hash: Dict with sha256 and received (hash_raw_stream / hash_file)
+        filename: Original file name (for the registry)
+        tag: Log prefix
+        max_size: Raw size limit (MAX_R2_FILE_SIZE for files uploaded straight to R2)
+    """
+    known = dataset_registry.find_upload(upload_hash["sha256"])
+    if known is not None:
+        dataset_registry.touch(known["dataset_id"])
+        print(f"[{tag}] Known upload ({upload_hash['sha256'][:12]}), reusing dataset {known['dataset_id']}")
+        return {**known["summary"], "deduplicated": True}
+
+    result = await compute_tier.run(ingest_las_to_dataset, spool_path, tag, max_size)
+    if "dataset_error" in result:
+        return result
+    dataset_registry.register_upload(upload_hash["sha256"], result["dataset_id"], result,
+                                     filename=filename, size=upload_hash["received"])
+    return {**result, "deduplicated": False}
+
+
+def new_upload_key(filename: str) -> str:
+    """Unique R2 key under uploads/ keeping the file extension (.las.gz counts as one)."""
+    if filename.lower().endswith('.las.gz'):
+        file_extension = 'las.gz'
+    else:
+        file_extension = filename.split('.')[-1] if '.' in filename else ''
+    return f"uploads/{uuid.uuid4()}.{file_extension}"
+
+
+def check_upload_key(key: str) -> None:
+    """Multipart operations are only allowed on keys issued under uploads/."""
+    if not key.startswith("uploads/") or ".." in key:
+        raise HTTPException(status_code=400, detail="ERROR: Invalid upload key")
+
+
+def require_r2_bucket() -> None:
+    if not R2_BUCKET_NAME:
+        raise HTTPException(status_code=500, detail="R2 bucket not configured")
 
 
 @router.post("/get-presigned-url")
@@ -59,12 +176,10 @@ async def get_presigned_url(request: PresignedUrlRequest):
     """
     Generate a presigned URL for uploading a file directly to Cloudflare R2.
     """
-    if not R2_BUCKET_NAME:
-        raise HTTPException(status_code=500, detail="R2 bucket not configured")
+    require_r2_bucket()
 
     # Generate unique key
-    file_extension = request.filename.split('.')[-1] if '.' in request.filename else ''
-    unique_key = f"uploads/{uuid.uuid4()}.{file_extension}"
+    unique_key = new_upload_key(request.filename)
 
     try:
         s3_client = get_r2_client()
@@ -75,7 +190,7 @@ async def get_presigned_url(request: PresignedUrlRequest):
                 'Key': unique_key,
                 'ContentType': 'application/octet-stream'  # Allow any file type
             },
-            ExpiresIn=3600  # 1 hour
+            ExpiresIn=R2_PRESIGNED_URL_EXPIRES
         )
         return {"presigned_url": presigned_url, "key": unique_key}
     except Exception as e:
@@ -83,72 +198,164 @@ async def get_presigned_url(request: PresignedUrlRequest):
         raise HTTPException(status_code=500, detail=f"Error generating presigned URL: {str(e)}")
 
 
-@router.post("/upload-from-r2")
-async def upload_from_r2(request: UploadFromR2Request):
+@router.post("/multipart-upload/initiate")
+async def initiate_multipart_upload(request: MultipartInitiateRequest):
     """
-    Download file from R2 and process it like the original upload endpoint.
+    Start a multipart upload to R2 for a large file.
+    Returns the key, the upload id and the part plan (part_size, part_count);
+    request part URLs with /multipart-upload/presign, upload the parts in
+    parallel and finish with /multipart-upload/complete. The completed key
+    is processed with /upload-from-r2 as usual.
     """
-    if not R2_BUCKET_NAME:
-        raise HTTPException(status_code=500, detail="R2 bucket not configured")
+    require_r2_bucket()
+    if not is_las_filename(request.filename):
+        raise HTTPException(status_code=400, detail="ERROR: El archivo debe tener la extensión .las")
+    if request.size > MAX_R2_FILE_SIZE:
+        raise HTTPException(status_code=413, detail=f"ERROR: El archivo supera el tamaño máximo de {MAX_R2_FILE_SIZE // (1024 * 1024)} MB")
 
+    part_size = max(MULTIPART_PART_SIZE, math.ceil(request.size / MULTIPART_MAX_PARTS))
+    unique_key = new_upload_key(request.filename)
+    s3_client = get_r2_client()
     try:
-        print(f"[UPLOAD_FROM_R2] Downloading file from R2: {request.key}")
-        s3_client = get_r2_client()
+        response = await run_in_threadpool(
+            s3_client.create_multipart_upload,
+            Bucket=R2_BUCKET_NAME, Key=unique_key, ContentType='application/octet-stream'
+        )
+    except Exception as e:
+        print(f"[MULTIPART] Initiate error: {e}")
+        raise HTTPException(status_code=500, detail=f"ERROR: Error starting multipart upload - {str(e)}")
+
+    print(f"[MULTIPART] Started {unique_key} ({request.size} bytes, {math.ceil(request.size / part_size)} parts)")
+    return {
+        "key": unique_key,
+        "upload_id": response["UploadId"],
+        "part_size": part_size,
+        "part_count": math.ceil(request.size / part_size),
+        "expires_in": R2_PRESIGNED_URL_EXPIRES,
+    }
+
+
+@router.post("/multipart-upload/presign")
+async def presign_multipart_parts(request: MultipartPartsRequest):
+    """
+    Generate presigned PUT URLs for parts of a multipart upload.
+    A part can be presigned again to retry it after a failure or once its URL expires.
+    """
+    require_r2_bucket()
+    check_upload_key(request.key)
+    invalid = [n for n in request.part_numbers if not 1 <= n <= MULTIPART_MAX_PARTS]
+    if invalid:
+        raise HTTPException(status_code=400, detail=f"ERROR: Invalid part numbers: {invalid[:10]}")
+
+    s3_client = get_r2_client()
+    try:
+        urls = [
+            {
+                "part_number": part_number,
+                "url": s3_client.generate_presigned_url(
+                    'upload_part',
+                    Params={'Bucket': R2_BUCKET_NAME, 'Key': request.key,
+                            'UploadId': request.upload_id, 'PartNumber': part_number},
+                    ExpiresIn=R2_PRESIGNED_URL_EXPIRES
+                ),
+            }
+            for part_number in sorted(set(request.part_numbers))
+        ]
+    except Exception as e:
+        print(f"[MULTIPART] Presign error: {e}")
+        raise HTTPException(status_code=500, detail=f"Error generating presigned URL: {str(e)}")
+    return {"key": request.key, "upload_id": request.upload_id, "parts": urls}
 
-        # Download file from R2
-        response = s3_client.get_object(Bucket=R2_BUCKET_NAME, Key=request.key)
-        contents = response['Body'].read()
 
-        print(f"[UPLOAD_FROM_R2] File size: {len(contents)} bytes")
+@router.post("/multipart-upload/complete")
+async def complete_multipart_upload(request: MultipartCompleteRequest):
+    """
+    Complete a multipart upload from the ETag returned by each part PUT.
+    """
+    require_r2_bucket()
+    check_upload_key(request.key)
+    parts = sorted({part.part_number: part for part in request.parts}.values(), key=lambda part: part.part_number)
 
-        # Extract filename from key (remove uploads/ prefix)
-        filename = request.key.split('/')[-1] if '/' in request.key else request.key
+    s3_client = get_r2_client()
+    try:
+        await run_in_threadpool(
+            s3_client.complete_multipart_upload,
+            Bucket=R2_BUCKET_NAME, Key=request.key, UploadId=request.upload_id,
+            MultipartUpload={"Parts": [{"PartNumber": part.part_number, "ETag": part.etag} for part in parts]}
+        )
+    except ClientError as e:
+        print(f"[MULTIPART] Complete error: {e}")
+        raise HTTPException(status_code=400, detail=f"ERROR: Could not complete multipart upload - {str(e)}")
+    except Exception as e:
+        print(f"[MULTIPART] Complete error: {e}")
+        raise HTTPException(status_code=500, detail=f"ERROR: Could not complete multipart upload - {str(e)}")
 
-        # Check extension
-        if not filename.endswith('.las'):
-            raise HTTPException(status_code=400, detail="ERROR: El archivo debe tener la extensión .las")
+    print(f"[MULTIPART] Completed {request.key} ({len(parts)} parts)")
+    return {"key": request.key, "parts": len(parts)}
 
-        # Decompress if .gz
-        if filename.endswith('.gz'):
-            print("[UPLOAD_FROM_R2] Decompressing .gz file")
-            contents = gzip.decompress(contents)
-            print(f"[UPLOAD_FROM_R2] Decompressed size: {len(contents)} bytes")
 
-        # Decode content
-        decoded_content = None
-        encodings_to_try = ['utf-8', 'iso-8859-1', 'latin1', 'cp1252']
+@router.post("/multipart-upload/abort")
+async def abort_multipart_upload(request: MultipartAbortRequest):
+    """
+    Abort a multipart upload and discard the parts uploaded so far.
+    """
+    require_r2_bucket()
+    check_upload_key(request.key)
+
+    s3_client = get_r2_client()
+    try:
+        await run_in_threadpool(
+            s3_client.abort_multipart_upload,
+            Bucket=R2_BUCKET_NAME, Key=request.key, UploadId=request.upload_id
+        )
+    except ClientError as e:
+        print(f"[MULTIPART] Abort error: {e}")
+        raise HTTPException(status_code=400, detail=f"ERROR: Could not abort multipart upload - {str(e)}")
 
-        for encoding in encodings_to_try:
-            try:
-                decoded_content = contents.decode(encoding)
-                break
-            except UnicodeDecodeError:
-                continue
+    print(f"[MULTIPART] Aborted {request.key}")
+    return {"key": request.key, "aborted": True}
+
+
+@router.post("/upload-from-r2")
+async def upload_from_r2(request: UploadFromR2Request):
+    """
+    Download file from R2 and process it like the original upload endpoint.
+    """
+    require_r2_bucket()
 
-        if decoded_content is None:
-            raise UnicodeDecodeError("No se pudo decodificar el archivo")
+    # Extract filename from key (remove uploads/ prefix)
+    filename = request.key.split('/')[-1] if '/' in request.key else request.key
 
-        # Process LAS
-        file_like_object = io.StringIO(decoded_content)
-        las = lasio.read(file_like_object)
+    # Check extension
+    if not is_las_filename(filename):
+        raise HTTPException(status_code=400, detail="ERROR: El archivo debe tener la extensión .las")
 
-        print("[UPLOAD_FROM_R2] Processing LAS data")
-        result = process_las_data(las)
-        print("[UPLOAD_FROM_R2] LAS data processed successfully")
+    try:
+        print(f"[UPLOAD_FROM_R2] Downloading file from R2: {request.key}")
+        s3_client = get_r2_client()
 
-        # Export CSV
+        # The object is downloaded once, off the event loop (in parallel byte
+        # ranges when large), then hashed and parsed from the temp file
+        fd, spool_path = tempfile.mkstemp(prefix="upload-", suffix=".raw")
+        os.close(fd)
         try:
-            print("[UPLOAD_FROM_R2] Exporting CSV")
-            csv_paths = export_las_curves_to_csv(las)
-            result["csv_exported"] = csv_paths
-            print("[UPLOAD_FROM_R2] CSV exported successfully")
-        except Exception as e:
-            print(f"[UPLOAD_FROM_R2] CSV export error: {e}")
-            result["csv_error"] = str(e)
+            await run_in_threadpool(download_object, s3_client, R2_BUCKET_NAME, request.key, spool_path,
+                                    max_size=MAX_R2_FILE_SIZE)
+            upload_hash = await run_in_threadpool(hash_file, spool_path)
+            result = await ingest_spooled(spool_path, upload_hash, filename, "UPLOAD_FROM_R2",
+                                          max_size=MAX_R2_FILE_SIZE)
+        finally:
+            os.remove(spool_path)
 
         print("[UPLOAD_FROM_R2] Upload from R2 completed successfully")
-        return result
-
+        return NumpyJSONResponse(content=result)
+
+    except ComputeBusyError as e:
+        print(f"[UPLOAD_FROM_R2] Compute tier busy: {e}")
+        raise HTTPException(status_code=503, detail=f"ERROR: {str(e)}")
+    except FileTooLargeError as e:
+        print(f"[UPLOAD_FROM_R2] File too large: {e}")
+        raise HTTPException(status_code=413, detail=f"ERROR: {str(e)}")
     except UnicodeDecodeError as e:
         print(f"[UPLOAD_FROM_R2] Unicode decode error: {e}")
         raise HTTPException(status_code=400, detail="ERROR: El archivo .las debe estar en formato UTF-8. Convierta el archivo a UTF-8 e intente nuevamente.")
@@ -171,60 +378,24 @@ async def upload_from_r2(request: UploadFromR2Request):
 @router.post("/upload")
 async def upload_and_process_las(file: UploadFile = File(...)):
     """
-    Endpoint para recibir un archivo .las, procesarlo con lasio y
+    Endpoint para recibir un archivo .las, procesarlo y
     devolver información específica para multifinger caliper.
     """
-    if not file.filename.endswith('.las'):
+    if not is_las_filename(file.filename):
         raise HTTPException(status_code=400, detail="ERROR: El archivo debe tener la extensión .las")
 
     try:
         print(f"[UPLOAD] Received file: {file.filename}")
-        # Lee el contenido del archivo subido en memoria
-        contents = await file.read()
-        print(f"[UPLOAD] File size: {len(contents)} bytes")
-
-        # Descomprimir si es .gz
-        if file.filename.endswith('.gz'):
-            print("[UPLOAD] Decompressing .gz file")
-            contents = gzip.decompress(contents)
-            print(f"[UPLOAD] Decompressed size: {len(contents)} bytes")
-
-        # Decodifica el contenido (mismo código que antes)
-        decoded_content = None
-        encodings_to_try = ['utf-8', 'iso-8859-1', 'latin1', 'cp1252']
-
-        for encoding in encodings_to_try:
-            try:
-                decoded_content = contents.decode(encoding)
-                break
-            except UnicodeDecodeError:
-                continue
-
-        if decoded_content is None:
-            raise UnicodeDecodeError("No se pudo decodificar el archivo")
-
-        # Crea el objeto LAS
-        file_like_object = io.StringIO(decoded_content)
-        las = lasio.read(file_like_object)
-
-        print("[UPLOAD] Processing LAS data")
-        # Procesa con la función mínima
-        result = process_las_data(las)
-        print("[UPLOAD] LAS data processed successfully")
-
-        # Exportar curvas a CSV automáticamente (original y centralizado)
-        try:
-            print("[UPLOAD] Exporting CSV")
-            csv_paths = export_las_curves_to_csv(las)
-            result["csv_exported"] = csv_paths
-            print("[UPLOAD] CSV exported successfully")
-        except Exception as e:
-            print(f"[UPLOAD] CSV export error: {e}")
-            result["csv_error"] = str(e)
-
+        result = await ingest_with_registry(lambda: iter_upload_chunks(file), file.filename, "UPLOAD")
         print("[UPLOAD] Upload completed successfully")
-        return result
-
+        return NumpyJSONResponse(content=result)
+
+    except ComputeBusyError as e:
+        print(f"[UPLOAD] Compute tier busy: {e}")
+        raise HTTPException(status_code=503, detail=f"ERROR: {str(e)}")
+    except FileTooLargeError as e:
+        print(f"[UPLOAD] File too large: {e}")
+        raise HTTPException(status_code=413, detail=f"ERROR: {str(e)}")
     except UnicodeDecodeError as e:
         print(f"[UPLOAD] Unicode decode error: {e}")
         raise HTTPException(status_code=400, detail="ERROR: El archivo .las debe estar en formato UTF-8. Convierta el archivo a UTF-8 e intente nuevamente.")
@@ -245,64 +416,223 @@ async def upload_and_process_las(file: UploadFile = File(...)):
             raise HTTPException(status_code=500, detail=f"ERROR: Error al procesar el archivo - {error_msg}")
 
 
-@router.post("/process-caliper")
+@router.post("/process-caliper", status_code=202)
 async def process_caliper(request: ProcessCaliperRequest):
     """
-    Endpoint para procesar datos del caliper más reciente.
-    Detecta curvas R y calcula estadísticas para graficar.
+    Queue processing of the latest caliper dataset as a background job.
+    Returns the job id immediately; follow progress with
+    /jobs/{job_id}/events and fetch the result from /jobs/{job_id}/result.
 
     Args:
         request: ProcessCaliperRequest con el parámetro use_centralized
     """
-    print(f"[PROCESS] Starting process_caliper with use_centralized={request.use_centralized}")
-    global processing_progress
-    processing_progress = 0
+    # The dataset is pinned when queuing, so later uploads don't change what the job processes
+    dataset = dataset_registry.resolve(request.dataset_id)
+    if request.dataset_id is not None and dataset is None:
+        raise HTTPException(status_code=404, detail=f"ERROR: Dataset '{request.dataset_id}' not found")
+    dataset_id = dataset.dataset_id if dataset is not None else None
+    if request.detection is not None and request.detection.pipe_od:
+        try:
+            pipe_catalog.restrict(request.detection.pipe_od)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"ERROR: {e}")
+
+    print(f"[PROCESS] Queuing process_caliper for dataset {dataset_id} with use_centralized={request.use_centralized}, px={request.px}, downsample={request.downsample}")
 
     try:
-        result = process_caliper_data(request.use_centralized)
-        print("[PROCESS] process_caliper_data completed")
+        job = job_manager.submit(
+            "process-caliper", process_caliper_data,
+            use_centralized=request.use_centralized, px=request.px, method=request.downsample,
+            detection=request.detection.model_dump(exclude_none=True) if request.detection else None,
+            dataset_id=dataset_id, compute=compute_tier.call, od_id_samples=request.od_id_samples
+        )
+    except JobQueueFullError as e:
+        raise HTTPException(status_code=503, detail=f"ERROR: {e}")
 
-        if "error" in result:
-            print(f"[PROCESS] Error in result: {result['error']}")
-            raise HTTPException(status_code=400, detail=f"ERROR: {result['error']}")
+    return job.snapshot()
 
-        processing_progress = 100
-        print("[PROCESS] Process completed successfully")
-        return result
 
-    except Exception as e:
-        print(f"[PROCESS] Exception: {e}")
-        error_msg = str(e)
-        raise HTTPException(status_code=500, detail=f"ERROR: Error al procesar datos del caliper - {error_msg}")
+def get_job_or_404(job_id: str):
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"ERROR: Job '{job_id}' not found")
+    return job
+
+
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """
+    Get the status, current stage and progress of a job.
+    """
+    return get_job_or_404(job_id).snapshot()
+
+
+@router.get("/jobs/{job_id}/events")
+async def job_events(job_id: str):
+    """
+    Stream job progress as Server-Sent Events.
+    Sends a "progress" event per pipeline stage and ends with "done" or "error".
+    """
+    job = get_job_or_404(job_id)
+    return StreamingResponse(
+        job_manager.events(job),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.get("/jobs/{job_id}/result")
+async def get_job_result(job_id: str, accept: Optional[str] = Header(None)):
+    """
+    Get the result of a finished process-caliper job.
+    Content negotiation: JSON by default, Arrow IPC stream or packed
+    float32 buffers with `Accept: application/vnd.apache.arrow.stream`
+    or `Accept: application/vnd.caliper.packed`.
+    """
+    job = get_job_or_404(job_id)
+
+    if not job.finished:
+        raise HTTPException(status_code=409, detail=f"ERROR: Job is still {job.status} ({job.stage})")
+
+    if job.status == FAILED:
+        print(f"[PROCESS] Error in job {job_id}: {job.error}")
+        status_code = 400 if job.result is not None else 500
+        raise HTTPException(status_code=status_code, detail=f"ERROR: {job.error}")
+
+    return negotiated_response(job.result, accept, stream=True)
 
 
 @router.get("/progress")
 async def get_progress():
     """
-    Get current processing progress.
+    Get progress of the most recent processing job.
+    Prefer /jobs/{job_id} or /jobs/{job_id}/events.
     """
-    return {"progress": processing_progress}
+    job = job_manager.latest()
+    if job is None:
+        return {"progress": 0}
+    return {"progress": job.progress, "stage": job.stage, "job_id": job.job_id}
+
+def resolve_dataset_or_404(dataset_id: Optional[str]):
+    """Open a dataset by id (or the most recently used one) through the registry."""
+    dataset = dataset_registry.resolve(dataset_id)
+    if dataset is None:
+        if dataset_id is None:
+            raise HTTPException(status_code=404, detail="No dataset found. Please upload a LAS file first.")
+        raise HTTPException(status_code=404, detail=f"ERROR: Dataset '{dataset_id}' not found")
+    return dataset
+
+
+@router.get("/datasets")
+async def list_datasets(limit: int = Query(50, gt=0, le=500)):
+    """
+    List the registered datasets, most recently used first.
+    """
+    return {"datasets": dataset_registry.list_datasets(limit)}
+
+
+@router.get("/datasets/{dataset_id}")
+async def get_dataset(dataset_id: str):
+    """
+    Get a dataset's registry entry: metadata, curves, workspace and artifacts.
+    """
+    resolve_dataset_or_404(dataset_id)
+    return dataset_registry.get(dataset_id)
+
 
 @router.get("/download-integrity-table")
-async def download_integrity_table():
+async def download_integrity_table(dataset_id: Optional[str] = None, centralized: bool = True):
     """
-    Download the styled integrity table Excel file.
+    Download the styled integrity table Excel file of a dataset
+    (default: the most recently used one) for the given variant.
+
+    The Excel report is rendered from the integrity table on the first
+    download and cached under the hash of the table, so later downloads of
+    the same statistics are served from disk.
     """
-    import os
     from fastapi.responses import FileResponse
 
-    exports_dir = os.path.join(os.path.dirname(__file__), "..", "..", "exports")
-    file_path = os.path.join(exports_dir, "statistics_format.xlsx")
+    dataset = resolve_dataset_or_404(dataset_id)
+    variant = variant_name(centralized)
+    table_path = dataset_registry.artifact_path(dataset.dataset_id, f"{variant}/{CSV_FILE}")
 
-    if not os.path.exists(file_path):
+    if table_path is None or not os.path.exists(table_path):
         raise HTTPException(status_code=404, detail="Integrity table file not found. Please process data first.")
 
+    report = await run_in_threadpool(integrity_report, table_path)
+    if not report["cached"]:
+        dataset_registry.set_artifact(dataset.dataset_id, f"{variant}/{EXCEL_FILE}", report["path"])
+
     return FileResponse(
-        path=file_path,
+        path=report["path"],
         filename="integrity_table.xlsx",
         media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
     )
 
+@router.get("/download-csv")
+async def download_csv(dataset_id: Optional[str] = None, centralized: bool = True):
+    """
+    Export a dataset (default: the most recently used one) to CSV on demand and download it.
+    """
+    from fastapi.responses import FileResponse
+
+    dataset = resolve_dataset_or_404(dataset_id)
+
+    file_path = dataset.csv_path(centralized)
+    if not os.path.exists(file_path):
+        try:
+            file_path = await compute_tier.run(export_dataset_csv, dataset.dataset_id, centralized)
+        except ComputeBusyError as e:
+            raise HTTPException(status_code=503, detail=f"ERROR: {e}")
+    return FileResponse(
+        path=file_path,
+        filename=os.path.basename(file_path),
+        media_type="text/csv"
+    )
+
+@router.get("/datasets/{dataset_id}/window")
+def get_dataset_window(
+    dataset_id: str,
+    top: float,
+    bottom: float,
+    px: int = Query(1000, gt=0, le=20000),
+    centralized: bool = True,
+    curves: Optional[str] = None,
+    accept: Optional[str] = Header(None),
+):
+    """
+    Get the curves of a depth window from the dataset's level-of-detail pyramid.
+    Serves the finest level that fits in `px` blocks; each curve carries the
+    per-block min, max and mean. `curves` is an optional comma-separated list.
+    Supports the same Accept negotiation as /jobs/{job_id}/result.
+    """
+    dataset = resolve_dataset_or_404(dataset_id)
+
+    wanted = [name.strip() for name in curves.split(",") if name.strip()] if curves else None
+    try:
+        window = query_window(dataset, top, bottom, px, use_centralized=centralized, curves=wanted)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"ERROR: {e}")
+
+    return negotiated_response(window, accept)
+
+
+@router.get("/metrics")
+async def get_metrics():
+    """
+    Serialization metrics per response format (responses, total and max time,
+    bytes written, growth of the process peak RSS), result cache counters and
+    compute tier load (tasks in flight, queue depth, wait and run times) and
+    R2 download throughput.
+    """
+    return {
+        "serialization": serialization_metrics.snapshot(),
+        "result_cache": result_cache.snapshot(),
+        "compute": compute_tier.snapshot(),
+        "r2_downloads": download_metrics.snapshot(),
+    }
+
+
 @router.get("/health")
 async def health_check():
     """
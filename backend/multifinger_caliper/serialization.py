@@ -0,0 +1,372 @@
+"""
+Formatos de respuesta para los resultados del caliper.
+
+Además de JSON, los endpoints de resultados negocian por cabecera Accept dos
+formatos binarios en los que cada curva viaja como un buffer contiguo que el
+frontend puede mapear directamente sobre un TypedArray:
+
+- application/vnd.apache.arrow.stream: stream Arrow IPC con un único record
+  batch de una fila; cada curva es una columna list<float32> (o
+  list<fixed_size_list<float32, k>> para matrices como r_curves). Los campos
+  que no son arrays van como JSON en los metadatos del esquema ("manifest").
+- application/vnd.caliper.packed: manifest JSON pequeño seguido de los
+  buffers little-endian alineados a 8 bytes:
+
+      b"CLPK" | uint32 LE longitud del manifest | manifest | buffers
+
+  El manifest indica para cada array su dtype, forma, offset y byteLength
+  (offsets absolutos desde el inicio del cuerpo).
+
+Los valores nulos (None) se envían como NaN. Las profundidades van en float64
+para no perder precisión; el resto de curvas en float32.
+
+El JSON se genera con orjson directamente desde los arrays de NumPy (NaN ->
+null), sin convertirlos antes en listas de Python. Los resultados grandes se
+escriben por bloques: las secciones plot_data y raw_data se emiten a trozos
+de JSON_CHUNK_ROWS filas, de modo que el documento completo nunca está en
+memoria. Cada respuesta registra su tiempo de serialización, tamaño y el
+crecimiento del pico de RSS del proceso (GET /metrics).
+"""
+
+import struct
+import sys
+import threading
+import time
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple
+
+import numpy as np
+import orjson
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+
+try:
+    import resource
+except ImportError:  # Windows: sin getrusage no se mide el pico de RSS
+    resource = None
+
+try:
+    import pyarrow as pa
+except ImportError:  # pyarrow es opcional: sin él solo se ofrecen JSON y el formato empaquetado
+    pa = None
+
+JSON_MEDIA_TYPE = "application/json"
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+PACKED_MEDIA_TYPE = "application/vnd.caliper.packed"
+PACKED_MAGIC = b"CLPK"
+PACKED_ALIGNMENT = 8
+
+# Secciones de los resultados que contienen curvas
+ARRAY_SECTIONS = ("plot_data", "raw_data", "collars_data", "od_id_data", "od_id_intervals", "depth", "curves")
+
+# Secciones que el JSON por streaming escribe a trozos
+STREAM_SECTIONS = ("plot_data", "raw_data")
+JSON_CHUNK_ROWS = 2048
+ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+
+class _Moved:
+    """Marcador de valores movidos a arrays."""
+
+
+_MOVED = _Moved()
+
+
+def _orjson_default(value: Any) -> Any:
+    # orjson solo serializa arrays C-contiguos; el resto de tipos NumPy se convierte aquí
+    if isinstance(value, np.ndarray):
+        return np.ascontiguousarray(value)
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    """JSON con orjson: arrays y escalares NumPy directos, NaN/inf como null."""
+    return orjson.dumps(content, default=_orjson_default, option=ORJSON_OPTIONS)
+
+
+class NumpyJSONResponse(JSONResponse):
+    """JSONResponse que serializa con orjson y acepta arrays de NumPy."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def _iter_array(array: np.ndarray, chunk_rows: int) -> Iterator[bytes]:
+    yield b"["
+    for start in range(0, len(array), chunk_rows):
+        chunk = dumps(array[start:start + chunk_rows])
+        yield (b"," if start else b"") + chunk[1:-1]
+    yield b"]"
+
+
+def _iter_value(value: Any, chunk_rows: int) -> Iterator[bytes]:
+    if isinstance(value, dict):
+        yield b"{"
+        for i, (key, item) in enumerate(value.items()):
+            yield (b"," if i else b"") + dumps(str(key)) + b":"
+            yield from _iter_value(item, chunk_rows)
+        yield b"}"
+    elif isinstance(value, np.ndarray) and value.ndim > 0 and len(value) > chunk_rows:
+        yield from _iter_array(value, chunk_rows)
+    else:
+        yield dumps(value)
+
+
+def iter_json(result: Dict[str, Any], sections: Iterable[str] = STREAM_SECTIONS,
+              chunk_rows: int = JSON_CHUNK_ROWS) -> Iterator[bytes]:
+    """
+    Escribe un resultado como JSON por bloques.
+
+    Las secciones indicadas se recorren campo a campo y sus arrays se emiten
+    en trozos de chunk_rows filas; el resto de claves se serializa de una vez.
+
+    Args:
+        result: Resultado a serializar
+        sections: Claves de primer nivel que se escriben a trozos
+        chunk_rows: Filas por trozo
+
+    Returns:
+        Iterador de fragmentos de bytes que juntos forman el documento JSON
+    """
+    sections = set(sections)
+    yield b"{"
+    for i, (key, value) in enumerate(result.items()):
+        yield (b"," if i else b"") + dumps(key) + b":"
+        if key in sections:
+            yield from _iter_value(value, chunk_rows)
+        else:
+            yield dumps(value)
+    yield b"}"
+
+
+def peak_rss() -> Optional[int]:
+    """Pico de memoria residente del proceso en bytes (None si no se puede medir)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reporta KiB, macOS bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class SerializationMetrics:
+    """Tiempo, tamaño y crecimiento del pico de RSS de las respuestas por formato."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._formats: Dict[str, Dict[str, float]] = {}
+
+    def record(self, fmt: str, seconds: float, size: int, rss_growth: Optional[int]) -> None:
+        with self._lock:
+            totals = self._formats.setdefault(fmt, {"responses": 0, "seconds": 0.0, "bytes": 0,
+                                                    "max_seconds": 0.0, "peak_rss_growth": 0})
+            totals["responses"] += 1
+            totals["seconds"] += seconds
+            totals["bytes"] += size
+            totals["max_seconds"] = max(totals["max_seconds"], seconds)
+            totals["peak_rss_growth"] += rss_growth or 0
+        growth = f"{rss_growth / 2**20:.1f} MB" if rss_growth is not None else "n/a"
+        print(f"[SERIALIZE] {fmt}: {size / 2**20:.2f} MB in {seconds * 1000:.1f} ms (peak RSS +{growth})")
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {
+                fmt: {**totals, "avg_ms": round(1000 * totals["seconds"] / totals["responses"], 3)}
+                for fmt, totals in self._formats.items()
+            }
+
+
+serialization_metrics = SerializationMetrics()
+
+
+def _measured(fmt: str, encode) -> bytes:
+    rss_before = peak_rss()
+    started = time.perf_counter()
+    body = encode()
+    rss_after = peak_rss()
+    growth = rss_after - rss_before if rss_before is not None else None
+    serialization_metrics.record(fmt, time.perf_counter() - started, len(body), growth)
+    return body
+
+
+def _measured_stream(fmt: str, chunks: Iterator[bytes]) -> Iterator[bytes]:
+    # El tiempo solo cuenta la generación de los trozos, no la espera del envío
+    rss_before = peak_rss()
+    elapsed = 0.0
+    size = 0
+    started = time.perf_counter()
+    for chunk in chunks:
+        elapsed += time.perf_counter() - started
+        size += len(chunk)
+        yield chunk
+        started = time.perf_counter()
+    rss_after = peak_rss()
+    growth = rss_after - rss_before if rss_before is not None else None
+    serialization_metrics.record(fmt, elapsed, size, growth)
+
+
+def negotiate(accept: Optional[str]) -> str:
+    """
+    Elige el formato de respuesta a partir de la cabecera Accept.
+    Arrow solo se ofrece si pyarrow está instalado.
+    """
+    accept = (accept or "").lower()
+    if ARROW_MEDIA_TYPE in accept and pa is not None:
+        return ARROW_MEDIA_TYPE
+    if PACKED_MEDIA_TYPE in accept:
+        return PACKED_MEDIA_TYPE
+    return JSON_MEDIA_TYPE
+
+
+# Arrays que son profundidades y viajan en float64
+DEPTH_ARRAYS = ("depth", "dept", "collars_data")
+
+
+def _array_dtype(name: str) -> np.dtype:
+    leaf = name.rsplit(".", 1)[-1].lower()
+    return np.dtype("<f8") if leaf in DEPTH_ARRAYS else np.dtype("<f4")
+
+
+def _as_numeric(value: Any) -> Optional[np.ndarray]:
+    """Convierte listas numéricas (None -> NaN) o ndarrays en array float; None si no es numérico."""
+    if isinstance(value, np.ndarray):
+        return value if value.dtype.kind in "fiub" else None
+    if not isinstance(value, list):
+        return None
+    try:
+        array = np.array(value, dtype=np.float64)
+    except (TypeError, ValueError):
+        return None
+    return array if array.ndim in (1, 2) else None
+
+
+def split_arrays(result: Dict[str, Any], sections: Iterable[str] = ARRAY_SECTIONS) -> Tuple[Dict[str, Any], Dict[str, np.ndarray]]:
+    """
+    Separa un resultado en metadatos JSON y arrays numéricos con nombre por ruta.
+
+    Dentro de las secciones indicadas, las listas numéricas pasan a arrays
+    ("plot_data.depth", "raw_data.r_curves"...) y las listas de registros
+    (od_id_data) se convierten en una columna por campo ("od_id_data.DEPT").
+
+    Returns:
+        Tupla (meta, arrays); meta conserva todo lo que no es array
+    """
+    arrays: Dict[str, np.ndarray] = {}
+
+    def walk(value: Any, path: str) -> Any:
+        if isinstance(value, dict):
+            kept = {}
+            for key, item in value.items():
+                item = walk(item, f"{path}.{key}")
+                if item is not _MOVED:
+                    kept[key] = item
+            return kept
+
+        if isinstance(value, list) and value and all(isinstance(row, dict) for row in value):
+            keys = list(value[0].keys())
+            columns = {key: _as_numeric([row.get(key) for row in value]) for key in keys}
+            if all(column is not None for column in columns.values()):
+                for key, column in columns.items():
+                    arrays[f"{path}.{key}"] = column
+                return _MOVED
+            return value
+
+        array = _as_numeric(value)
+        if array is not None:
+            arrays[path] = array
+            return _MOVED
+        return value
+
+    meta = {}
+    sections = set(sections)
+    for key, value in result.items():
+        if key in sections:
+            value = walk(value, key)
+            if value is _MOVED or value == {}:
+                continue
+        meta[key] = value
+    return meta, arrays
+
+
+def encode_packed(result: Dict[str, Any]) -> bytes:
+    """Codifica un resultado en el formato empaquetado (manifest JSON + buffers alineados)."""
+    meta, arrays = split_arrays(result)
+
+    buffers = []
+    entries = {}
+    offset = 0
+    for name, array in arrays.items():
+        data = np.ascontiguousarray(array, dtype=_array_dtype(name)).tobytes()
+        entries[name] = {"dtype": _array_dtype(name).name, "shape": list(array.shape),
+                         "offset": offset, "byteLength": len(data)}
+        buffers.append(data)
+        padding = -len(data) % PACKED_ALIGNMENT
+        if padding:
+            buffers.append(b"\0" * padding)
+        offset += len(data) + padding
+
+    # Los offsets del manifest son absolutos: se desplazan por el tamaño del encabezado
+    def manifest_bytes(base: int) -> bytes:
+        shifted = {name: {**entry, "offset": entry["offset"] + base} for name, entry in entries.items()}
+        return dumps({"version": 1, "meta": meta, "arrays": shifted})
+
+    base = 0
+    while True:
+        manifest = manifest_bytes(base)
+        header_size = len(PACKED_MAGIC) + 4 + len(manifest)
+        padded = header_size + (-header_size % PACKED_ALIGNMENT)
+        if padded == base:
+            break
+        base = padded
+    manifest += b" " * (base - header_size)
+
+    return b"".join([PACKED_MAGIC, struct.pack("<I", len(manifest)), manifest] + buffers)
+
+
+def encode_arrow(result: Dict[str, Any]) -> bytes:
+    """Codifica un resultado como stream Arrow IPC de un record batch de una fila."""
+    if pa is None:
+        raise RuntimeError("pyarrow no está instalado")
+    meta, arrays = split_arrays(result)
+
+    columns = []
+    names = []
+    for name, array in arrays.items():
+        dtype = _array_dtype(name)
+        values = pa.array(np.ascontiguousarray(array, dtype=dtype).ravel(), from_pandas=False)
+        if array.ndim == 2:
+            values = pa.FixedSizeListArray.from_arrays(values, array.shape[1])
+        columns.append(pa.ListArray.from_arrays(pa.array([0, len(values)], type=pa.int32()), values))
+        names.append(name)
+
+    schema_meta = {"manifest": dumps({"version": 1, "meta": meta})}
+    batch = pa.RecordBatch.from_arrays(columns, names=names)
+    batch = batch.replace_schema_metadata(schema_meta)
+
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, batch.schema) as writer:
+        writer.write_batch(batch)
+    return sink.getvalue().to_pybytes()
+
+
+def negotiated_response(result: Dict[str, Any], accept: Optional[str], stream: bool = False) -> Response:
+    """
+    Respuesta en el formato pedido por Accept (JSON por defecto).
+
+    Args:
+        result: Resultado a enviar
+        accept: Cabecera Accept de la petición
+        stream: Si True, el JSON se escribe por bloques (iter_json)
+    """
+    media_type = negotiate(accept)
+    headers = {"Vary": "Accept"}
+    if media_type == ARROW_MEDIA_TYPE:
+        body = _measured("arrow", lambda: encode_arrow(result))
+        return Response(content=body, media_type=media_type, headers=headers)
+    if media_type == PACKED_MEDIA_TYPE:
+        body = _measured("packed", lambda: encode_packed(result))
+        return Response(content=body, media_type=media_type, headers=headers)
+    if stream:
+        return StreamingResponse(_measured_stream("json-stream", iter_json(result)),
+                                 media_type=JSON_MEDIA_TYPE, headers=headers)
+    body = _measured("json", lambda: dumps(result))
+    return Response(content=body, media_type=JSON_MEDIA_TYPE, headers=headers)
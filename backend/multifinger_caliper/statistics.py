@@ -1,19 +1,21 @@
+"""
+Estadísticas de integridad por tubo (OD, ID, peso, penetración máxima).
+
+Recibe la matriz de radios, la profundidad y la tabla de collars de joints.py
+y devuelve la tabla de integridad y las curvas OD/ID. El Excel con formato
+lo genera report.py al descargarlo. Ejecutado como script, procesa el último
+dataset y exporta el Excel y los CSV en exports/.
+"""
 
-from joints import data, dept, collars
 import pandas as pd
 import numpy as np
 import os
-from pipes_list import pipes_data
-from openpyxl import load_workbook
-from openpyxl.utils import get_column_letter
-from openpyxl.styles import Alignment
-from openpyxl.styles import Border, Side
-from openpyxl.styles import Font, PatternFill
-
-
-
-
+from typing import Dict
 
+try:
+    from .pipe_catalog import PipeCatalog, pipe_catalog
+except ImportError:  # ejecutado como script
+    from pipe_catalog import PipeCatalog, pipe_catalog
 
 
 #LO QUE SE IMPORTA
@@ -26,18 +28,15 @@ from openpyxl.styles import Font, PatternFill
 #LO QUE SE CREA
 
 #DF, DATA DE DIAMETROS, SIN DEPTH
-#PIPES, TABLA DE DEPTH INICIO, INICIO Y DATA DE DIAMETROS DE CADA TUBO
+#PIPES, RANGO DE FILAS [INICIO, FIN) DE CADA TUBO DENTRO DE DF
 #SIZE, HACE PARTE DE LA TABLA DE INTEGRIDAD FINA, TIENE DEPTH INICIO, FIN, LENGTH , OD, ID, PESO
 
 
 
 # constantes
 tally_difference = 0.6/100
-
-
-collars = collars.to_numpy()
-#tablas de tubulares 
-data_fingers = data[1:,1:]  # se elimima la columna de profundidad y se dejan solo los fingers para  posteriormente pasar de radios a diametros
+EXCEL_FILE = "statistics_format.xlsx"
+CSV_FILE = "table_statistics.csv"
 
 
 # funcion para convertir radios a diametros y calcular min. max, mean, ademas de transformar la data resultante a pandas
@@ -77,268 +76,337 @@ def data_and_min_max_mean(data_fingers,dept):
 
     return data_fingers
 
-df = data_and_min_max_mean(data_fingers,dept)
-
-
-
-# Crear una lista con la data de cada uno de los tubos detectados
-pipes = []
-for i in range(len(collars)-1):
-
-    idx1 = df["DEPT"].searchsorted(collars[i,1])
-    idx2 = df["DEPT"].searchsorted(collars[i+1,0])
-    new_pipe = df[idx1+1:idx2]
-    new_pipe = pd.DataFrame(new_pipe)
-    pipes.append(new_pipe)
-
 
-
-# calcular OD, ID, Weight, Top, Bottom, Length
-
-def start_pipe_statistics(pipes):
-
-    #calcular tamaño del casing
-
-    size = pd.DataFrame(columns=["TOP","BOTTOM","LENGTH","OD","ID","WEIGHT"])
-    desviation=[]
-    for pipe in pipes:
-        new_desviation = pipe["MEAN"].var(ddof=0)*1000 # calcula la varianza de la columna MEAN
-        desviation.append(new_desviation) 
-        mean = pipe["MEAN"].mean()
-
-        if new_desviation < 1.5:   # Solo asginar tañano de casing a los tubos donde mean no tiene mucha varianza
-            new_size_down = pipes_data.loc[pipes_data["ID"] <= mean].nlargest(1, "ID")
-            new_size_up = pipes_data.loc[pipes_data["ID"] >= mean].nsmallest(1, "ID")
-
-
-            if new_size_down.empty or new_size_up.empty:
+# Tramos de cada tubo: filas [inicio, fin) de df entre el final de un collar y el inicio del siguiente
+def pipe_bounds(df: pd.DataFrame, collars: np.ndarray):
+    """
+    Índices de fila de cada tubo detectado (sin copiar la data).
+
+    Args:
+        df: DataFrame de data_and_min_max_mean (DEPT creciente)
+        collars: Tabla de collars (profundidad inicio, profundidad fin)
+
+    Returns:
+        Tupla (starts, ends) con el rango [start, end) de filas de cada tubo
+
+    Raises:
+        ValueError: si entre dos collars no queda ninguna fila
+    """
+    depth = df["DEPT"].to_numpy(dtype=np.float64)
+    starts = np.searchsorted(depth, collars[:-1, 1]) + 1
+    ends = np.searchsorted(depth, collars[1:, 0])
+    empty = np.flatnonzero(ends <= starts)
+    if len(empty):
+        i = empty[0]
+        raise ValueError(f"Tubo sin datos entre los collars {collars[i, 1]} y {collars[i + 1, 0]}")
+    return starts, ends
+
+
+class Segments:
+    """
+    Filas de todos los tubos una detrás de otra, para reducir cada tubo con
+    ufunc.reduceat sobre los desplazamientos en lugar de recorrer los tubos.
+    """
+
+    def __init__(self, starts: np.ndarray, ends: np.ndarray):
+        lengths = ends - starts
+        self.offsets = np.concatenate([[0], np.cumsum(lengths)[:-1]]).astype(np.int64)
+        self.rows = np.repeat(starts - self.offsets, lengths) + np.arange(lengths.sum())
+        self.ids = np.repeat(np.arange(len(lengths)), lengths)
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    def take(self, values: np.ndarray) -> np.ndarray:
+        return values[self.rows]
+
+    def first(self, values: np.ndarray) -> np.ndarray:
+        return values[self.rows[self.offsets]]
+
+    def last(self, values: np.ndarray) -> np.ndarray:
+        return values[self.rows[np.append(self.offsets[1:], len(self.rows)) - 1]]
+
+    def mean_var(self, values: np.ndarray):
+        """Promedio y varianza (ddof=0) de cada tubo ignorando NaN, como Series.mean() / .var(ddof=0)."""
+        x = self.take(values)
+        valid = ~np.isnan(x)
+        count = np.add.reduceat(valid.astype(np.int64), self.offsets)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = np.add.reduceat(np.where(valid, x, 0.0), self.offsets) / count
+            squares = np.where(valid, (mean[self.ids] - x) ** 2, 0.0)
+            var = np.add.reduceat(squares, self.offsets) / count
+        return mean, var
+
+    def arg_extreme(self, values: np.ndarray, reduce, name: str):
+        """
+        Extremo de cada tubo (ignorando NaN) y fila de su primera aparición, como idxmin / idxmax.
+
+        Raises:
+            ValueError: si algún tubo solo tiene NaN
+        """
+        x = self.take(values)
+        extreme = reduce.reduceat(x, self.offsets)
+        if np.isnan(extreme).any():
+            raise ValueError(f"Tubo sin valores de {name}")
+        position = np.where(x == extreme[self.ids], np.arange(len(x)), len(x))
+        return extreme, self.rows[np.minimum.reduceat(position, self.offsets)]
+
+
+def local_mode_fill(sizes: np.ndarray, k: int = 5) -> np.ndarray:
+    """
+    Asigna a los tubos sin tamaño (OD == 0) la moda, columna por columna, de
+    los k tubos anteriores y siguientes.
+
+    Reproduce el relleno que se hacía al agregar cada tubo a la tabla: en cada
+    paso solo se ven los tubos agregados hasta ese momento, y un tubo sin
+    tamaño se vuelve a evaluar mientras su ventana cambie.
+
+    Args:
+        sizes: Matriz (tubos × [OD, ID, WEIGHT])
+
+    Returns:
+        Matriz con los tubos sin tamaño rellenados
+    """
+    sizes = sizes.copy()
+    pending = [i for i in np.flatnonzero(sizes[:, 0] == 0)]
+    if not pending:
+        return sizes
+
+    dirty = set()
+    for step in range(len(sizes)):
+        dirty.update(i for i in pending if step - k <= i <= step)  # ventana con un tubo nuevo
+        for i in [i for i in pending if i <= step and sizes[i, 0] == 0]:
+            if i not in dirty:
                 continue
-            
-            #difference_dowm = abs(mean - new_size_down["ID"].iloc[0])
-            difference_up = abs(mean - new_size_up["ID"].iloc[0])
-
-            # Normalmente asignar el tamaño de casing donde el ID nominal esta por debajo de mean....
-            # .... pero si el ID nominal proxima hacia arriba esta muy cerca, se lo asigna.
-
-            if difference_up < mean*tally_difference:  #tally_difference arriba en constantes
-                od = new_size_up["OD"].iloc[0]
-                id = new_size_up["ID"].iloc[0]
-                weigth = new_size_up["WEIGHT"].iloc[0]
-                size.loc[len(size)]= {"TOP":pipe.iloc[0,0],"BOTTOM":pipe.iloc[-1,0],"LENGTH":pipe.iloc[-1,0]-pipe.iloc[0,0],"OD":od, "ID":id, "WEIGHT":weigth}
-                
-            else:
-                od = new_size_down["OD"].iloc[0]
-                id = new_size_down["ID"].iloc[0]
-                weigth = new_size_down["WEIGHT"].iloc[0]
-                size.loc[len(size)]= {"TOP":pipe.iloc[0,0],"BOTTOM":pipe.iloc[-1,0],"LENGTH":pipe.iloc[-1,0]-pipe.iloc[0,0],"OD":od, "ID":id, "WEIGHT":weigth}
-
-        else:
-            size.loc[len(size)]= {"TOP":pipe.iloc[0,0],"BOTTOM":pipe.iloc[-1,0],"LENGTH":pipe.iloc[-1,0]-pipe.iloc[0,0],"OD":0, "ID":0, "WEIGHT":0}    
-        
-        
-        def local_mode(size: pd.Series, pos: int, k: int=5, cols=None):
-
-            if cols is None:
-                cols = ["OD", "ID", "WEIGHT"]
-
-            n = len(size)
-            start = max(0, pos -k)
-            end = min(n-1, pos +k)
-
-            window = size.iloc[start:end+1]
-            mode = window[cols].mode().iloc[0]
-            return mode
-
-        idxs = size.index[size["OD"] == 0].to_list()  # lista de indices donde OD = 0
-
-        for idx in idxs:
-            mode = local_mode(size, pos=idx, k=5, cols=["OD","ID","WEIGHT"])
-            size.loc[idx,["OD","ID","WEIGHT"]] = mode
-        
-    # agregar columna item
-
-    size.insert(0,"ITEM", range(1,len(size)+1))
-       
-    return size
-
-
-statistics_table = start_pipe_statistics(pipes)
-
-
-def continue_statistics(statistics_table, pipes):
-
-    #statistics_table["MIN_ID","MIN_ID_D","MAX_LOSS","MAX_LOSS_D,","MAX_PEN","MAX_PEN_D","MAX_PEN_PERC"]=pd.NA
-    
-    for i in range(len(statistics_table)):
-        pipe = pipes[i]
-
-        #Diametro minimo y depth de diametro minimo
-        idx = pipe["MIN"].idxmin()
-        min_id = round(pipe.loc[idx,"MIN"],3)
-        min_id_d = pipe.loc[idx,"DEPT"] 
-
-        #Diametro maxima penetracion, prof maxima pen, % max pen
-        idx = pipe["MAX"].idxmax()
-        max_id = round(pipe.loc[idx,"MAX"],3)
-        max_id_d = pipe.loc[idx,"DEPT"] 
-
-        od_id = statistics_table.loc[i, "OD"]  - statistics_table.loc[i,"ID"]
-        id = statistics_table.loc[i,"ID"]
-        penetration = round((max_id-id)/(od_id)*100,2)
-        
-        if penetration < 0:
-            penetration = 0
-        elif penetration > 100:
-            penetration = 100
-
-        if penetration<=20:
-            clasification = 'I'
-        elif 20<penetration<=40:
-            clasification = 'II'
-        elif 40<penetration<=60:
-            clasification = 'III'
-        elif 60<penetration<=80:
-            clasification = 'IV'
-        elif penetration > 80:
-            clasification = 'V'
-
-
-        
-
-
-        #insetar valores a statistics_table
-        statistics_table.loc[i,"MIN_ID"]=min_id
-        statistics_table.loc[i,"MIN_ID_DEPTH"]=min_id_d
-
-        statistics_table.loc[i,"MAX_ID"]=max_id
-        statistics_table.loc[i,"MAX_ID_DEPTH"]=max_id_d
-        statistics_table.loc[i,"MAX_PEN_%"]=penetration
-        statistics_table.loc[i,"CLASS_PEN"]=clasification
-
-    def color_cell(clasification):
-        return(
-            "background-color:yellow;" if clasification == 'I' else
-            "background-color:green;" if clasification == 'II' else
-            "background-color:orange;" if clasification == 'III' else
-            "background-color:orangered;" if clasification == 'IV' else
-            "background-color:darkred;" if clasification == 'V' else
-            ""
-        )
-        
-    styled = statistics_table.style.map(color_cell, subset=pd.IndexSlice[:, "CLASS_PEN"])
-    
-    return statistics_table, styled
-
-
-
-
-statistics_table,styled = continue_statistics(statistics_table,pipes)
-
-
-
-
-
-
-
-
-
-######STIYE EL EXCEL
-
-export_dir = os.path.join(os.path.dirname(__file__), '..', '..', 'exports')
-styled.to_excel(os.path.join(export_dir,"statistics_format.xlsx"),index=False)
-# Load the exported Excel file
-wb = load_workbook(os.path.join(export_dir, "statistics_format.xlsx"))
-ws = wb.active
-# Set row heights for specific rows (adjust row numbers and heights as needed)
-ws.row_dimensions[1].height = 30  # Row 1
-
-# Save the modified file
-for row in [1]:  # The rows you modified
-    for col in range(1, ws.max_column + 1):  # All columns in the row
-        cell = ws.cell(row=row, column=col)
-        cell.alignment = Alignment(wrap_text=True)
-
-
-for col in range(1, ws.max_column + 1):  # All columns in the row
-    cell = ws.cell(row=1, column=col)
-    cell.alignment = Alignment(horizontal='center', vertical='center', wrap_text=True)
-
-
-# Center text in an entire column (e.g., column 'A' for all rows)
-  # Change to the desired column letter (e.g., 'B', 'C')
-for row in range(1, ws.max_row + 1):
-    cell = ws.cell(row=row, column=13)  # Get column number from letter
-    cell.alignment = Alignment(horizontal='center', vertical='center', wrap_text=True)
-
-thin_border = Border(
-    left=Side(style='thin'),
-    right=Side(style='thin'),
-    top=Side(style='thin'),
-    bottom=Side(style='thin')
-)
-
-# Apply borders to all cells with values
-for row in range(1, ws.max_row + 1):
-    for col in range(1, ws.max_column + 1):
-        cell = ws.cell(row=row, column=col)
-        if cell.value is not None and str(cell.value).strip() != '':
-            cell.border = thin_border
-
-
-
-# Cambiar color de fondo y fuente de la fila 1
-
-row_num = 1  # Change to the desired row number
-font_color = 'FFFFFF'  # font 
-fill_color = '708090'  # fill 
-for col in range(1, ws.max_column + 1):
-    cell = ws.cell(row=row_num, column=col)
-    cell.font = Font(color=font_color, bold=True)
-    cell.fill = PatternFill(start_color=fill_color, end_color=fill_color, fill_type='solid')
-
-# Save the modified file
-
-wb.save(os.path.join(export_dir, "statistics_format.xlsx"))
-
-statistics_table.to_csv(os.path.join(export_dir, 'table_statistics.csv'), index=False, float_format='%.4f')
-
-
-
-
-### FIN STYLE
-
-
-
-data= pd.DataFrame(data)
-data.to_csv(os.path.join(os.path.dirname(__file__), '..', '..', 'exports', 'data.csv'), index=False, float_format='%.4f')
-
-
-
+            dirty.discard(i)
+            window = sizes[max(0, i - k):min(step, i + k) + 1]
+            mode = np.empty(window.shape[1])
+            for col in range(window.shape[1]):
+                values, counts = np.unique(window[:, col], return_counts=True)
+                mode[col] = values[np.argmax(counts)]  # con empate, la menor
+            if not np.array_equal(mode, sizes[i]):
+                sizes[i] = mode
+                dirty.update(j for j in pending if abs(j - i) <= k and j != i)
+        pending = [i for i in pending if sizes[i, 0] == 0]
+        if not pending:
+            break
+    return sizes
+
+
+def classify_penetration(penetration: np.ndarray) -> np.ndarray:
+    """Clase de penetración: I (<= 20 %), II, III, IV, V (> 80 %)."""
+    return np.select(
+        [penetration <= 20, penetration <= 40, penetration <= 60, penetration <= 80, penetration > 80],
+        ["I", "II", "III", "IV", "V"], default="",
+    )
+
+
+# calcular Top, Bottom, Length, OD, ID, Weight, diámetro mínimo y máximo y penetración de todos los tubos
+
+def pipe_statistics(df: pd.DataFrame, collars: np.ndarray, catalog: PipeCatalog = pipe_catalog,
+                    tally_difference=tally_difference, pipe_od=None):
+    """
+    Construye la tabla de integridad con reducciones por tramo sobre las
+    columnas de df (sin separar la data en un DataFrame por tubo).
+
+    Args:
+        df: DataFrame de data_and_min_max_mean
+        collars: Tabla de collars (profundidad inicio, profundidad fin)
+        catalog: Catálogo de tubulares (pipe_catalog.py)
+        tally_difference: Diferencia relativa máxima para asignar el ID nominal de arriba
+        pipe_od: Diámetros externos nominales a los que se limita la búsqueda (sin
+            ellos, todo el catálogo); el OD de cada junta se elige entre ellos por
+            tramos (PipeCatalog.joint_od)
+
+    Returns:
+        DataFrame con la tabla de integridad (un tubo por fila)
+    """
+    starts, ends = pipe_bounds(df, collars)
+    segments = Segments(starts, ends)
+    depth = df["DEPT"].to_numpy(dtype=np.float64)
+
+    # Solo se asigna tamaño de casing a los tubos donde MEAN no tiene mucha varianza
+    mean, var = segments.mean_var(df["MEAN"].to_numpy(dtype=np.float64))
+    assigned = var * 1000 < 1.5
+    # Cada junta se busca solo entre los tubos del OD de su tramo
+    catalog = catalog.restrict(pipe_od)
+    joint_od, fits = catalog.joint_od(np.where(assigned, mean, np.nan), tally_difference)
+    sizes = np.zeros((len(mean), 3))
+    found = np.zeros(len(mean), dtype=bool)
+    for value in np.unique(joint_od[~np.isnan(joint_od)]):
+        part = joint_od == value
+        od_catalog = catalog.restrict([value])
+        catalog_rows, found[part] = od_catalog.match(mean[part], tally_difference)
+        sizes[part] = od_catalog.sizes(catalog_rows)
+    keep = found | ~assigned  # sin tubo en el catálogo para el promedio el tubo no se reporta
+
+    loose = assigned & ~fits
+    if loose.any():
+        print(f"[CATALOG] {loose.sum()} juntas sin ID nominal de su OD a menos de tally_difference: "
+              f"TOP {', '.join(f'{value:g}' for value in segments.first(depth)[loose])}")
+
+    sizes[~assigned] = 0
+    sizes = local_mode_fill(sizes[keep])
+
+    min_id, min_row = segments.arg_extreme(df["MIN"].to_numpy(dtype=np.float64), np.fmin, "MIN")
+    max_id, max_row = segments.arg_extreme(df["MAX"].to_numpy(dtype=np.float64), np.fmax, "MAX")
+    min_id, max_id = np.round(min_id[keep], 3), np.round(max_id[keep], 3)
+
+    od, inner = sizes[:, 0], sizes[:, 1]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        penetration = np.round((max_id - inner) / (od - inner) * 100, 2)
+    penetration = np.where(penetration < 0, 0, np.where(penetration > 100, 100, penetration))
+
+    top, bottom = segments.first(depth)[keep], segments.last(depth)[keep]
+    statistics_table = pd.DataFrame({
+        "ITEM": np.arange(1, len(od) + 1),
+        "TOP": top,
+        "BOTTOM": bottom,
+        "LENGTH": bottom - top,
+        "OD": od,
+        "ID": inner,
+        "WEIGHT": sizes[:, 2],
+        "MIN_ID": min_id,
+        "MIN_ID_DEPTH": depth[min_row[keep]],
+        "MAX_ID": max_id,
+        "MAX_ID_DEPTH": depth[max_row[keep]],
+        "MAX_PEN_%": penetration,
+        "CLASS_PEN": classify_penetration(penetration),
+    })
+    return statistics_table
+
+
+
+def export_statistics_csv(statistics_table: pd.DataFrame, export_dir: str = None) -> str:
+    """
+    Exporta la tabla de integridad a table_statistics.csv (entrada de report.py).
+
+    Returns:
+        Ruta del archivo CSV generado
+    """
+    export_dir = export_dir or os.path.join(os.path.dirname(__file__), '..', '..', 'exports')
+    os.makedirs(export_dir, exist_ok=True)
+    path = os.path.join(export_dir, CSV_FILE)
+    statistics_table.to_csv(path, index=False, float_format='%.4f')
+    return path
 
 
 #CREAR PANDAS CON LOS OD's & ID's Y SU PROFUNDIDAD
-
-def od_id(dept, statistics_table):
-
-    df_od_id = pd.DataFrame(columns = ["DEPT","OD","ID"])
-
-    dept_col=dept[:,None]
-    tops = statistics_table["BOTTOM"].to_numpy()
-    for dept in dept_col:
-
-
-        idx = np.searchsorted(tops, dept)
-        idx=int(idx)
-        if idx >=len(tops):
-            idx=len(tops)-1
-
-        df_od_id.loc[len(df_od_id)] = {
-            "DEPT":float(dept), 
-            "OD":statistics_table.iat[idx,statistics_table.columns.get_loc("OD")],
-            "ID":statistics_table.iat[idx,statistics_table.columns.get_loc("ID")]
-        }
-    return df_od_id
-
-
-df_id_od = od_id(dept,statistics_table)
-df_id_od.to_csv(os.path.join(os.path.dirname(__file__), '..', '..', 'exports', 'OD_ID.csv'), index=False, float_format='%.4f')
\ No newline at end of file
+#
+# El OD/ID se guarda por intervalos: cada tubo cubre desde el BOTTOM del anterior
+# (exclusivo) hasta su BOTTOM, el primero desde el inicio del registro y el último
+# hasta el final. Los tubos consecutivos con el mismo OD e ID se unen en un intervalo.
+
+OD_ID_INTERVAL_COLUMNS = ["TOP", "BOTTOM", "OD", "ID"]
+
+
+def od_id_intervals(statistics_table: pd.DataFrame, dept: np.ndarray) -> pd.DataFrame:
+    """
+    OD e ID por intervalos de profundidad (uno por tramo de tubos iguales).
+
+    Args:
+        statistics_table: Tabla de integridad (usa BOTTOM, OD e ID)
+        dept: Profundidad del registro (define el inicio del primer intervalo y el final del último)
+
+    Returns:
+        DataFrame con columnas TOP, BOTTOM, OD e ID
+    """
+    if statistics_table.empty or len(dept) == 0:
+        return pd.DataFrame(columns=OD_ID_INTERVAL_COLUMNS)
+
+    bottoms = statistics_table["BOTTOM"].to_numpy(dtype=np.float64)
+    od = statistics_table["OD"].to_numpy(dtype=np.float64)
+    inner = statistics_table["ID"].to_numpy(dtype=np.float64)
+
+    # Último tubo de cada tramo con el mismo OD e ID
+    last = np.ones(len(bottoms), dtype=bool)
+    last[:-1] = (od[1:] != od[:-1]) | (inner[1:] != inner[:-1])
+    bottoms, od, inner = bottoms[last], od[last], inner[last]
+    bottoms[-1] = max(bottoms[-1], float(np.max(dept)))
+
+    return pd.DataFrame({
+        "TOP": np.concatenate([[min(float(np.min(dept)), bottoms[0])], bottoms[:-1]]),
+        "BOTTOM": bottoms,
+        "OD": od,
+        "ID": inner,
+    })
+
+
+def od_id(dept: np.ndarray, intervals: pd.DataFrame) -> pd.DataFrame:
+    """
+    Asigna a cada profundidad el OD e ID del intervalo que la contiene.
+
+    Args:
+        dept: Profundidades a evaluar
+        intervals: Intervalos de od_id_intervals
+
+    Returns:
+        DataFrame con columnas DEPT, OD e ID
+    """
+    dept = np.asarray(dept, dtype=np.float64)
+    if intervals.empty:
+        return pd.DataFrame(columns=["DEPT", "OD", "ID"])
+
+    bottoms = intervals["BOTTOM"].to_numpy(dtype=np.float64)
+    idx = np.minimum(np.searchsorted(bottoms, dept), len(bottoms) - 1)
+
+    return pd.DataFrame({
+        "DEPT": dept,
+        "OD": intervals["OD"].to_numpy(dtype=np.float64)[idx],
+        "ID": intervals["ID"].to_numpy(dtype=np.float64)[idx],
+    })
+
+
+def compute_statistics(data: np.ndarray, dept: np.ndarray, collars: np.ndarray,
+                       tally_difference=tally_difference, pipe_od=None) -> Dict:
+    """
+    Calcula la tabla de integridad y las curvas OD/ID a partir de la detección de juntas.
+
+    Args:
+        data: Matriz [DEPT, R...] de joints.to_numpy
+        dept: Profundidad ajustada al gradiente (joints.detect_joints()["dept"])
+        collars: Tabla final de collars (profundidad inicio, profundidad fin)
+        tally_difference: Diferencia relativa máxima de diámetro para asignar el tubo de la tabla
+        pipe_od: Diámetros externos nominales a los que se limita la búsqueda en el catálogo
+
+    Returns:
+        Dict con diameters (DataFrame de diámetros), statistics_table y
+        od_id_intervals (OD/ID por intervalos; od_id() da los valores por muestra)
+    """
+    data_fingers = data[1:,1:]  # se elimima la columna de profundidad y se dejan solo los fingers para  posteriormente pasar de radios a diametros
+    df = data_and_min_max_mean(data_fingers, dept)
+
+    statistics_table = pipe_statistics(df, collars, tally_difference=tally_difference, pipe_od=pipe_od)
+
+    return {
+        "diameters": df,
+        "statistics_table": statistics_table,
+        "od_id_intervals": od_id_intervals(statistics_table, dept),
+    }
+
+
+if __name__ == "__main__":
+    from df_manage import get_latest_dataframe
+    from joints import to_numpy, curves_and_depth, detect_joints, export_debug_csvs, get_exports_dir
+    from dataset_store import latest_dataset
+    from report import write_integrity_report
+
+    df, filename = get_latest_dataframe(use_centralized=True)
+    if df is None:
+        print(f"[ERROR] No se pudo cargar el dataset centralizado más reciente")
+        raise SystemExit(1)
+
+    data, dept = to_numpy(df)
+    joints = detect_joints(data, dept)
+    # Los archivos de diagnóstico van al directorio de trabajo del dataset
+    dataset = latest_dataset()
+    export_dir = dataset.workspace("debug") if dataset is not None else get_exports_dir()
+    valid_r_curves, depth_col = curves_and_depth(df)
+    export_debug_csvs(data, joints, columns=[depth_col] + valid_r_curves, exports_dir=export_dir)
+
+    result = compute_statistics(data, joints["dept"], joints["collars"])
+    export_statistics_csv(result["statistics_table"], export_dir)
+    write_integrity_report(result["statistics_table"], os.path.join(export_dir, EXCEL_FILE))
+
+    pd.DataFrame(data).to_csv(os.path.join(export_dir, 'data.csv'), index=False, float_format='%.4f')
+    od_id(dept, result["od_id_intervals"]).to_csv(os.path.join(export_dir, 'OD_ID.csv'), index=False, float_format='%.4f')
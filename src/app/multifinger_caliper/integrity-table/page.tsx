@@ -5,6 +5,7 @@ import Link from "next/link";
 import { usePathname } from "next/navigation";
 import { Header } from "@/components/header";
 import { Footer } from "@/components/footer";
+import { useMultifingerCaliper } from "../layout";
 
 // An array for menu items to keep the code clean.
 const menuItems = [
@@ -16,6 +17,7 @@ const menuItems = [
 
 export default function IntegrityTablePage() {
   const pathname = usePathname();
+  const { state } = useMultifingerCaliper();
 
   // Function to handle integrity table download
   const handleDownloadIntegrityTable = async () => {
@@ -23,7 +25,12 @@ export default function IntegrityTablePage() {
       const isDevelopment = process.env.NODE_ENV === 'development';
       const backendUrl = isDevelopment ? 'http://localhost:8000' : 'https://studio-2lx4.onrender.com';
 
-      const response = await fetch(`${backendUrl}/api/multifinger-caliper/download-integrity-table`);
+      // Integrity table of the loaded dataset, for the variant that was processed
+      const params = new URLSearchParams({ centralized: String(!state.isUncentralised) });
+      if (state.datasetId) {
+        params.set("dataset_id", state.datasetId);
+      }
+      const response = await fetch(`${backendUrl}/api/multifinger-caliper/download-integrity-table?${params}`);
 
       if (!response.ok) {
         throw new Error('Failed to download integrity table');
@@ -8,6 +8,7 @@ interface MultifingerCaliperState {
   fileInfo: string | null;
   error: string | null;
   fileLoaded: boolean;
+  datasetId: string | null;
   plotData: any;
   isProcessing: boolean;
   isProcessed: boolean;
@@ -35,6 +36,7 @@ const initialState: MultifingerCaliperState = {
   fileInfo: null,
   error: null,
   fileLoaded: false,
+  datasetId: null,
   plotData: null,
   isProcessing: false,
   isProcessed: false,
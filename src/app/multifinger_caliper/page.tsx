@@ -136,16 +136,17 @@ const HTML5CanvasPlot = ({
     drawLine(maxPoints, '#cc0000');
     drawLine(avgPoints, '#66ffff');
 
-    // Draw ID line from od_id_data (black line)
-    if (data.od_id_data && Array.isArray(data.od_id_data)) {
+    // Draw ID line from od_id_intervals (black step line)
+    if (data.od_id_intervals && Array.isArray(data.od_id_intervals)) {
       const idPoints: number[][] = [];
-      data.od_id_data.forEach((item: any) => {
-        const depth = item.DEPT;
+      data.od_id_intervals.forEach((item: any) => {
+        const top = Math.max(item.TOP, visibleDepthMin);
+        const bottom = Math.min(item.BOTTOM, visibleDepthMax);
         const idValue = item.ID;
-        if (depth >= visibleDepthMin && depth <= visibleDepthMax && idValue !== null && idValue !== undefined) {
+        if (top <= bottom && idValue !== null && idValue !== undefined) {
           const x = Math.max(10, Math.min(390, ((idValue - visibleDiamMin) / (visibleDiamMax - visibleDiamMin)) * 380 + 10));
-          const y = 15 + ((depth - visibleDepthMin) / (visibleDepthMax - visibleDepthMin)) * 535;
-          idPoints.push([x, y]);
+          idPoints.push([x, 15 + ((top - visibleDepthMin) / (visibleDepthMax - visibleDepthMin)) * 535]);
+          idPoints.push([x, 15 + ((bottom - visibleDepthMin) / (visibleDepthMax - visibleDepthMin)) * 535]);
         }
       });
       drawLine(idPoints, 'black', 2); // ID line with thickness 2
@@ -837,21 +838,20 @@ const CrossSectionPlot = ({ data, currentDepth, setCurrentODID }: { data: any, c
     const centerX = 200;
     const centerY = 200;
 
-    // Find OD and ID for current depth from od_id_data
+    // Find OD and ID for current depth from od_id_intervals (TOP < depth <= BOTTOM)
     let od = 7; // default 7-inch diameter
     let id = 6.276; // default ID for 7-inch casing
-    if (data.od_id_data && Array.isArray(data.od_id_data)) {
-      let closestIndex = 0;
-      let minDepthDiff = Math.abs(data.od_id_data[0].DEPT - currentDepth);
-      for (let i = 1; i < data.od_id_data.length; i++) {
-        const diff = Math.abs(data.od_id_data[i].DEPT - currentDepth);
-        if (diff < minDepthDiff) {
-          minDepthDiff = diff;
-          closestIndex = i;
-        }
+    const intervals = data.od_id_intervals;
+    if (intervals && Array.isArray(intervals) && intervals.length > 0) {
+      let lo = 0;
+      let hi = intervals.length - 1;
+      while (lo < hi) {
+        const mid = (lo + hi) >> 1;
+        if (intervals[mid].BOTTOM < currentDepth) lo = mid + 1;
+        else hi = mid;
       }
-      od = data.od_id_data[closestIndex].OD || od;
-      id = data.od_id_data[closestIndex].ID || id;
+      od = intervals[lo].OD || od;
+      id = intervals[lo].ID || id;
     }
 
     // Update the current OD/ID values in the parent component
@@ -927,6 +927,98 @@ const CrossSectionPlot = ({ data, currentDepth, setCurrentODID }: { data: any, c
 };
 
 
+// Files above this size go to R2 as a multipart upload: parts are sent in
+// parallel and a failed part is retried on its own instead of restarting the file.
+const MULTIPART_THRESHOLD = 32 * 1024 * 1024;
+const MULTIPART_CONCURRENCY = 4;
+const MULTIPART_PART_ATTEMPTS = 3;
+
+const postJson = async (url: string, body: unknown) => {
+  const response = await fetch(url, {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify(body),
+    signal: AbortSignal.timeout(30000),
+  });
+  const data = await response.json().catch(() => ({}));
+  if (!response.ok) {
+    throw new Error(data.detail ? String(data.detail).replace("ERROR: ", "") : `Request failed: ${response.status}`);
+  }
+  return data;
+};
+
+// PUT a blob with upload progress; resolves with the ETag response header.
+const putBlob = (url: string, body: Blob, onProgress: (loaded: number) => void) =>
+  new Promise<string | null>((resolve, reject) => {
+    const xhr = new XMLHttpRequest();
+    xhr.upload.addEventListener('progress', (event) => onProgress(event.loaded));
+    xhr.addEventListener('load', () => {
+      if (xhr.status >= 200 && xhr.status < 300) {
+        resolve(xhr.getResponseHeader('ETag'));
+      } else {
+        reject(new Error(`Upload failed: ${xhr.status} ${xhr.statusText}`));
+      }
+    });
+    xhr.addEventListener('error', () => reject(new Error('Upload failed due to network error')));
+    xhr.addEventListener('timeout', () => reject(new Error('Upload timed out')));
+    xhr.open('PUT', url);
+    xhr.timeout = 300000; // 5 minutes per part
+    xhr.send(body);
+  });
+
+// Upload a file to R2 in parts and return its key (aborts the upload on failure).
+// The R2 bucket CORS policy must expose the ETag header.
+const uploadMultipartToR2 = async (file: File, backendUrl: string, onProgress: (percent: number) => void) => {
+  const api = `${backendUrl}/api/multifinger-caliper/multipart-upload`;
+  const { key, upload_id, part_size, part_count } = await postJson(`${api}/initiate`, { filename: file.name, size: file.size });
+  const presign = async (partNumbers: number[]) => {
+    const data = await postJson(`${api}/presign`, { key, upload_id, part_numbers: partNumbers });
+    return new Map<number, string>(data.parts.map((part: { part_number: number; url: string }) => [part.part_number, part.url]));
+  };
+
+  const loaded = new Array<number>(part_count).fill(0);
+  const report = () => onProgress(Math.round((loaded.reduce((sum, n) => sum + n, 0) / file.size) * 100));
+
+  try {
+    const urls = await presign(Array.from({ length: part_count }, (_, i) => i + 1));
+    const parts: { part_number: number; etag: string }[] = [];
+    let next = 0;
+
+    const uploadParts = async () => {
+      while (next < part_count) {
+        const partNumber = ++next;
+        const blob = file.slice((partNumber - 1) * part_size, partNumber * part_size);
+        for (let attempt = 1; ; attempt++) {
+          try {
+            const etag = await putBlob(urls.get(partNumber)!, blob, (n) => {
+              loaded[partNumber - 1] = n;
+              report();
+            });
+            if (!etag) throw new Error("R2 did not expose the part ETag (check the bucket CORS policy)");
+            parts.push({ part_number: partNumber, etag });
+            break;
+          } catch (err) {
+            loaded[partNumber - 1] = 0;
+            report();
+            if (attempt >= MULTIPART_PART_ATTEMPTS) throw err;
+            console.warn(`Part ${partNumber} failed (attempt ${attempt}), retrying...`, err);
+            // A fresh URL in case the previous one expired
+            urls.set(partNumber, (await presign([partNumber])).get(partNumber)!);
+          }
+        }
+      }
+    };
+
+    await Promise.all(Array.from({ length: Math.min(MULTIPART_CONCURRENCY, part_count) }, uploadParts));
+    await postJson(`${api}/complete`, { key, upload_id, parts });
+    onProgress(100);
+    return key as string;
+  } catch (err) {
+    await postJson(`${api}/abort`, { key, upload_id }).catch(() => undefined);
+    throw err;
+  }
+};
+
 // An array for menu items to keep the code clean.
 const menuItems = [
   { name: "Multifinger Home", href: "/multifinger_caliper" },
@@ -1073,66 +1165,76 @@ export default function MultifingerCaliperPage() {
           updateState({
             fileInfo: fileInfoMessage,
             fileLoaded: true,
+            datasetId: data.dataset_id ?? null,
             isProcessed: false,
             isLoading: false
           });
         } else {
           // Production: Upload via R2
-          console.log("Production mode: Getting presigned URL...");
-          const presignedResponse = await fetch(`${backendUrl}/api/multifinger-caliper/get-presigned-url`, {
-            method: "POST",
-            headers: {
-              "Content-Type": "application/json",
-            },
-            body: JSON.stringify({ filename: file.name }),
-            signal: AbortSignal.timeout(30000), // 30 seconds timeout
-          });
-
-          if (!presignedResponse.ok) {
-            const errorData = await presignedResponse.json().catch(() => ({}));
-            throw new Error(errorData.detail || "Failed to get presigned URL");
-          }
-
-          const presignedData = await presignedResponse.json();
-          const { presigned_url, key } = presignedData;
-          console.log("Presigned URL obtained, key:", key);
-
-          // Step 2: Upload file to R2 using presigned URL
-          console.log("Uploading to R2...");
-          await new Promise<void>((resolve, reject) => {
-            const xhr = new XMLHttpRequest();
-
-            xhr.upload.addEventListener('progress', (event) => {
-              if (event.lengthComputable) {
-                const percentComplete = (event.loaded / event.total) * 100;
-                setUploadProgress(Math.round(percentComplete));
-              }
+          let key: string;
+          if (file.size > MULTIPART_THRESHOLD) {
+            // Large logs: parallel multipart upload with per-part retries
+            console.log("Production mode: multipart upload to R2...");
+            key = await uploadMultipartToR2(file, backendUrl, setUploadProgress);
+            console.log("File uploaded to R2 successfully, key:", key);
+          } else {
+            console.log("Production mode: Getting presigned URL...");
+            const presignedResponse = await fetch(`${backendUrl}/api/multifinger-caliper/get-presigned-url`, {
+              method: "POST",
+              headers: {
+                "Content-Type": "application/json",
+              },
+              body: JSON.stringify({ filename: file.name }),
+              signal: AbortSignal.timeout(30000), // 30 seconds timeout
             });
 
-            xhr.addEventListener('load', () => {
-              if (xhr.status >= 200 && xhr.status < 300) {
-                setUploadProgress(100);
-                resolve();
-              } else {
-                reject(new Error(`Upload failed: ${xhr.status} ${xhr.statusText}`));
-              }
-            });
-
-            xhr.addEventListener('error', () => {
-              reject(new Error('Upload failed due to network error'));
-            });
+            if (!presignedResponse.ok) {
+              const errorData = await presignedResponse.json().catch(() => ({}));
+              throw new Error(errorData.detail || "Failed to get presigned URL");
+            }
 
-            xhr.addEventListener('timeout', () => {
-              reject(new Error('Upload timed out'));
+            const presignedData = await presignedResponse.json();
+            const { presigned_url } = presignedData;
+            key = presignedData.key;
+            console.log("Presigned URL obtained, key:", key);
+
+            // Step 2: Upload file to R2 using presigned URL
+            console.log("Uploading to R2...");
+            await new Promise<void>((resolve, reject) => {
+              const xhr = new XMLHttpRequest();
+
+              xhr.upload.addEventListener('progress', (event) => {
+                if (event.lengthComputable) {
+                  const percentComplete = (event.loaded / event.total) * 100;
+                  setUploadProgress(Math.round(percentComplete));
+                }
+              });
+
+              xhr.addEventListener('load', () => {
+                if (xhr.status >= 200 && xhr.status < 300) {
+                  setUploadProgress(100);
+                  resolve();
+                } else {
+                  reject(new Error(`Upload failed: ${xhr.status} ${xhr.statusText}`));
+                }
+              });
+
+              xhr.addEventListener('error', () => {
+                reject(new Error('Upload failed due to network error'));
+              });
+
+              xhr.addEventListener('timeout', () => {
+                reject(new Error('Upload timed out'));
+              });
+
+              xhr.open('PUT', presigned_url);
+              xhr.setRequestHeader('Content-Type', 'application/octet-stream');
+              xhr.timeout = 300000; // 5 minutes
+              xhr.send(file);
             });
 
-            xhr.open('PUT', presigned_url);
-            xhr.setRequestHeader('Content-Type', 'application/octet-stream');
-            xhr.timeout = 300000; // 5 minutes
-            xhr.send(file);
-          });
-
-          console.log("File uploaded to R2 successfully");
+            console.log("File uploaded to R2 successfully");
+          }
 
           // Step 3: Process file from R2
           console.log("Processing file from R2...");
@@ -1170,6 +1272,7 @@ export default function MultifingerCaliperPage() {
           updateState({
             fileInfo: fileInfoMessage,
             fileLoaded: true,
+            datasetId: data.dataset_id ?? null,
             isProcessed: false,
             isLoading: false
           });
@@ -1197,30 +1300,50 @@ export default function MultifingerCaliperPage() {
        // Usar el parámetro forzado si se proporciona, sino calcular del estado del toggle
        const useCentralized = forceUseCentralized !== undefined ? forceUseCentralized : !isUncentralised;
 
-       // Simular progreso de procesamiento
-       let progress = 0;
-       const progressInterval = setInterval(() => {
-         progress += Math.random() * 15 + 5; // Incremento aleatorio
-         if (progress >= 95) {
-           progress = 95;
-           clearInterval(progressInterval);
-         }
-         setProcessProgress(Math.round(progress));
-       }, 400);
-
        const isDevelopment = process.env.NODE_ENV === 'development';
        const backendUrl = isDevelopment ? 'http://localhost:8000' : 'https://studio-2lx4.onrender.com';
+       const apiUrl = `${backendUrl}/api/multifinger-caliper`;
 
-       const response = await fetch(`${backendUrl}/api/multifinger-caliper/process-caliper`, {
+       // El procesamiento corre como trabajo en segundo plano: se encola y se sigue su progreso real
+       const jobResponse = await fetch(`${apiUrl}/process-caliper`, {
          method: "POST",
          headers: {
            "Content-Type": "application/json",
          },
-         body: JSON.stringify({ use_centralized: useCentralized }),
-         signal: AbortSignal.timeout(300000), // 5 minutes timeout
+         body: JSON.stringify({ use_centralized: useCentralized, dataset_id: state.datasetId }),
+       });
+       const job = await jobResponse.json();
+       if (!jobResponse.ok) {
+         throw new Error(job.detail || "Error al encolar el procesamiento.");
+       }
+
+       await new Promise<void>((resolve, reject) => {
+         const events = new EventSource(`${apiUrl}/jobs/${job.job_id}/events`);
+         const timeout = setTimeout(() => {
+           events.close();
+           reject(new Error("Timeout al procesar los datos del caliper."));
+         }, 300000); // 5 minutes timeout
+         const finish = (callback: () => void) => {
+           clearTimeout(timeout);
+           events.close();
+           callback();
+         };
+
+         events.addEventListener("progress", (event) => {
+           const status = JSON.parse((event as MessageEvent).data);
+           setProcessProgress(status.progress);
+         });
+         events.addEventListener("done", () => finish(resolve));
+         events.addEventListener("error", (event) => {
+           // Sin datos es un corte de conexión: EventSource reconecta solo.
+           // Con datos es el fallo del trabajo; el detalle se obtiene del endpoint de resultado.
+           if ((event as MessageEvent).data) {
+             finish(resolve);
+           }
+         });
        });
 
-       clearInterval(progressInterval);
+       const response = await fetch(`${apiUrl}/jobs/${job.job_id}/result`);
        setProcessProgress(100);
 
       const data = await response.json();